@@ -7,7 +7,6 @@ Beautiful, interactive Streamlit app for RadixDLT/Scrypto development
 import streamlit as st
 import os
 import sys
-import time
 import json
 from pathlib import Path
 from datetime import datetime
@@ -16,7 +15,7 @@ from datetime import datetime
 sys.path.append(str(Path(__file__).parent))
 
 try:
-    from rag_system_openrouter import RadixRAGSystemOpenRouter
+    from rag_system_openrouter import RadixRAGSystemOpenRouter, warm_start
 except ImportError:
     st.error("❌ Could not import rag_system_openrouter.py. Make sure it's in the same directory.")
     st.stop()
@@ -394,7 +393,11 @@ st.markdown("""
 
 @st.cache_resource
 def load_rag_system(model_name):
-    """Load and cache the RAG system with selected model."""
+    """Load and cache the RAG system with selected model.
+
+    The embedding model and vector store are process-wide singletons, so
+    switching models only builds a new LLM chain.
+    """
     try:
         return RadixRAGSystemOpenRouter(model_name=model_name)
     except Exception as e:
@@ -406,33 +409,33 @@ def display_code_block(code, language="rust"):
     st.code(code, language=language)
     if st.button(f"📋 Copy {language.title()} Code", key=f"copy_{hash(code)}"):
         st.success("✅ Code copied to clipboard!")
-        time.sleep(1)  # Brief pause for user feedback
 
-def display_typing_effect(text, delay=0.02):
-    """Simulate typing effect for AI responses with enhanced animation."""
-    placeholder = st.empty()
-    displayed_text = ""
-    
-    for i, char in enumerate(text):
-        displayed_text += char
-        # Add some randomness to typing speed for more natural feel
-        actual_delay = delay + (0.01 if char in '.,!?' else 0)
-        placeholder.markdown(f'''
-        <div class="ai-message">
-            <strong>🤖 Answer:</strong><br>
-            {displayed_text}<span class="typing-indicator">|</span>
-        </div>
-        ''', unsafe_allow_html=True)
-        time.sleep(actual_delay)
-    
-    # Final display without cursor
+def render_answer(placeholder, text, streaming=False):
+    """Render an answer into a placeholder, with a cursor while tokens are streaming."""
+    cursor = '<span class="typing-indicator">|</span>' if streaming else ''
     placeholder.markdown(f'''
     <div class="ai-message">
-        <strong>🤖 Answer:</strong><br>{displayed_text}
+        <strong>🤖 Answer:</strong><br>{text}{cursor}
     </div>
     ''', unsafe_allow_html=True)
 
+def render_sources(sources, max_sources):
+    """Render source cards for an answer inside a collapsible expander."""
+    with st.expander(f"📚 Sources ({len(sources)} files used)", expanded=False):
+        for j, source in enumerate(sources[:max_sources]):
+            st.markdown(f"""
+            <div class="source-card">
+                <strong>📄 {j+1}. {source['filename']}</strong>
+                <span style="color: #64748b;">({source['content_type']})</span>
+                <br>
+                <small style="color: #94a3b8; line-height: 1.4;">{source['snippet']}</small>
+            </div>
+            """, unsafe_allow_html=True)
+
 def main():
+    # Load the embedding model and vector store in the background while the page renders
+    warm_start()
+    
     # Initialize session state early to avoid undefined variable errors
     if 'chat_history' not in st.session_state:
         st.session_state.chat_history = []
@@ -517,12 +520,10 @@ def main():
         st.markdown("### ⚙️ Settings")
         show_sources = st.checkbox("Show source documents", value=True, help="Display which documents were used to answer", key="show_sources_cb")
         max_sources = st.slider("Max sources to show", 1, 10, 3, help="Limit number of source documents shown", key="max_sources_slider")
-        enable_typing_effect = st.checkbox("Typing animation", value=True, help="Animate AI responses", key="typing_effect_cb")
         
         # Store in session state for access outside sidebar
         st.session_state.show_sources = show_sources
         st.session_state.max_sources = max_sources
-        st.session_state.enable_typing_effect = enable_typing_effect
         st.session_state.selected_model_name = selected_model_name
         
         # Enhanced stats with animations
@@ -536,19 +537,32 @@ def main():
                     avg_sources = sum(len(chat.get('sources', [])) for chat in st.session_state.chat_history) / len(st.session_state.chat_history)
                     st.metric("Avg Sources", f"{avg_sources:.1f}")
         
+        if st.session_state.rag_system and hasattr(st.session_state.rag_system, 'cache_stats'):
+            cache_stats = st.session_state.rag_system.cache_stats()
+            answers = cache_stats["answers"]
+            retrieval = cache_stats["retrieval"]
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("Answer Cache Hits", answers["hits"] + answers["semantic_hits"],
+                          help=f"{answers['misses']} misses, {answers['semantic_hits']} near-duplicate hits")
+            with col2:
+                st.metric("Retrieval Cache Hits", retrieval["hits"],
+                          help=f"{retrieval['misses']} misses")
+
+        if st.session_state.rag_system and hasattr(st.session_state.rag_system, 'context_stats'):
+            context_stats = st.session_state.rag_system.context_stats()
+            if context_stats["queries"]:
+                st.metric("Prompt Tokens Saved", context_stats["tokens_saved"],
+                          help=f"{context_stats['context_tokens']} context tokens sent over "
+                               f"{context_stats['queries']} questions")
+
         st.markdown('</div>', unsafe_allow_html=True)
     
     # Load RAG system with selected model
     if st.session_state.rag_system is None or st.session_state.current_model != selected_model:
         with st.spinner('🔄 Loading RadixDLT AI Assistant...'):
-            progress_bar = st.progress(0)
-            for i in range(100):
-                time.sleep(0.01)
-                progress_bar.progress(i + 1)
-            
             st.session_state.rag_system = load_rag_system(selected_model)
             st.session_state.current_model = selected_model
-            progress_bar.empty()
     
     # Handle quick question clicks
     if hasattr(st.session_state, 'quick_question'):
@@ -590,8 +604,6 @@ def main():
     # Handle clear button
     if clear_button:
         st.session_state.chat_history = []
-        st.success("🧹 Chat history cleared!")
-        time.sleep(1)
         st.rerun()
     
     # Process question
@@ -606,22 +618,44 @@ def main():
         ''', unsafe_allow_html=True)
         
         try:
-            # Show progress during processing
+            # Progress is driven by real pipeline stage events from the RAG system
             progress_container = st.container()
             with progress_container:
                 progress_bar = st.progress(0)
                 status_text = st.empty()
+                status_text.text("🔄 Searching knowledge base...")
                 
-                for i, step in enumerate(["Searching knowledge base", "Processing documents", "Generating response"]):
-                    status_text.text(f"🔄 {step}...")
-                    time.sleep(0.5)  # Simulate processing time
-                    progress_bar.progress((i + 1) * 33)
+                stage_progress = {
+                    "retrieval_done": (33, "Generating response"),
+                    "llm_first_token": (66, "Streaming response"),
+                    "llm_done": (100, "Done"),
+                }
                 
-                response = st.session_state.rag_system.ask(question)
-                progress_bar.progress(100)
-                time.sleep(0.5)
+                def on_stage(stage, elapsed):
+                    percent, label = stage_progress[stage]
+                    progress_bar.progress(percent)
+                    status_text.text(f"🔄 {label}... ({elapsed:.1f}s)")
                 
-                # Clear progress indicators
+                # Stream the answer live as tokens arrive from OpenRouter
+                answer_placeholder = st.empty()
+                sources_placeholder = st.empty()
+                streamed_answer = ""
+                response = None
+                for event in st.session_state.rag_system.ask_stream(question, on_stage=on_stage):
+                    if event["type"] == "sources":
+                        # Sources are known once retrieval is done, before the first token
+                        if st.session_state.show_sources and event["sources"]:
+                            with sources_placeholder.container():
+                                render_sources(event["sources"], st.session_state.max_sources)
+                    elif event["type"] == "token":
+                        if not streamed_answer:
+                            thinking_placeholder.empty()
+                        streamed_answer += event["text"]
+                        render_answer(answer_placeholder, streamed_answer, streaming=True)
+                    elif event["type"] == "done":
+                        response = event["response"]
+                
+                # Clear progress indicators (the answer and sources are shown in the history below)
                 progress_container.empty()
             
             thinking_placeholder.empty()
@@ -637,8 +671,11 @@ def main():
             })
             
             # Success feedback
-            st.success("✅ Response generated successfully!")
-            time.sleep(1)
+            total_seconds = response.get('timings', {}).get('llm_done')
+            if total_seconds is not None:
+                st.success(f"✅ Response generated in {total_seconds:.1f}s")
+            else:
+                st.success("✅ Response generated successfully!")
             
         except Exception as e:
             thinking_placeholder.empty()
@@ -659,15 +696,12 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
                 
-                # Answer with conditional typing effect
-                if st.session_state.enable_typing_effect and i == 0:  # Only for most recent
-                    display_typing_effect(chat['answer'])
-                else:
-                    st.markdown(f'''
-                    <div class="ai-message">
-                        <strong>🤖 Answer:</strong><br>{chat["answer"]}
-                    </div>
-                    ''', unsafe_allow_html=True)
+                # Answer
+                st.markdown(f'''
+                <div class="ai-message">
+                    <strong>🤖 Answer:</strong><br>{chat["answer"]}
+                </div>
+                ''', unsafe_allow_html=True)
                 
                 # Enhanced code extraction (if answer contains code)
                 if "```" in chat['answer']:
@@ -683,16 +717,7 @@ def main():
                 
                 # Sources with enhanced cards and animations
                 if st.session_state.show_sources and chat['sources']:
-                    with st.expander(f"📚 Sources ({len(chat['sources'])} files used)", expanded=False):
-                        for j, source in enumerate(chat['sources'][:st.session_state.max_sources]):
-                            st.markdown(f"""
-                            <div class="source-card">
-                                <strong>📄 {j+1}. {source['filename']}</strong>
-                                <span style="color: #64748b;">({source['content_type']})</span>
-                                <br>
-                                <small style="color: #94a3b8; line-height: 1.4;">{source['snippet']}</small>
-                            </div>
-                            """, unsafe_allow_html=True)
+                    render_sources(chat['sources'], st.session_state.max_sources)
                 
                 st.markdown("---")
     
@@ -899,18 +924,5 @@ if __name__ == "__main__":
         
         st.stop()
     
-    # Add startup animation
-    startup_container = st.container()
-    with startup_container:
-        st.markdown("""
-        <div style="text-align: center; padding: 2rem;">
-            <div style="font-size: 2rem; margin-bottom: 1rem;">🚀</div>
-            <div style="color: #00d4ff;">Initializing RadixDLT AI Assistant...</div>
-        </div>
-        """, unsafe_allow_html=True)
-        
-        time.sleep(1)
-        startup_container.empty()
-    
     # Run the main application
     main()
\ No newline at end of file
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+Structure-Aware Chunkers
+Splits Rust/Scrypto sources at item boundaries (mod, struct, impl, fn, ...)
+instead of every 1000 characters, packing small neighbouring items into one
+chunk and tagging chunks with their enclosing blueprint and impl. Items
+larger than a chunk are windowed with the fallback splitter. Markdown is
+split along its heading hierarchy in token-sized chunks that keep fenced
+code blocks whole.
+"""
+
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+# Comments, strings and char literals are skipped so their braces don't count
+RUST_TOKEN_RE = re.compile(r"""
+    //[^\n]*
+  | /\*.*?\*/
+  | (?<![\w])b?r(?P<hashes>\#*)".*?"(?P=hashes)
+  | b?"(?:\\.|[^"\\])*"
+  | b?'(?:\\.|[^'\\\n])'
+  | [{}()\[\]]
+""", re.VERBOSE | re.DOTALL)
+
+ITEM_RE = re.compile(r"""
+    ^\s*
+    (?:pub(?:\s*\([^)]*\))?\s+)?
+    (?:(?:unsafe|async|const|default|extern(?:\s+"[^"]*")?)\s+)*
+    (?:
+        (?P<kind>macro_rules!|fn|struct|enum|union|impl|mod|trait|use|const|static|type)(?=\W)
+      | (?P<macro>[A-Za-z_]\w*)!\s*[({\[]
+    )
+    \s*(?P<rest>.*)
+""", re.VERBOSE)
+
+ATTACHED_LINE_RE = re.compile(r'^\s*(?:#\[|//)')
+IDENTIFIER_RE = re.compile(r'[A-Za-z_]\w*')
+STRUCT_NAME_RE = re.compile(r'\bstruct\s+([A-Za-z_]\w*)')
+TYPE_PATH_RE = re.compile(r'[A-Za-z_][\w:]*')
+CONTAINER_KINDS = {'mod', 'impl', 'trait', 'blueprint!'}
+
+
+def impl_target(rest: str) -> str:
+    """Type name an `impl` header is for (`impl<T> Trait for Foo<T>` -> Foo)."""
+    if rest.startswith('<'):
+        depth = 0
+        for i, char in enumerate(rest):
+            depth += {'<': 1, '>': -1}.get(char, 0)
+            if depth == 0:
+                rest = rest[i + 1:]
+                break
+    rest = rest.split('{')[0].split(' where ')[0]
+    if ' for ' in f' {rest} ':
+        rest = f' {rest} '.split(' for ', 1)[1]
+    match = TYPE_PATH_RE.search(rest)
+    return match.group(0).split('::')[-1] if match else ''
+
+
+def item_name(kind: str, rest: str) -> str:
+    """Short name of an item from the text after its keyword."""
+    if kind == 'impl':
+        return impl_target(rest)
+    if kind == 'use':
+        return rest.split(';')[0].strip()
+    match = IDENTIFIER_RE.match(rest)
+    return match.group(0) if match else ''
+
+
+class RustItemChunker:
+    """Split Rust documents at item boundaries, windowing only oversized items.
+
+    Chunk metadata adds `rust_items` ("fn new; fn deposit"), `blueprint`
+    (the enclosing #[blueprint] mod), `impl` (the enclosing impl's type)
+    and `start_index`, on top of the source document's metadata.
+    """
+
+    def __init__(self, chunk_size: int = 1000, fallback=None):
+        self.chunk_size = chunk_size
+        self.fallback = fallback  # splitter with split_text(), for oversized items
+
+    def scan(self, text: str) -> Optional[List[Tuple[int, int, int]]]:
+        """(offset, brace depth, bracket depth) at the start of each line.
+
+        Lines starting inside a comment or string get depth -1. Returns None
+        if the braces don't balance, e.g. for a truncated file.
+        """
+        line_starts = [0] + [m.end() for m in re.finditer('\n', text)]
+        lines = []
+        braces = brackets = 0
+        masked_until = 0
+        tokens = RUST_TOKEN_RE.finditer(text)
+        token = next(tokens, None)
+        for start in line_starts:
+            while token is not None and token.start() < start:
+                value = token.group(0)
+                if value in '{}()[]':
+                    if value == '{':
+                        braces += 1
+                    elif value == '}':
+                        braces -= 1
+                    elif value in '([':
+                        brackets += 1
+                    else:
+                        brackets -= 1
+                    if braces < 0:
+                        return None
+                else:
+                    masked_until = max(masked_until, token.end())
+                token = next(tokens, None)
+            if start < masked_until:
+                lines.append((start, -1, -1))
+            else:
+                lines.append((start, braces, max(brackets, 0)))
+        for token in [token] + list(tokens) if token is not None else []:
+            braces += {'{': 1, '}': -1}.get(token.group(0), 0)
+        return lines if braces == 0 else None
+
+    def split_text_with_metadata(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Chunks of one Rust file as (text, metadata) pairs."""
+        lines = self.scan(text)
+        if lines is None:
+            return [(text[start:end], {"start_index": start}) for start, end in self.window_spans(text, 0, len(text))]
+        offsets = [offset for offset, _, _ in lines] + [len(text)]
+        spans = []  # (start, end, context, items, windowed)
+
+        def line_text(i):
+            return text[offsets[i]:offsets[i + 1]]
+
+        def split_region(first, last, depth, context):
+            starts = []
+            for i in range(first, last):
+                _, braces, brackets = lines[i]
+                if braces != depth or brackets != 0:
+                    continue
+                match = ITEM_RE.match(line_text(i))
+                if match is None:
+                    continue
+                start = i
+                # Attributes, doc comments and their continuation lines belong to the item
+                while start > first and lines[start - 1][1] == depth and (
+                        lines[start - 1][2] > 0 or ATTACHED_LINE_RE.match(line_text(start - 1))):
+                    start -= 1
+                if starts and start <= starts[-1][0]:
+                    continue
+                kind = match.group('kind') or 'macro'
+                name = match.group('macro') or item_name(kind, match.group('rest'))
+                if name == 'blueprint' and kind == 'macro':
+                    kind = 'blueprint!'  # Pre-0.7 Scrypto: blueprint! { struct Name { ... } impl Name { ... } }
+                attributes = text[offsets[start]:offsets[i]]
+                starts.append((start, i, kind, name, attributes))
+            if not starts:
+                add_span(first, last, context, [])
+                return
+
+            # Text before the first item (headers, imports) leads into it
+            bounds = [first] + [start for start, *_ in starts[1:]] + [last]
+            for (start, line, kind, name, attributes), seg_first, seg_last in zip(starts, bounds, bounds[1:]):
+                item_context = dict(context)
+                if kind == 'mod' and '#[blueprint]' in attributes:
+                    item_context['blueprint'] = name
+                elif kind == 'blueprint!':
+                    struct = STRUCT_NAME_RE.search(text, offsets[line], offsets[seg_last])
+                    name = struct.group(1) if struct else ''
+                    if name:
+                        item_context['blueprint'] = name
+                elif kind == 'impl' and name:
+                    item_context['impl'] = name
+                size = offsets[seg_last] - offsets[seg_first]
+                body = next((j for j in range(line + 1, seg_last) if lines[j][1] == depth + 1), None)
+                if size > self.chunk_size and kind in CONTAINER_KINDS and body is not None:
+                    # Split the container's body; its header leads into the first child
+                    split_region_with_header(seg_first, body, seg_last, depth + 1, item_context,
+                                             f"{kind} {name}".strip())
+                else:
+                    add_span(seg_first, seg_last, item_context, [f"{kind} {name}".strip()])
+
+        def split_region_with_header(header_first, body_first, last, depth, context, container):
+            count = len(spans)
+            split_region(body_first, last, depth, context)
+            start, end, span_context, items, windowed = spans[count]
+            spans[count] = (offsets[header_first], end, span_context, [container] + items, windowed)
+            if end - offsets[header_first] > self.chunk_size and not windowed:
+                # The header made the first child oversized; keep it on its own
+                spans[count:count + 1] = [(offsets[header_first], start, span_context, [container],
+                                           start - offsets[header_first] > self.chunk_size),
+                                          (start, end, span_context, items, False)]
+
+        def add_span(first, last, context, items):
+            spans.append((offsets[first], offsets[last], context, items,
+                          offsets[last] - offsets[first] > self.chunk_size))
+
+        split_region(0, len(lines), 0, {})
+        return self.pack(text, spans)
+
+    def pack(self, text: str, spans) -> List[Tuple[str, Dict[str, Any]]]:
+        """Merge neighbouring spans into chunks of up to chunk_size characters."""
+        chunks = []  # [start, end, context, items]
+        for start, end, context, items, windowed in spans:
+            if windowed and end - start > self.chunk_size:
+                # Oversized item: full windows stand alone, the last one can still pack
+                windows = self.window_spans(text, start, end)
+                chunks.extend([window_start, window_end, context, list(items)]
+                              for window_start, window_end in windows[:-1])
+                chunks.append(None)
+                start, end = windows[-1]
+            current = chunks[-1] if chunks else None
+            if current is not None and end - current[0] <= self.chunk_size:
+                # Neighbours from different impls share a chunk; drop context they disagree on
+                current[1] = end
+                current[2] = {key: value for key, value in {**current[2], **context}.items()
+                              if current[2].get(key, value) == context.get(key, value)}
+                current[3] = current[3] + items
+                continue
+            if current is None and chunks:
+                chunks.pop()
+            chunks.append([start, end, context, list(items)])
+
+        results = []
+        for start, end, context, items in filter(None, chunks):
+            raw = text[start:end]
+            stripped = raw.strip()
+            if stripped:
+                start += len(raw) - len(raw.lstrip())
+                results.append((stripped, self.metadata(start, context, items)))
+        return results
+
+    def window_spans(self, text: str, start: int, end: int) -> List[Tuple[int, int]]:
+        """(start, end) offsets of fallback-splitter windows over text[start:end]."""
+        fixed = [(i, min(i + self.chunk_size, end)) for i in range(start, end, self.chunk_size)] or [(start, end)]
+        if self.fallback is None:
+            return fixed
+        segment = text[start:end]
+        windows = self.locate_pieces(segment, self.fallback.split_text(segment))
+        if not windows:
+            return fixed  # Pieces we can't place exactly would get wrong start_index values
+        return [(start + piece_start, start + piece_end) for piece_start, piece_end in windows]
+
+    def locate_pieces(self, segment: str, pieces: List[str]) -> Optional[List[Tuple[int, int]]]:
+        """Offsets of the splitter's pieces in segment, or None if they don't tile it.
+
+        Repetitive code (match arms, builder chains) can contain a piece
+        more than once, so each piece is searched only from where it can
+        start: after the previous piece's start and at most chunk_overlap
+        characters before its end. Whatever lies between or around pieces
+        must be whitespace the splitter stripped.
+        """
+        overlap = getattr(self.fallback, '_chunk_overlap', 0)
+        windows, previous_start, previous_end = [], -1, 0
+        for piece in pieces:
+            position = segment.find(piece, max(previous_start + 1, previous_end - overlap))
+            if position < 0 or segment[previous_end:position].strip():
+                return None
+            windows.append((position, position + len(piece)))
+            previous_start, previous_end = windows[-1]
+        if segment[previous_end:].strip():
+            return None
+        return windows
+
+    @staticmethod
+    def metadata(start: int, context, items) -> Dict[str, Any]:
+        metadata = {"start_index": start, **context}
+        if items:
+            metadata["rust_items"] = "; ".join(items)
+        return metadata
+
+    def split_documents(self, documents) -> list:
+        """Split LangChain documents, keeping each source document's metadata."""
+        chunks = []
+        for doc in documents:
+            for text, metadata in self.split_text_with_metadata(doc.page_content):
+                chunks.append(type(doc)(page_content=text, metadata={**doc.metadata, **metadata}))
+        return chunks
+
+
+MD_HEADING_RE = re.compile(r'^(#{1,6})[ \t]+(.*?)[ \t#]*$')
+MD_FENCE_RE = re.compile(r'^[ \t]*(`{3,}|~{3,})')
+APPROX_TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+class TokenCounter:
+    """Count tokens with the embedding model's tokenizer, or approximate them.
+
+    The approximation (words and punctuation marks) runs when the tokenizer
+    can't be loaded; `name` records which one is in use so chunkers sized
+    with different counters don't share an index manifest.
+    """
+
+    def __init__(self, model_name: Optional[str] = None):
+        self.tokenizer = None
+        self.name = "approx"
+        if model_name:
+            try:
+                from transformers import AutoTokenizer
+                self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+                self.tokenizer.model_max_length = sys.maxsize  # Counting only; silence length warnings
+                self.name = model_name
+            except Exception as e:
+                print(f"⚠️  Tokenizer for {model_name} unavailable ({type(e).__name__}); approximating token counts")
+
+    def __call__(self, text: str) -> int:
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        return len(APPROX_TOKEN_RE.findall(text))
+
+
+class MarkdownSectionChunker:
+    """Split Markdown along its heading hierarchy, sized in tokens.
+
+    A new chunk starts at every heading unless the chunk so far is smaller
+    than min_tokens. Paragraphs and lists pack up to max_tokens; a fenced
+    code block is never split unless it exceeds max_code_tokens, and then
+    only at line boundaries, each piece fenced again. Chunk metadata adds
+    `section` (heading path, "Getting Started > Install"), `tokens` and
+    `start_index`.
+    """
+
+    def __init__(self, max_tokens: int = 256, min_tokens: int = 64,
+                 max_code_tokens: Optional[int] = None, token_length=None):
+        self.max_tokens = max_tokens
+        self.min_tokens = min_tokens
+        self.max_code_tokens = max_code_tokens or 4 * max_tokens
+        self.token_length = token_length or TokenCounter()
+
+    def blocks(self, text: str):
+        """Yield (start, end, kind, heading path) for headings, code fences and paragraphs."""
+        path: List[Tuple[int, str]] = []
+        offset = 0
+        block_start, fence, kind = None, None, None
+        for line in text.splitlines(keepends=True):
+            line_start, offset = offset, offset + len(line)
+            stripped = line.strip()
+            if fence is not None:
+                # Closing fence: same character, at least as long as the opening one
+                if stripped.startswith(fence) and not stripped.lstrip(fence[0]):
+                    yield block_start, offset, 'code', [title for _, title in path]
+                    block_start, fence = None, None
+                continue
+            fence_match = MD_FENCE_RE.match(line)
+            heading_match = MD_HEADING_RE.match(line.rstrip('\n'))
+            if (fence_match or heading_match or not stripped) and block_start is not None:
+                yield block_start, line_start, kind, [title for _, title in path]
+                block_start = None
+            if fence_match:
+                block_start, fence, kind = line_start, fence_match.group(1), 'code'
+            elif heading_match:
+                level = len(heading_match.group(1))
+                while path and path[-1][0] >= level:
+                    path.pop()
+                path.append((level, heading_match.group(2)))
+                yield line_start, offset, 'heading', [title for _, title in path]
+            elif stripped and block_start is None:
+                block_start, kind = line_start, 'text'
+        if block_start is not None:
+            # Unclosed fence or trailing paragraph
+            yield block_start, offset, kind, [title for _, title in path]
+
+    def split_text_with_metadata(self, text: str) -> List[Tuple[str, Dict[str, Any]]]:
+        """Chunks of one Markdown file as (text, metadata) pairs."""
+        chunks = []
+        current = None  # [start, end, tokens, paths]
+
+        def flush():
+            nonlocal current
+            if current is not None:
+                chunks.append(self.make_chunk(text[current[0]:current[1]], current[0], current[3], current[2]))
+                current = None
+
+        for start, end, kind, path in self.blocks(text):
+            tokens = self.token_length(text[start:end])
+            if kind == 'heading' and current is not None and current[2] >= self.min_tokens:
+                flush()
+            limit = self.max_code_tokens if kind == 'code' else self.max_tokens
+            if tokens > limit:
+                # A short lead-in (typically the section heading) joins the first piece
+                lead = None
+                if current is not None and current[2] < self.min_tokens:
+                    lead, current = current, None
+                flush()
+                chunks.extend(self.split_block(text, start, end, kind, path, lead))
+                continue
+            if current is not None and current[2] + tokens > max(self.max_tokens, tokens):
+                flush()
+            if current is None:
+                current = [start, end, tokens, [path]]
+            else:
+                current[1] = end
+                current[2] += tokens
+                current[3].append(path)
+        flush()
+        return [chunk for chunk in chunks if chunk[0]]
+
+    def split_block(self, text: str, start: int, end: int, kind: str, path,
+                    lead=None) -> List[Tuple[str, Dict[str, Any]]]:
+        """Split one oversized block at line (then word) boundaries.
+        
+        `lead` is a pending [start, end, tokens, paths] chunk that is
+        prepended to the first piece.
+        """
+        lines = text[start:end].splitlines(keepends=True)
+        block_start = start
+        opening = closing = ''
+        if kind == 'code':
+            opening = lines.pop(0)
+            if lines and MD_FENCE_RE.match(lines[-1]):
+                closing = lines.pop()
+            start += len(opening)
+        budget = self.max_code_tokens if kind == 'code' else self.max_tokens
+        budget -= self.token_length(opening + closing)
+
+        pieces, piece_start, piece_tokens, position = [], start, lead[2] if lead else 0, start
+        for line in lines:
+            tokens = self.token_length(line)
+            if position > piece_start and piece_tokens + tokens > budget:
+                pieces.append((piece_start, position))
+                piece_start, piece_tokens = position, 0
+            piece_tokens += tokens
+            position += len(line)
+        pieces.append((piece_start, position))
+
+        chunks = []
+        for number, (piece_start, piece_end) in enumerate(pieces):
+            body = text[piece_start:piece_end]
+            prefix, chunk_start, paths, piece_budget = '', piece_start, [path], budget
+            if number == 0 and lead is not None:
+                prefix, chunk_start, paths = text[lead[0]:block_start], lead[0], lead[3] + [path]
+                piece_budget = max(1, budget - lead[2])  # The lead shares the first chunk
+            if kind != 'code' and self.token_length(body) > piece_budget:
+                # A single huge line: fall back to word windows, packed word by word
+                window, window_tokens, word_start = [], 0, piece_start
+                for word in body.split(' '):
+                    tokens = self.token_length(word)
+                    if window and window_tokens + tokens > piece_budget:
+                        joined = ' '.join(window)
+                        chunks.append(self.make_chunk(prefix + joined, chunk_start, paths))
+                        word_start += len(joined) + 1
+                        prefix, chunk_start, paths, piece_budget = '', word_start, [path], budget
+                        window, window_tokens = [], 0
+                    window.append(word)
+                    window_tokens += tokens
+                chunks.append(self.make_chunk(prefix + ' '.join(window), chunk_start, paths))
+                continue
+            if kind == 'code':
+                body = opening + body.rstrip('\n') + '\n' + (closing or opening.lstrip()[:3] + '\n')
+            chunks.append(self.make_chunk(prefix + body, chunk_start, paths))
+        return chunks
+
+    def make_chunk(self, raw: str, start: int, paths, tokens: Optional[int] = None) -> Tuple[str, Dict[str, Any]]:
+        """(text, metadata) for a chunk; the section is the heading path its blocks share."""
+        stripped = raw.strip()
+        start += len(raw) - len(raw.lstrip())
+        section = list(paths[0])
+        for path in paths[1:]:
+            common = 0
+            while common < min(len(section), len(path)) and section[common] == path[common]:
+                common += 1
+            section = section[:common]
+        metadata = {"start_index": start, "tokens": tokens if tokens is not None else self.token_length(stripped)}
+        if section:
+            metadata["section"] = " > ".join(section)
+        return stripped, metadata
+
+    def split_documents(self, documents) -> list:
+        """Split LangChain documents, keeping each source document's metadata."""
+        chunks = []
+        for doc in documents:
+            for text, metadata in self.split_text_with_metadata(doc.page_content):
+                chunks.append(type(doc)(page_content=text, metadata={**doc.metadata, **metadata}))
+        return chunks
+
+
+class CodeAwareSplitter:
+    """Route documents to a splitter by file type, defaulting to the generic one."""
+
+    def __init__(self, default, by_suffix: Dict[str, Any]):
+        self.default = default
+        self.by_suffix = by_suffix
+
+    def splitter_for(self, doc):
+        suffix = Path(doc.metadata.get('source', '')).suffix
+        return self.by_suffix.get(suffix, self.default)
+
+    def split_documents(self, documents) -> list:
+        chunks = []
+        for doc in documents:
+            chunks.extend(self.splitter_for(doc).split_documents([doc]))
+        return chunks
+
+
+def compare_rust_chunking(kb_path="kb/cleaned", chunk_size=1000, chunk_overlap=200, window_overlap=100):
+    """Print chunk counts and sizes for .rs files: item chunker vs character splitter."""
+    from langchain.text_splitter import RecursiveCharacterTextSplitter
+    recursive = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separators=["\n\n", "\n", " ", ""]
+    )
+    chunker = RustItemChunker(chunk_size=chunk_size, fallback=RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=window_overlap, separators=["\n\n", "\n", " ", ""]
+    ))
+    files = sorted(p for p in Path(kb_path).rglob('*.rs') if p.is_file())
+    totals = {"recursive": [0, 0], "rust-items": [0, 0]}
+    for path in files:
+        text = path.read_text(encoding='utf-8', errors='ignore')
+        for label, chunks in (("recursive", recursive.split_text(text)),
+                              ("rust-items", [c for c, _ in chunker.split_text_with_metadata(text)])):
+            totals[label][0] += len(chunks)
+            totals[label][1] += sum(len(c) for c in chunks)
+    print(f"📐 Chunking {len(files)} Rust files (chunk_size={chunk_size})")
+    for label, (count, chars) in totals.items():
+        print(f"  {label:11} {count:7} chunks  {chars / max(count, 1):7.0f} avg chars  {chars:9} total chars")
+
+
+if __name__ == "__main__":
+    compare_rust_chunking(*sys.argv[1:2])
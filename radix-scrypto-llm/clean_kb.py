@@ -7,17 +7,33 @@ Windows long path compatible version.
 
 import os
 import re
+import json
+import hashlib
+import io
+import time
+import argparse
 import zipfile
-import tempfile
 import shutil
-from pathlib import Path
+import contextlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path, PurePosixPath
 from datetime import datetime
 from bs4 import BeautifulSoup
 import html2text
 
+from content_index import ContentIndex, NEAR_DUPLICATE_DISTANCE
+
 # Windows path length limit
 MAX_PATH_LENGTH = 240  # Conservative limit for Windows
 
+# Pages written by web_crawler.py, one subdirectory per site
+CRAWL_SUBDIR = 'crawl'
+
+# Bump whenever a change to the cleaner alters its output; it invalidates the clean manifest
+CLEANER_VERSION = '1'
+CLEAN_MANIFEST = '.clean_manifest.json'
+CHANGES_FILE = '.changes.json'
+
 def ensure_directory(file_path):
     """Ensure the directory for a file path exists."""
     Path(file_path).parent.mkdir(parents=True, exist_ok=True)
@@ -35,93 +51,208 @@ def safe_filename(filename, max_length=100):
     
     return filename
 
-def safe_extract_zip(zip_ref, member, extract_to):
-    """Safely extract ZIP member with path length protection."""
-    try:
-        # Get original path
-        original_path = member.filename
-        
-        # Create safe path by flattening deep directories
-        path_parts = original_path.split('/')
-        
-        # If path is too deep, flatten it
-        if len(path_parts) > 4:  # Arbitrary depth limit
-            # Keep first part (repo name) and last part (filename)
-            safe_parts = [path_parts[0]]
-            if len(path_parts) > 2:
-                # Add middle parts as flattened name
-                middle = '_'.join(path_parts[1:-1])
-                if len(middle) > 50:  # Truncate if too long
-                    middle = middle[:50]
-                safe_parts.append(middle)
-            safe_parts.append(path_parts[-1])
-            safe_path = '/'.join(safe_parts)
-        else:
-            safe_path = original_path
-        
-        # Ensure filename is safe
-        path_dir = os.path.dirname(safe_path)
-        filename = os.path.basename(safe_path)
-        safe_name = safe_filename(filename)
-        final_path = os.path.join(path_dir, safe_name) if path_dir else safe_name
-        
-        # Full target path
-        target_path = os.path.join(extract_to, final_path)
-        
-        # Final length check
-        if len(target_path) > MAX_PATH_LENGTH:
-            # Last resort: create a very short path
-            hash_name = str(abs(hash(original_path)))[:8]
-            ext = os.path.splitext(filename)[1]
-            final_name = f"file_{hash_name}{ext}"
-            target_path = os.path.join(extract_to, final_name)
-        
-        # Create directory and extract
-        target_dir = os.path.dirname(target_path)
-        if target_dir:
-            os.makedirs(target_dir, exist_ok=True)
+def safe_member_path(original_path, extract_to=''):
+    """Map a ZIP member name to a short, safe relative path.
+    
+    Deep paths are flattened to repo/middle_parts/filename, filenames are
+    sanitized, and anything still longer than MAX_PATH_LENGTH (once joined
+    to extract_to) falls back to a short hashed name.
+    """
+    # Create safe path by flattening deep directories
+    path_parts = original_path.split('/')
+    
+    # If path is too deep, flatten it
+    if len(path_parts) > 4:  # Arbitrary depth limit
+        # Keep first part (repo name) and last part (filename)
+        safe_parts = [path_parts[0]]
+        if len(path_parts) > 2:
+            # Add middle parts as flattened name
+            middle = '_'.join(path_parts[1:-1])
+            if len(middle) > 50:  # Truncate if too long
+                middle = middle[:50]
+            safe_parts.append(middle)
+        safe_parts.append(path_parts[-1])
+        safe_path = '/'.join(safe_parts)
+    else:
+        safe_path = original_path
+    
+    # Ensure filename is safe
+    path_dir = os.path.dirname(safe_path)
+    filename = os.path.basename(safe_path)
+    safe_name = safe_filename(filename)
+    final_path = os.path.join(path_dir, safe_name) if path_dir else safe_name
+    
+    # Final length check
+    if len(os.path.join(extract_to, final_path)) > MAX_PATH_LENGTH:
+        # Last resort: create a very short path
+        hash_name = hashlib.sha1(original_path.encode('utf-8')).hexdigest()[:8]
+        ext = os.path.splitext(filename)[1]
+        final_path = f"file_{hash_name}{ext}"
+    
+    return final_path
+
+class PruningRules:
+    """Selector lists compiled into lookup tables for a single-pass DOM walk.
+    
+    Supports the selector forms the cleaner uses: `tag`, `.class`, `#id`
+    and `tag[attr="value"]`.
+    """
+    
+    SELECTOR_RE = re.compile(r'^(?P<tag>[a-z0-9]+)?(?:\.(?P<cls>[\w-]+)|#(?P<id>[\w-]+)|\[(?P<attr>[\w-]+)="(?P<value>[^"]*)"\])?$')
+    
+    def __init__(self, unwanted_selectors, main_selectors):
+        self.unwanted_tags = set()
+        self.unwanted_classes = set()
+        self.unwanted_ids = set()
+        self.unwanted_attrs = []  # (tag, attr, value)
+        for selector in unwanted_selectors:
+            tag, cls, id_, attr, value = self.parse(selector)
+            if attr:
+                self.unwanted_attrs.append((tag, attr, value))
+            elif cls:
+                self.unwanted_classes.add(cls)
+            elif id_:
+                self.unwanted_ids.add(id_)
+            else:
+                self.unwanted_tags.add(tag)
         
-        # Extract the file
-        if not member.is_dir():
-            with zip_ref.open(member) as source:
-                with open(target_path, 'wb') as target:
-                    shutil.copyfileobj(source, target)
-            return target_path
-        else:
-            os.makedirs(target_path, exist_ok=True)
-            return target_path
-            
-    except Exception as e:
-        print(f"    ⚠️  Skipping {member.filename[:50]}...: {str(e)[:50]}")
-        return None
+        # tag / class / id -> priority (position in main_selectors)
+        self.main_tags, self.main_classes, self.main_ids = {}, {}, {}
+        for priority, selector in enumerate(main_selectors):
+            tag, cls, id_, _, _ = self.parse(selector)
+            table, key = ((self.main_classes, cls) if cls else
+                          (self.main_ids, id_) if id_ else
+                          (self.main_tags, tag))
+            table.setdefault(key, priority)
+        self.main_count = len(main_selectors)
+    
+    @classmethod
+    def parse(cls, selector):
+        match = cls.SELECTOR_RE.match(selector)
+        if not match:
+            raise ValueError(f"Unsupported selector: {selector}")
+        return match.group('tag'), match.group('cls'), match.group('id'), match.group('attr'), match.group('value')
+    
+    def is_unwanted(self, tag, classes, id_, attrs):
+        if tag in self.unwanted_tags or id_ in self.unwanted_ids:
+            return True
+        if classes and not self.unwanted_classes.isdisjoint(classes):
+            return True
+        for rule_tag, attr, value in self.unwanted_attrs:
+            if rule_tag in (None, tag) and attr in attrs:
+                actual = attrs[attr]
+                if (' '.join(actual) if isinstance(actual, list) else actual) == value:
+                    return True
+        return False
+    
+    def main_priorities(self, tag, classes, id_):
+        """Priorities of the main-content selectors this element matches."""
+        priorities = []
+        if tag in self.main_tags:
+            priorities.append(self.main_tags[tag])
+        if id_ in self.main_ids:
+            priorities.append(self.main_ids[id_])
+        for cls in classes:
+            if cls in self.main_classes:
+                priorities.append(self.main_classes[cls])
+        return priorities
+
+UNWANTED_SELECTORS = [
+    'nav', 'header', 'footer', '.nav', '.navbar', '.header', '.footer',
+    '.sidebar', '.menu', '.navigation', '.breadcrumb', '.pagination',
+    '.ad', '.advertisement', '.ads', '.social', '.share',
+    '.cookie-banner', '.cookie-notice', '.banner',
+    'script', 'style', 'meta', 'link[rel="stylesheet"]'
+]
+
+MAIN_SELECTORS = [
+    'main', '.main', '#main', '.content', '#content', 
+    '.main-content', '#main-content', '.post-content',
+    'article', '.article', '.documentation', '.docs',
+    '.markdown-body', '.wiki-content'
+]
+
+PRUNING_RULES = PruningRules(UNWANTED_SELECTORS, MAIN_SELECTORS)
 
-def clean_html_content(html_content):
+# BeautifulSoup parser; set_html_parser('lxml') switches to the faster C parser
+HTML_PARSER = 'html.parser'
+
+def set_html_parser(parser):
+    """Select the BeautifulSoup parser (also used as a process pool initializer)."""
+    global HTML_PARSER
+    if parser == 'lxml':
+        try:
+            import lxml  # noqa: F401
+        except ImportError:
+            print("⚠️  lxml not installed, falling back to html.parser")
+            parser = 'html.parser'
+    HTML_PARSER = parser
+
+def parse_html(html_content, parser=None):
+    """Parse a page with the configured BeautifulSoup parser."""
+    return BeautifulSoup(html_content, parser or HTML_PARSER)
+
+def clean_html_content(html_content, parser=None):
     """Clean HTML by removing navigation, headers, footers, and ads."""
+    return prune_soup(parse_html(html_content, parser))
+
+def prune_soup(soup):
+    """Drop unwanted elements and return the main content as HTML.
+    
+    One depth-first walk classifies every element against all unwanted
+    and main-content rules: unwanted subtrees are dropped without being
+    visited, and the first match of each main-content selector is
+    remembered so the highest-priority one can be returned.
+    """
+    rules = PRUNING_RULES
+    
+    removed = []
+    first_main = [None] * rules.main_count
+    body = None
+    stack = [soup]
+    while stack:
+        node = stack.pop()
+        for child in reversed(node.contents):
+            if child.name is None:  # Text, comments, doctype
+                continue
+            attrs = child.attrs
+            classes = attrs.get('class') or ()
+            id_ = attrs.get('id')
+            if rules.is_unwanted(child.name, classes, id_, attrs):
+                removed.append(child)
+                continue
+            stack.append(child)
+        
+        if node is not soup:
+            for priority in rules.main_priorities(node.name, node.attrs.get('class') or (), node.attrs.get('id')):
+                if first_main[priority] is None:
+                    first_main[priority] = node
+            if body is None and node.name == 'body':
+                body = node
+    
+    for element in removed:
+        element.decompose()
+    
+    main_content = next((node for node in first_main if node is not None), None)
+    
+    # If no main content found, use body or entire soup
+    if not main_content:
+        main_content = body or soup
+    
+    return str(main_content)
+
+def clean_html_content_legacy(html_content):
+    """Clean HTML with one soup.select() pass per selector (reference for --benchmark)."""
     soup = BeautifulSoup(html_content, 'html.parser')
     
     # Remove common unwanted elements
-    unwanted_selectors = [
-        'nav', 'header', 'footer', '.nav', '.navbar', '.header', '.footer',
-        '.sidebar', '.menu', '.navigation', '.breadcrumb', '.pagination',
-        '.ad', '.advertisement', '.ads', '.social', '.share',
-        '.cookie-banner', '.cookie-notice', '.banner',
-        'script', 'style', 'meta', 'link[rel="stylesheet"]'
-    ]
-    
-    for selector in unwanted_selectors:
+    for selector in UNWANTED_SELECTORS:
         for element in soup.select(selector):
             element.decompose()
     
     # Try to find main content area
     main_content = None
-    main_selectors = [
-        'main', '.main', '#main', '.content', '#content', 
-        '.main-content', '#main-content', '.post-content',
-        'article', '.article', '.documentation', '.docs',
-        '.markdown-body', '.wiki-content'
-    ]
-    
-    for selector in main_selectors:
+    for selector in MAIN_SELECTORS:
         main_content = soup.select_one(selector)
         if main_content:
             break
@@ -132,8 +263,38 @@ def clean_html_content(html_content):
     
     return str(main_content)
 
+# (substring every match must contain, compiled pattern); the list order fixes
+# the pattern index used in extracted file names
+RUST_BLOCK_PATTERNS = [
+    ('```', re.compile(r'```rust\n(.*?)\n```', re.DOTALL | re.IGNORECASE)),
+    ('```', re.compile(r'```rs\n(.*?)\n```', re.DOTALL | re.IGNORECASE)),
+    ('<', re.compile(r'<code[^>]*rust[^>]*>(.*?)</code>', re.DOTALL | re.IGNORECASE)),
+    ('<', re.compile(r'<pre[^>]*rust[^>]*>(.*?)</pre>', re.DOTALL | re.IGNORECASE)),
+]
+
 def extract_rust_code_blocks(content, base_name):
     """Extract Rust code blocks from content and return as list of (filename, code) tuples."""
+    matches = []
+    for marker, pattern in RUST_BLOCK_PATTERNS:
+        # Cheap substring check before running the pattern
+        matches.append(pattern.findall(content) if marker in content else [])
+    return rust_block_files(matches, base_name)
+
+def rust_block_files(matches, base_name):
+    """(filename, code) for the substantial blocks among each pattern's matches."""
+    rust_blocks = []
+    for i, codes in enumerate(matches):
+        for j, code in enumerate(codes):
+            # Clean up code
+            code = code.strip()
+            if len(code) > 50:  # Only save substantial code blocks
+                # Generate safe filename
+                filename = safe_filename(f"{base_name}_code_{i}_{j}.rs")
+                rust_blocks.append((filename, code))
+    return rust_blocks
+
+def extract_rust_code_blocks_legacy(content, base_name):
+    """Extract Rust code blocks with one findall per pattern (reference for --benchmark-normalizer)."""
     rust_blocks = []
     
     # Pattern for Rust code blocks in markdown
@@ -168,8 +329,121 @@ def html_to_markdown(html_content):
     
     return h.handle(html_content)
 
+EMPTY_LINK_RE = re.compile(r'\[\]\([^)]*\)')
+EMPTY_HREF_RE = re.compile(r'\[([^\]]*)\]\(\)')
+EMPTY_FENCE_RE = re.compile(r'```\s*\n```')
+HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+RUST_FENCE_OPEN_RE = re.compile(r'```(rust|rs)$', re.IGNORECASE)
+
 def normalize_markdown(content):
-    """Normalize Markdown content - clean whitespace, headers, links."""
+    """Normalize Markdown content - clean whitespace, headers, links.
+    
+    Produces exactly what normalize_markdown_legacy does, but the whitespace
+    and header rules run in one pass over the lines, and the remaining
+    patterns only run when their marker text is present.
+    """
+    return normalize_lines(content)[0]
+
+def normalize_lines(content, fences=None):
+    """normalize_markdown's work: returns (markdown, normalized lines, whether a pattern rule changed them).
+    
+    If given, `fences` collects the indices of normalized lines containing ```.
+    """
+    lines = content.split('\n')
+    last = len(lines) - 1
+    normalized = []
+    previous_blank = False
+    for i, line in enumerate(lines):
+        if not line and 0 < i < last:
+            # Collapse 3+ newlines to 2; only lines that were empty to begin
+            # with count, as the rule runs before spaces are stripped
+            if not previous_blank:
+                normalized.append(line)
+            previous_blank = True
+            continue
+        previous_blank = False
+        
+        # Remove spaces and tabs next to newlines
+        if i > 0:
+            line = line.lstrip(' \t')
+        if i < last:
+            line = line.rstrip(' \t')
+        
+        # Normalize headers (ensure space after #)
+        if line[:1] == '#':
+            hashes = len(line) - len(line.lstrip('#'))
+            if hashes <= 6 and line[hashes:hashes + 1] != ' ' and (hashes < len(line) or i < last):
+                line = line[:hashes] + ' ' + line[hashes:]
+        if fences is not None and '```' in line:
+            fences.append(len(normalized))
+        normalized.append(line)
+    content = '\n'.join(normalized)
+    substitutions = 0
+    
+    # Fix broken links (remove empty links)
+    if '[](' in content:
+        content, count = EMPTY_LINK_RE.subn('', content)
+        substitutions += count
+    if ']()' in content:
+        content, count = EMPTY_HREF_RE.subn(r'\1', content)
+        substitutions += count
+    
+    # Clean up code block markers
+    if '```' in content:
+        content, count = EMPTY_FENCE_RE.subn('', content)
+        substitutions += count
+    
+    # Remove HTML comments
+    if '<!--' in content:
+        content, count = HTML_COMMENT_RE.subn('', content)
+        substitutions += count
+    
+    return content.strip(), normalized, substitutions > 0
+
+def fenced_rust_blocks(lines, fences):
+    """Bodies of ```rust and ```rs blocks in '\n'.join(lines), as the legacy patterns find them.
+    
+    `fences` are the indices of lines containing ```. A block opens at a
+    line ending in ```rust (or ```rs) and closes at the first later line
+    starting with ```, skipping the line right after the opening; like
+    findall, the next block of the same kind starts after that ```.
+    """
+    matches = ([], [])
+    resume = [(-1, 0), (-1, 0)]  # (line, column) where each pattern's scan continues
+    for position, k in enumerate(fences):
+        opening = RUST_FENCE_OPEN_RE.search(lines[k]) if k < len(lines) - 1 else None
+        if opening is None:
+            continue
+        kind = 0 if len(opening.group(1)) == 4 else 1
+        if (k, opening.start()) < resume[kind]:
+            continue
+        closing = next((c for c in fences[position + 1:] if c > k + 1 and lines[c].startswith('```')), None)
+        if closing is None:
+            continue
+        matches[kind].append('\n'.join(lines[k + 1:closing]))
+        resume[kind] = (closing, 3)
+    return matches
+
+def normalize_and_extract(content, base_name):
+    """Normalize Markdown and extract its Rust blocks (from the normalized text).
+    
+    Fenced blocks are picked up from the normalized lines, so only the
+    rare <code>/<pre> patterns still scan the text. If a pattern rule
+    changed the text after the line pass, the blocks are extracted from
+    the final text instead, so the result always matches
+    extract_rust_code_blocks(normalize_markdown(content)).
+    """
+    fences = []
+    markdown, lines, substituted = normalize_lines(content, fences)
+    if substituted:
+        return markdown, extract_rust_code_blocks(markdown, base_name)
+    matches = list(fenced_rust_blocks(lines, fences))
+    for marker, pattern in RUST_BLOCK_PATTERNS[2:]:
+        matches.append(pattern.findall(markdown) if marker in markdown else [])
+    return markdown, rust_block_files(matches, base_name)
+
+def normalize_markdown_legacy(content):
+    """Normalize Markdown with one re.sub pass per rule (reference for --benchmark-normalizer)."""
     # Remove excessive whitespace
     content = re.sub(r'\n{3,}', '\n\n', content)
     content = re.sub(r'[ \t]+\n', '\n', content)
@@ -190,138 +464,270 @@ def normalize_markdown(content):
     
     return content.strip()
 
-def process_html_file(file_path, output_dir):
-    """Process a single HTML file."""
-    print(f"  📄 Processing HTML: {file_path.name}")
+def normalize_and_extract_legacy(content, base_name):
+    """Legacy normalize, then legacy extract (reference for --benchmark-normalizer)."""
+    markdown = normalize_markdown_legacy(content)
+    return markdown, extract_rust_code_blocks_legacy(markdown, base_name)
+
+# Path fragments that mark tests and build artifacts rather than example code
+RS_SKIP_PARTS = ['target', 'test', '.git', 'build']
+
+def zip_member_output(relative_path, repo_output_dir):
+    """Output path for a wanted ZIP member, or None to skip it.
     
-    try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            html_content = f.read()
+    README.md files are flattened into the repo directory; .rs files go to
+    examples/, src/ or the repo root. `relative_path` is the member's path
+    after safe_member_path().
+    """
+    parts = PurePosixPath(relative_path).parts
+    name = parts[-1]
+    
+    if name == 'README.md':
+        # Create a safe flattened name for README files
+        if len(parts) > 1:
+            return repo_output_dir / safe_filename(f"{'_'.join(parts[:-1])}_README.md")
+        return repo_output_dir / "README.md"
+    
+    if name.endswith('.rs'):
+        # Skip test files and build artifacts
+        if any(skip in relative_path.lower() for skip in RS_SKIP_PARTS):
+            return None
         
-        # Clean HTML content
-        cleaned_html = clean_html_content(html_content)
+        # Create organized structure
+        if 'example' in relative_path.lower():
+            output_subdir = repo_output_dir / 'examples'
+        elif 'src' in parts:
+            output_subdir = repo_output_dir / 'src'
+        else:
+            output_subdir = repo_output_dir
         
-        # Convert to Markdown
-        markdown_content = html_to_markdown(cleaned_html)
-        markdown_content = normalize_markdown(markdown_content)
+        # Create safe flattened filename to avoid conflicts
+        if len(parts) > 1:
+            return output_subdir / safe_filename('_'.join(parts[:-1]) + '_' + name)
+        return output_subdir / safe_filename(name)
+    
+    return None
+
+# --- Cleaning pipeline ---------------------------------------------------
+# Every raw input becomes one or more documents (dicts) that flow through
+# a chain of generators: fetch -> parse -> prune -> convert -> normalize
+# (which also extracts Rust blocks) -> write. HTML pages go through every stage; README.md and
+# .rs members of repository ZIPs are only fetched and written.
+
+class StageProfile:
+    """Wall time, document count and input bytes per pipeline stage."""
+    
+    def __init__(self):
+        self.stages = {}  # name -> [seconds, documents, bytes]
+    
+    def record(self, name, seconds, size):
+        totals = self.stages.setdefault(name, [0.0, 0, 0])
+        totals[0] += seconds
+        totals[1] += 1
+        totals[2] += size
+    
+    def merge(self, stages):
+        """Add another profile's stages (e.g. returned by a worker process)."""
+        for name, (seconds, documents, size) in stages.items():
+            totals = self.stages.setdefault(name, [0.0, 0, 0])
+            totals[0] += seconds
+            totals[1] += documents
+            totals[2] += size
+    
+    def report(self):
+        """Print per-stage time and throughput in pipeline order."""
+        if not self.stages:
+            return
+        total = sum(seconds for seconds, _, _ in self.stages.values())
+        print("\n📈 Pipeline profile:")
+        print(f"  {'stage':<14}{'seconds':>9}{'share':>8}{'docs':>8}{'docs/s':>10}{'MB/s':>9}")
+        for name in ['fetch'] + [stage[0] for stage in PIPELINE_STAGES]:
+            if name not in self.stages:
+                continue
+            seconds, documents, size = self.stages[name]
+            rate = documents / seconds if seconds > 0 else 0.0
+            mb_rate = size / 1e6 / seconds if seconds > 0 else 0.0
+            share = seconds / total if total > 0 else 0.0
+            print(f"  {name:<14}{seconds:9.3f}{share:8.0%}{documents:8d}{rate:10.1f}{mb_rate:9.2f}")
+
+def fetch_documents(task):
+    """Source stage: read an HTML page, or stream the wanted members of a ZIP."""
+    kind, file_path, output_dir = task
+    if kind == 'html':
+        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+            text = f.read()
+        yield {'kind': 'html', 'name': file_path.name, 'base_name': file_path.stem,
+               'output_dir': output_dir, 'text': text, 'size': len(text)}
+        return
+    
+    repo_name = safe_filename(file_path.stem.replace('_repo', '').replace('-', '_'))
+    repo_output_dir = output_dir / repo_name
+    repo_output_dir.mkdir(exist_ok=True)
+    
+    with zipfile.ZipFile(file_path, 'r') as zip_ref:
+        members = zip_ref.infolist()
+        # output path -> member; members that flatten to the same path keep the last one
+        wanted = {}
+        for member in members:
+            if member.is_dir() or not (member.filename.endswith('/README.md') or member.filename == 'README.md'
+                                       or member.filename.endswith('.rs')):
+                continue
+            output_file = zip_member_output(safe_member_path(member.filename), repo_output_dir)
+            if output_file is not None:
+                wanted[output_file] = member
+        print(f"    📂 Streaming {len(wanted)} of {len(members)} members...")
         
-        # Save Markdown file
-        base_name = file_path.stem
-        safe_md_name = safe_filename(f"{base_name}.md")
-        md_file_path = output_dir / safe_md_name
+        for output_file, member in wanted.items():
+            try:
+                with zip_ref.open(member) as source:
+                    data = source.read()
+            except Exception as e:
+                print(f"      ⚠️  Skipping {member.filename[:50]}...: {str(e)[:50]}")
+                continue
+            yield {'kind': 'copy', 'name': member.filename, 'output_path': output_file,
+                   'data': data, 'size': len(data)}
+
+def parse_stage(doc):
+    doc['soup'] = parse_html(doc.pop('text'))
+    return doc
+
+def prune_stage(doc):
+    doc['html'] = prune_soup(doc.pop('soup'))
+    return doc
+
+def convert_stage(doc):
+    doc['markdown'] = html_to_markdown(doc.pop('html'))
+    return doc
+
+def normalize_stage(doc):
+    doc['markdown'], doc['rust_blocks'] = normalize_and_extract(doc['markdown'], doc['base_name'])
+    return doc
+
+def write_stage(doc):
+    """Sink stage: write a page's Markdown and Rust blocks, or a copied ZIP member."""
+    written = []
+    if doc['kind'] == 'copy':
+        output_path = doc['output_path']
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_path, 'wb') as f:
+            f.write(doc['data'])
+        written.append(output_path)
+    else:
+        output_dir = doc['output_dir']
+        md_file_path = output_dir / safe_filename(f"{doc['base_name']}.md")
         ensure_directory(md_file_path)
-        
         with open(md_file_path, 'w', encoding='utf-8') as f:
-            f.write(markdown_content)
+            f.write(doc['markdown'])
+        written.append(md_file_path)
         
-        # Extract Rust code blocks
-        rust_blocks = extract_rust_code_blocks(markdown_content, base_name)
         examples_dir = output_dir / 'examples'
         examples_dir.mkdir(exist_ok=True)
-        
-        rust_files_created = 0
-        for filename, code in rust_blocks:
+        for filename, code in doc['rust_blocks']:
             rust_file_path = examples_dir / filename
             with open(rust_file_path, 'w', encoding='utf-8') as f:
-                f.write(f"// Extracted from {file_path.name}\n\n")
+                f.write(f"// Extracted from {doc['name']}\n\n")
                 f.write(code)
-            rust_files_created += 1
-        
-        if rust_files_created > 0:
-            print(f"    ⚡ Extracted {rust_files_created} Rust code blocks")
-        
-        return 1, rust_files_created  # md_files, rs_files
-        
+            written.append(rust_file_path)
+    doc['written'] = written
+    return doc
+
+# (name, stage function, document kinds it applies to)
+PIPELINE_STAGES = [
+    ('parse', parse_stage, {'html'}),
+    ('prune', prune_stage, {'html'}),
+    ('convert', convert_stage, {'html'}),
+    ('normalize', normalize_stage, {'html'}),
+    ('write', write_stage, {'html', 'copy'}),
+]
+
+def report_stage_error(doc, error):
+    if doc['kind'] == 'html':
+        print(f"    ❌ Error processing {doc['name']}: {error}")
+    else:
+        print(f"      ⚠️  Skipping {doc['name'][:50]}...: {str(error)[:50]}")
+
+def timed_source(name, docs, profile):
+    """Time a source generator's work per document it yields."""
+    iterator = iter(docs)
+    while True:
+        start = time.perf_counter()
+        try:
+            doc = next(iterator)
+        except StopIteration:
+            return
+        profile.record(name, time.perf_counter() - start, doc['size'])
+        yield doc
+
+def run_stage(name, stage, kinds, docs, profile):
+    """Apply one stage lazily; documents that fail are reported and dropped."""
+    for doc in docs:
+        if doc['kind'] not in kinds:
+            yield doc
+            continue
+        start = time.perf_counter()
+        try:
+            doc = stage(doc)
+        except Exception as e:
+            report_stage_error(doc, e)
+            doc = None
+        if doc is not None:
+            profile.record(name, time.perf_counter() - start, doc['size'])
+            yield doc
+
+def run_pipeline(task, profile=None):
+    """Chain every stage over one input; yields documents as they are written."""
+    profile = profile if profile is not None else StageProfile()
+    docs = timed_source('fetch', fetch_documents(task), profile)
+    for name, stage, kinds in PIPELINE_STAGES:
+        docs = run_stage(name, stage, kinds, docs, profile)
+    return docs
+
+def process_html_file(file_path, output_dir, outputs=None, profile=None):
+    """Process a single HTML file (written paths are appended to `outputs`)."""
+    print(f"  📄 Processing HTML: {file_path.name}")
+    
+    md_files = 0
+    rust_files_created = 0
+    try:
+        for doc in run_pipeline(('html', file_path, output_dir), profile):
+            if outputs is not None:
+                outputs.extend(doc['written'])
+            md_files += 1
+            rust_files_created += len(doc['rust_blocks'])
     except Exception as e:
         print(f"    ❌ Error processing {file_path.name}: {e}")
-        return 0, 0
+    
+    if rust_files_created > 0:
+        print(f"    ⚡ Extracted {rust_files_created} Rust code blocks")
+    
+    return md_files, rust_files_created  # md_files, rs_files
 
-def process_zip_file(file_path, output_dir):
-    """Process a single ZIP repository file."""
-    print(f"  📦 Processing ZIP: {file_path.name}")
+def process_zip_file(file_path, output_dir, outputs=None, profile=None):
+    """Process a single ZIP repository file (written paths are appended to `outputs`).
     
-    repo_name = safe_filename(file_path.stem.replace('_repo', '').replace('-', '_'))
-    repo_output_dir = output_dir / repo_name
-    repo_output_dir.mkdir(exist_ok=True)
+    Members are filtered by name from the archive index and only README.md
+    and .rs files are streamed, straight to their place in the output
+    directory; nothing else is extracted.
+    """
+    print(f"  📦 Processing ZIP: {file_path.name}")
     
     md_files = 0
     rs_files = 0
     
-    with tempfile.TemporaryDirectory() as temp_dir:
-        try:
-            # Extract ZIP file with safe extraction
-            with zipfile.ZipFile(file_path, 'r') as zip_ref:
-                print(f"    📂 Extracting {len(zip_ref.filelist)} files...")
-                extracted_files = []
-                
-                for member in zip_ref.filelist:
-                    if not member.is_dir():
-                        extracted_path = safe_extract_zip(zip_ref, member, temp_dir)
-                        if extracted_path:
-                            extracted_files.append(extracted_path)
-                
-                print(f"    ✅ Successfully extracted {len(extracted_files)} files")
-            
-            # Find all README.md and .rs files in extracted content
-            temp_path = Path(temp_dir)
-            
-            # Copy README.md files
-            readme_count = 0
-            for readme_file in temp_path.rglob('README.md'):
-                try:
-                    relative_path = readme_file.relative_to(temp_path)
-                    # Create a safe flattened name for README files
-                    if len(relative_path.parts) > 1:
-                        output_name = safe_filename(f"{'_'.join(relative_path.parts[:-1])}_README.md")
-                    else:
-                        output_name = "README.md"
-                    
-                    output_file = repo_output_dir / output_name
-                    shutil.copy2(readme_file, output_file)
-                    md_files += 1
-                    readme_count += 1
-                except Exception as e:
-                    print(f"      ⚠️  Skipping README: {e}")
-            
-            # Copy .rs files from examples or src directories
-            rs_count = 0
-            for rs_file in temp_path.rglob('*.rs'):
-                try:
-                    # Skip test files and build artifacts
-                    if any(skip in str(rs_file).lower() for skip in ['target', 'test', '.git', 'build']):
-                        continue
-                    
-                    relative_path = rs_file.relative_to(temp_path)
-                    
-                    # Create organized structure
-                    if 'example' in str(relative_path).lower():
-                        output_subdir = repo_output_dir / 'examples'
-                    elif 'src' in relative_path.parts:
-                        output_subdir = repo_output_dir / 'src' 
-                    else:
-                        output_subdir = repo_output_dir
-                        
-                    output_subdir.mkdir(exist_ok=True)
-                    
-                    # Create safe flattened filename to avoid conflicts
-                    if len(relative_path.parts) > 1:
-                        flattened_name = '_'.join(relative_path.parts[:-1]) + '_' + rs_file.name
-                        output_name = safe_filename(flattened_name)
-                    else:
-                        output_name = safe_filename(rs_file.name)
-                        
-                    output_file = output_subdir / output_name
-                    shutil.copy2(rs_file, output_file)
-                    rs_files += 1
-                    rs_count += 1
-                except Exception as e:
-                    print(f"      ⚠️  Skipping .rs file: {e}")
-            
-            if md_files > 0 or rs_files > 0:
-                print(f"    📋 Copied {readme_count} README files and {rs_count} RS files")
-            
-        except Exception as e:
-            print(f"    ❌ Error processing ZIP {file_path.name}: {e}")
+    try:
+        for doc in run_pipeline(('zip', file_path, output_dir), profile):
+            if outputs is not None:
+                outputs.extend(doc['written'])
+            if doc['output_path'].suffix == '.rs':
+                rs_files += 1
+            else:
+                md_files += 1
+        
+        if md_files > 0 or rs_files > 0:
+            print(f"    📋 Copied {md_files} README files and {rs_files} RS files")
+        
+    except Exception as e:
+        print(f"    ❌ Error processing ZIP {file_path.name}: {e}")
     
     return md_files, rs_files
 
@@ -380,8 +786,220 @@ This knowledge base is optimized for RAG (Retrieval-Augmented Generation) applic
     with open(readme_path, 'w', encoding='utf-8') as f:
         f.write(readme_content)
 
+def collect_tasks(raw_dir, output_dir):
+    """List (kind, input path, output dir) for every raw file, in a stable order."""
+    tasks = []
+    for file_path in sorted(raw_dir.glob('*')):
+        if not file_path.is_file() or file_path.name.startswith('.'):
+            continue
+        if file_path.suffix == '.html':
+            tasks.append(('html', file_path, output_dir))
+        elif file_path.suffix == '.zip':
+            tasks.append(('zip', file_path, output_dir))
+        else:
+            tasks.append(('skip', file_path, output_dir))
+    
+    # Crawled pages keep their site as a subdirectory so names can't collide
+    crawl_dir = raw_dir / CRAWL_SUBDIR
+    if crawl_dir.is_dir():
+        for site_dir in sorted(p for p in crawl_dir.iterdir() if p.is_dir()):
+            site_output_dir = output_dir / CRAWL_SUBDIR / site_dir.name
+            for file_path in sorted(site_dir.glob('*.html')):
+                tasks.append(('html', file_path, site_output_dir))
+    return tasks
+
+def file_sha256(path):
+    """Hash a file's bytes in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def run_task(task):
+    """Clean one raw file, capturing its log so parallel output stays in order.
+    
+    Returns (md_files, rs_files, log, seconds, outputs, stages) where
+    outputs maps each written path to its SHA-256 and stages is the
+    per-stage profile.
+    """
+    kind, file_path, output_dir = task
+    log = io.StringIO()
+    written = []
+    profile = StageProfile()
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        if kind == 'html':
+            output_dir.mkdir(parents=True, exist_ok=True)
+            md_count, rs_count = process_html_file(file_path, output_dir, written, profile)
+        elif kind == 'zip':
+            md_count, rs_count = process_zip_file(file_path, output_dir, written, profile)
+        else:
+            print(f"  ⚠️  Skipping unsupported file: {file_path.name}")
+            md_count, rs_count = 0, 0
+    outputs = {str(path): file_sha256(path) for path in written}
+    return md_count, rs_count, log.getvalue(), time.perf_counter() - start, outputs, profile.stages
+
+def load_clean_manifest(output_dir):
+    """Load the previous run's inputs -> outputs record, or {} if stale or missing."""
+    try:
+        with open(output_dir / CLEAN_MANIFEST, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if manifest.get('cleaner_version') != CLEANER_VERSION or manifest.get('parser') != HTML_PARSER:
+        return {}
+    return manifest.get('inputs', {})
+
+def write_json_atomic(path, data):
+    """Write JSON to a temp file and rename it into place."""
+    tmp_path = path.with_name(path.name + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def write_change_list(output_dir, previous_outputs, current_outputs):
+    """Write .changes.json: added/modified/deleted outputs plus every output's hash and stat.
+    
+    The indexer uses the per-file sha256/size/mtime to skip rehashing
+    files that have not been touched since this run.
+    """
+    added = sorted(set(current_outputs) - set(previous_outputs))
+    deleted = sorted(set(previous_outputs) - set(current_outputs))
+    modified = sorted(path for path in current_outputs
+                      if path in previous_outputs and previous_outputs[path] != current_outputs[path])
+    files = {}
+    for path, sha256 in current_outputs.items():
+        stat = (output_dir / path).stat()
+        files[path] = {'sha256': sha256, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+    write_json_atomic(output_dir / CHANGES_FILE, {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'cleaner_version': CLEANER_VERSION,
+        'added': added,
+        'modified': modified,
+        'deleted': deleted,
+        'files': files,
+    })
+    return added, modified, deleted
+
+def print_timing_report(timings, wall_time, jobs, top=10):
+    """Show the slowest files and the pool's effective speedup."""
+    if not timings:
+        return
+    cpu_time = sum(seconds for _, seconds in timings)
+    print(f"\n⏱️  Per-file timing (slowest {min(top, len(timings))} of {len(timings)}):")
+    for file_path, seconds in sorted(timings, key=lambda item: -item[1])[:top]:
+        print(f"  {seconds:8.3f}s  {file_path}")
+    speedup = cpu_time / wall_time if wall_time > 0 else 0.0
+    print(f"  Total {cpu_time:.2f}s of work in {wall_time:.2f}s wall time "
+          f"({jobs} jobs, {speedup:.1f}x)")
+
+def benchmark_cleaning(raw_dir, repeat=3):
+    """Time the single-pass cleaner against the legacy selector loop on kb/raw pages."""
+    pages = sorted(raw_dir.glob('*.html')) + sorted((raw_dir / CRAWL_SUBDIR).glob('*/*.html'))
+    if not pages:
+        print("❌ No HTML files found in kb/raw!")
+        return 1
+    documents = [p.read_text(encoding='utf-8', errors='ignore') for p in pages]
+    print(f"🏁 Benchmarking HTML cleaning on {len(documents)} pages (best of {repeat})\n")
+    
+    def best_time(clean):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs = [clean(html) for html in documents]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, outputs
+    
+    legacy_time, legacy_outputs = best_time(clean_html_content_legacy)
+    single_time, single_outputs = best_time(lambda html: clean_html_content(html, 'html.parser'))
+    mismatches = sum(1 for a, b in zip(legacy_outputs, single_outputs) if a != b)
+    
+    print(f"  legacy (per-selector)    {legacy_time:8.3f}s")
+    print(f"  single-pass html.parser  {single_time:8.3f}s  {legacy_time / single_time:5.1f}x")
+    try:
+        import lxml  # noqa: F401
+        lxml_time, _ = best_time(lambda html: clean_html_content(html, 'lxml'))
+        print(f"  single-pass lxml         {lxml_time:8.3f}s  {legacy_time / lxml_time:5.1f}x")
+    except ImportError:
+        print("  single-pass lxml         (lxml not installed)")
+    
+    if mismatches:
+        print(f"\n⚠️  {mismatches} pages differ from the legacy output")
+        return 1
+    print("\n✅ Single-pass output identical to legacy on every page")
+    return 0
+
+def benchmark_normalizer(cleaned_dir, repeat=5):
+    """Time normalize/extract against the per-rule legacy versions on kb/cleaned Markdown."""
+    pages = sorted(cleaned_dir.rglob('*.md'))
+    if not pages:
+        print("❌ No Markdown files found in kb/cleaned!")
+        return 1
+    documents = [(p.stem, p.read_text(encoding='utf-8', errors='ignore')) for p in pages]
+    print(f"🏁 Benchmarking Markdown normalization on {len(documents)} files (best of {repeat})\n")
+    
+    def best_time(func):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs = [func(text, base_name) for base_name, text in documents]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, outputs
+    
+    mismatches = 0
+    for label, legacy, current in [
+        ('normalize_markdown', lambda text, _: normalize_markdown_legacy(text),
+         lambda text, _: normalize_markdown(text)),
+        ('extract_rust_code_blocks', extract_rust_code_blocks_legacy, extract_rust_code_blocks),
+        ('normalize_and_extract', normalize_and_extract_legacy, normalize_and_extract),
+    ]:
+        legacy_time, legacy_outputs = best_time(legacy)
+        current_time, current_outputs = best_time(current)
+        differing = [pages[i] for i, (a, b) in enumerate(zip(legacy_outputs, current_outputs)) if a != b]
+        mismatches += len(differing)
+        print(f"  {label:26} legacy {legacy_time:7.3f}s  precompiled {current_time:7.3f}s  "
+              f"{legacy_time / current_time:5.1f}x")
+        for page in differing[:5]:
+            print(f"    ⚠️  differs: {page}")
+    
+    if mismatches:
+        print(f"\n⚠️  {mismatches} outputs differ from the legacy functions")
+        return 1
+    print("\n✅ Output byte-for-byte identical to legacy on every file")
+    return 0
+
 def main():
     """Main cleaning function."""
+    parser = argparse.ArgumentParser(description="RadixDLT / Scrypto Documentation Cleaner")
+    parser.add_argument('--jobs', type=int, default=1,
+                        help="Clean files across N worker processes (default: 1)")
+    parser.add_argument('--timing', type=int, default=10, metavar='N',
+                        help="Show the N slowest files in the timing report (default: 10)")
+    parser.add_argument('--parser', choices=['html.parser', 'lxml'], default='html.parser',
+                        help="BeautifulSoup parser for HTML pages (default: html.parser)")
+    parser.add_argument('--benchmark', action='store_true',
+                        help="Compare single-pass and legacy HTML cleaning on kb/raw and exit")
+    parser.add_argument('--benchmark-normalizer', action='store_true',
+                        help="Compare normalize/extract against the legacy regex passes on kb/cleaned and exit")
+    parser.add_argument('--profile', action='store_true',
+                        help="Print per-stage time and throughput for the cleaning pipeline")
+    parser.add_argument('--force', action='store_true',
+                        help="Reprocess every input even if it is unchanged since the last run")
+    parser.add_argument('--near-duplicates', type=int, nargs='?', const=NEAR_DUPLICATE_DISTANCE,
+                        default=None, metavar='BITS',
+                        help="Also record files whose SimHashes differ in at most BITS bits as "
+                             f"near-duplicates; they stay stored (default when given: {NEAR_DUPLICATE_DISTANCE})")
+    args = parser.parse_args()
+    
+    if args.benchmark:
+        return benchmark_cleaning(Path('kb/raw'))
+    if args.benchmark_normalizer:
+        return benchmark_normalizer(Path('kb/cleaned'))
+    set_html_parser(args.parser)
+    
     print("RadixDLT / Scrypto Documentation Cleaner (Windows Compatible)")
     print("=" * 60)
     
@@ -399,34 +1017,113 @@ def main():
     total_rs_files = 0
     processed_files = 0
     
-    # Process all files in raw directory
-    raw_files = list(raw_dir.glob('*'))
+    # Process all files in raw directory (and pages from the web crawler)
+    tasks = collect_tasks(raw_dir, output_dir)
     
-    if not raw_files:
+    if not tasks:
         print("❌ No files found in kb/raw!")
         return 1
     
-    print(f"🔍 Found {len(raw_files)} files to process\n")
-    
-    for file_path in raw_files:
-        if file_path.is_file():
-            if file_path.suffix == '.html':
-                md_count, rs_count = process_html_file(file_path, output_dir)
-                total_md_files += md_count
-                total_rs_files += rs_count
-                processed_files += 1
-                
-            elif file_path.suffix == '.zip':
-                md_count, rs_count = process_zip_file(file_path, output_dir)
-                total_md_files += md_count
-                total_rs_files += rs_count
-                processed_files += 1
-                
-            else:
-                print(f"  ⚠️  Skipping unsupported file: {file_path.name}")
+    # Skip inputs whose bytes, cleaner version and outputs are unchanged since the last run
+    previous = {} if args.force else load_clean_manifest(output_dir)
+    content_index = ContentIndex.load(output_dir)
+    input_hashes = {file_path.as_posix(): file_sha256(file_path)
+                    for kind, file_path, _ in tasks if kind != 'skip'}
+    unchanged = {key for key, input_hash in input_hashes.items()
+                 if key in previous and previous[key]['hash'] == input_hash}
+    owners = {path: key for key, entry in previous.items() for path in entry.get('outputs', {})}
+    
+    def output_available(path):
+        # A removed duplicate is still covered while its canonical copy is intact
+        if (output_dir / path).exists():
+            return True
+        canonical = content_index.duplicates.get(path)
+        return (canonical is not None and owners.get(canonical) in unchanged
+                and (output_dir / canonical).exists())
+    
+    inputs = {}
+    pending = []
+    skipped = 0
+    for task in tasks:
+        kind, file_path, _ = task
+        if kind == 'skip':
+            pending.append(task)
+            continue
+        key = file_path.as_posix()
+        input_hash = input_hashes[key]
+        entry = previous.get(key)
+        if key in unchanged and all(output_available(path) for path in entry['outputs']):
+            inputs[key] = entry
+            total_md_files += entry['md_files']
+            total_rs_files += entry['rs_files']
+            skipped += 1
+            continue
+        inputs[key] = {'hash': input_hash}
+        pending.append(task)
+    
+    print(f"🔍 Found {len(tasks)} files, {len(pending)} to process ({skipped} unchanged)\n")
+    
+    jobs = max(1, args.jobs)
+    timings = []
+    profile = StageProfile()
+    start = time.perf_counter()
+    if jobs > 1 and len(pending) > 1:
+        pool = ProcessPoolExecutor(max_workers=jobs, initializer=set_html_parser,
+                                   initargs=(HTML_PARSER,))
+        # map() yields results in input order, so logs and counts are deterministic
+        results = pool.map(run_task, pending)
+    else:
+        pool = None
+        results = map(run_task, pending)
+    
+    try:
+        for (kind, file_path, _), (md_count, rs_count, log, seconds, outputs, stages) in zip(pending, results):
+            print(log, end='')
+            timings.append((file_path, seconds))
+            profile.merge(stages)
+            if kind == 'skip':
+                continue
+            inputs[file_path.as_posix()].update({
+                'outputs': {Path(path).relative_to(output_dir).as_posix(): sha256
+                            for path, sha256 in outputs.items()},
+                'md_files': md_count,
+                'rs_files': rs_count,
+            })
+            total_md_files += md_count
+            total_rs_files += rs_count
+            processed_files += 1
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    wall_time = time.perf_counter() - start
+    
+    # Outputs no input produces any more (changed or removed inputs) are orphans
+    previous_outputs = {path: sha256 for entry in previous.values()
+                        for path, sha256 in entry.get('outputs', {}).items()}
+    current_outputs = {path: sha256 for entry in inputs.values()
+                       for path, sha256 in entry['outputs'].items()}
+    for path in set(previous_outputs) - set(current_outputs):
+        orphan = output_dir / path
+        if orphan.exists():
+            orphan.unlink()
+    
+    # Store identical outputs once (and optionally record near-identical ones)
+    previous_stored = {path: sha256 for path, sha256 in previous_outputs.items()
+                       if path not in content_index.duplicates}
+    stored_outputs = content_index.deduplicate(current_outputs, near_distance=args.near_duplicates)
+    content_index.save()
+    
+    write_json_atomic(output_dir / CLEAN_MANIFEST, {
+        'cleaner_version': CLEANER_VERSION,
+        'parser': HTML_PARSER,
+        'inputs': inputs,
+    })
+    added, modified, deleted = write_change_list(output_dir, previous_stored, stored_outputs)
     
-    # Update README with results
-    update_readme(output_dir, total_md_files, total_rs_files)
+    # Update README with results (only when the knowledge base changed)
+    readme_updated = bool(added or modified or deleted) or not (output_dir / 'README.md').exists()
+    if readme_updated:
+        update_readme(output_dir, total_md_files, total_rs_files)
     
     # Print final summary
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -434,11 +1131,21 @@ def main():
     print("\n" + "=" * 60)
     print("🎯 CLEANING COMPLETE")
     print("=" * 60)
-    print(f"🔢 Files processed: {processed_files}")
+    print(f"🔢 Files processed: {processed_files} ({skipped} unchanged inputs skipped)")
     print(f"📄 Markdown files generated: {total_md_files}")
     print(f"⚡ Rust files extracted: {total_rs_files}")
+    dedupe = content_index.stats
+    print(f"🧬 Stored once: {len(stored_outputs)} files ({dedupe['duplicates']} exact copies dropped, "
+          f"{dedupe['bytes_saved'] / 1024:.0f} KB saved; {dedupe['near_duplicates']} near-duplicates "
+          f"recorded) -> {output_dir / content_index.path.name}")
     print(f"🕐 Timestamp: {timestamp}")
-    print(f"📋 Updated: kb/cleaned/README.md")
+    print(f"🔁 Outputs: {len(added)} added, {len(modified)} modified, {len(deleted)} deleted "
+          f"-> {output_dir / CHANGES_FILE}")
+    if readme_updated:
+        print(f"📋 Updated: kb/cleaned/README.md")
+    print_timing_report(timings, wall_time, jobs, top=args.timing)
+    if args.profile:
+        profile.report()
     print(f"\n✨ Knowledge base ready for RAG applications!")
     
     return 0
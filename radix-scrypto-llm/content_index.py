@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Content-Addressed Knowledge Base Index
+Stores each distinct cleaned file once. Outputs with identical bytes
+collapse onto one canonical path that records every provenance path it
+stands for, so the same README or blueprint shipped in several example
+repos is chunked and embedded once. Near-duplicates found by SimHash are
+only recorded against their group's canonical file: their text differs,
+so it stays on disk and in the index.
+"""
+
+import hashlib
+import json
+import os
+import re
+from collections import defaultdict
+from pathlib import Path, PurePosixPath
+from typing import Dict, List, Optional
+
+CONTENT_INDEX_FILENAME = ".content_index.json"
+CONTENT_INDEX_VERSION = 2  # 2: near-duplicates are recorded, not removed
+SIMHASH_BITS = 64
+NEAR_DUPLICATE_DISTANCE = 3  # Default max Hamming distance between SimHashes
+
+RUST_COMMENT_RE = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+HTML_COMMENT_RE = re.compile(r'<!--.*?-->', re.DOTALL)
+TOKEN_RE = re.compile(r'\w+|[^\w\s]')
+
+
+def strip_comments(text: str, suffix: str) -> str:
+    """Drop comments that do not change what a file means."""
+    if suffix == '.rs':
+        return RUST_COMMENT_RE.sub(' ', text)
+    return HTML_COMMENT_RE.sub(' ', text)
+
+
+def simhash(text: str, suffix: str = '.md', shingle: int = 3) -> int:
+    """64-bit SimHash over token shingles, ignoring whitespace and comments."""
+    tokens = TOKEN_RE.findall(strip_comments(text, suffix))
+    if len(tokens) < shingle:
+        tokens = tokens + [''] * (shingle - len(tokens))
+    features = {' '.join(tokens[i:i + shingle]) for i in range(len(tokens) - shingle + 1)}
+    # One row of bits per feature; count the set bits column by column
+    rows = [format(int.from_bytes(hashlib.blake2b(f.encode('utf-8'), digest_size=8).digest(), 'big'), '064b')
+            for f in features]
+    threshold = len(rows) / 2
+    votes = [column.count('1') > threshold for column in zip(*rows)]
+    return int(''.join('1' if vote else '0' for vote in votes), 2)
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return bin(a ^ b).count('1')
+
+
+def near_duplicate_pairs(hashes: Dict[str, int], max_distance: int = NEAR_DUPLICATE_DISTANCE):
+    """Yield (key, key) pairs whose SimHashes differ in at most max_distance bits.
+
+    Splits each hash into max_distance + 1 bands: two hashes within the
+    distance must agree on at least one band, so only keys sharing a band
+    are compared.
+    """
+    bands = max_distance + 1
+    width = SIMHASH_BITS // bands
+    seen = set()
+    for band in range(bands):
+        shift = band * width
+        mask = (1 << (SIMHASH_BITS - shift if band == bands - 1 else width)) - 1
+        buckets = defaultdict(list)
+        for key, value in hashes.items():
+            buckets[(value >> shift) & mask].append(key)
+        for keys in buckets.values():
+            for i, a in enumerate(keys):
+                for b in keys[i + 1:]:
+                    pair = (a, b) if a < b else (b, a)
+                    if pair not in seen and hamming_distance(hashes[a], hashes[b]) <= max_distance:
+                        seen.add(pair)
+                        yield pair
+
+
+class ContentIndex:
+    """Canonical path -> provenance for a cleaned knowledge base directory."""
+
+    def __init__(self, kb_path):
+        self.kb_path = Path(kb_path)
+        self.path = self.kb_path / CONTENT_INDEX_FILENAME
+        self.near_distance: Optional[int] = None
+        # canonical -> {"sha256": str, "provenance": [paths], "near_duplicates": {path: sha256}}
+        # A near-duplicate's own entry points back with "near_duplicate_of": canonical
+        self.files: Dict[str, Dict] = {}
+        self.duplicates: Dict[str, str] = {}  # removed exact-duplicate path -> canonical path
+        self.simhashes: Dict[str, str] = {}  # sha256 -> hex SimHash, reused across runs
+        self.stats = {"duplicates": 0, "near_duplicates": 0, "bytes_saved": 0}
+
+    @classmethod
+    def load(cls, kb_path) -> "ContentIndex":
+        """Load the index, or return an empty one if missing or unreadable."""
+        index = cls(kb_path)
+        try:
+            with open(index.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return index
+        if data.get("version") != CONTENT_INDEX_VERSION:
+            return index
+        index.near_distance = data.get("near_distance")
+        index.files = data.get("files", {})
+        index.duplicates = data.get("duplicates", {})
+        index.simhashes = data.get("simhashes", {})
+        return index
+
+    def save(self):
+        """Write the index atomically."""
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": CONTENT_INDEX_VERSION,
+                "near_distance": self.near_distance,
+                "files": self.files,
+                "duplicates": self.duplicates,
+                "simhashes": self.simhashes,
+            }, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+    def provenance(self, relative_path: str) -> List[str]:
+        """Every path whose exact content a stored file stands for (just itself if unique)."""
+        entry = self.files.get(relative_path)
+        if not entry or "provenance" not in entry:
+            return [relative_path]
+        return entry["provenance"]
+
+    def near_duplicates(self, relative_path: str) -> List[str]:
+        """Stored files in the same near-duplicate group as this one, canonical first."""
+        entry = self.files.get(relative_path, {})
+        canonical = entry.get("near_duplicate_of", relative_path)
+        group = [canonical] + sorted(self.files.get(canonical, {}).get("near_duplicates", {}))
+        return [path for path in group if path != relative_path] if len(group) > 1 else []
+
+    def file_signature(self, relative_path: str, sha256: str) -> str:
+        """A stored file's hash extended with its provenance, so a provenance change also counts as a change."""
+        related = self.provenance(relative_path) + self.near_duplicates(relative_path)
+        if len(related) == 1:
+            return sha256
+        return sha256 + ':' + hashlib.sha1('\n'.join(related).encode('utf-8')).hexdigest()
+
+    def _simhash(self, relative_path: str, sha256: str) -> int:
+        cached = self.simhashes.get(sha256)
+        if cached is None:
+            path = self.kb_path / relative_path
+            text = path.read_text(encoding='utf-8', errors='ignore')
+            cached = self.simhashes[sha256] = format(simhash(text, path.suffix), '016x')
+        return int(cached, 16)
+
+    def deduplicate(self, outputs: Dict[str, str], near_distance: Optional[int] = None) -> Dict[str, str]:
+        """Collapse exact duplicate outputs on disk and return the outputs still stored.
+
+        `outputs` maps every path the cleaner produced (relative to kb_path)
+        to its sha256, including paths an earlier run already removed as
+        duplicates. Each group keeps its previous canonical path when it is
+        still on disk, else the first existing path in sorted order. With
+        near_distance set, groups of the same file type whose SimHashes are
+        that close are linked in the index, but every one stays stored.
+        """
+        previous_canonical = set(self.files)
+        groups = defaultdict(list)
+        for path, sha256 in outputs.items():
+            groups[sha256].append(path)
+
+        canonical_by_hash = {}
+        for sha256, paths in groups.items():
+            existing = [p for p in sorted(paths) if (self.kb_path / p).exists()]
+            if not existing:
+                print(f"⚠️  No stored copy left for {sorted(paths)[0]}; rerun with --force")
+                continue
+            kept = [p for p in existing if p in previous_canonical]
+            canonical_by_hash[sha256] = (kept or existing)[0]
+
+        # Near-duplicates: link exact groups of the same file type by SimHash
+        merged_into = {}
+        if near_distance is not None:
+            by_suffix = defaultdict(dict)
+            for sha256, canonical in canonical_by_hash.items():
+                by_suffix[PurePosixPath(canonical).suffix][sha256] = self._simhash(canonical, sha256)
+            parent = {}
+
+            def find(key):
+                while parent.get(key, key) != key:
+                    key = parent[key]
+                return key
+
+            for hashes in by_suffix.values():
+                for a, b in near_duplicate_pairs(hashes, near_distance):
+                    root_a, root_b = find(a), find(b)
+                    if root_a != root_b:
+                        # The group whose canonical path sorts first leads
+                        if canonical_by_hash[root_b] < canonical_by_hash[root_a]:
+                            root_a, root_b = root_b, root_a
+                        parent[root_b] = root_a
+            merged_into = {sha256: find(sha256) for sha256 in parent}
+
+        files, duplicates, stored = {}, {}, {}
+        stats = {"duplicates": 0, "near_duplicates": 0, "bytes_saved": 0}
+        for sha256, canonical in sorted(canonical_by_hash.items(), key=lambda item: item[1]):
+            files[canonical] = {"sha256": sha256, "provenance": sorted(groups[sha256])}
+            stored[canonical] = sha256
+        for sha256, root in merged_into.items():
+            canonical = canonical_by_hash[sha256]
+            files[canonical_by_hash[root]].setdefault("near_duplicates", {})[canonical] = sha256
+            files[canonical]["near_duplicate_of"] = canonical_by_hash[root]
+            stats["near_duplicates"] += 1
+
+        for canonical, entry in files.items():
+            removed = [p for p in entry["provenance"] if p != canonical]
+            stats["duplicates"] += len(removed)
+            if removed:
+                stats["bytes_saved"] += (self.kb_path / canonical).stat().st_size * len(removed)
+            for path in removed:
+                duplicates[path] = canonical
+                (self.kb_path / path).unlink(missing_ok=True)
+            if not removed:
+                del entry["provenance"]
+
+        # Unique files need no entry; keep only files with something to record
+        self.files = {path: entry for path, entry in files.items() if len(entry) > 1}
+        self.duplicates = duplicates
+        self.near_distance = near_distance
+        self.stats = stats
+        live_hashes = set(outputs.values())
+        self.simhashes = {sha256: value for sha256, value in self.simhashes.items() if sha256 in live_hashes}
+        return stored
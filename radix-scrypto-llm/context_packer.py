@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Token-Budgeted Context Packing
+Turns retrieved chunks into the context for the "stuff" prompt: chunks from
+the same file that overlap or sit next to each other are merged, chunks
+already contained in another are dropped, and the best-ranked blocks are
+packed until the model's token budget is spent.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+WHITESPACE_RE = re.compile(r'\s+')
+MIN_OVERLAP_CHARS = 32  # Shorter suffix/prefix matches are treated as coincidence
+ADJACENT_GAP_CHARS = 2  # Chunks at most this far apart (by start_index) are merged
+
+
+def overlap_length(first: str, second: str, max_overlap: int = 2000) -> int:
+    """Length of the longest suffix of `first` that is a prefix of `second`."""
+    probe = second[:MIN_OVERLAP_CHARS]
+    if len(probe) < MIN_OVERLAP_CHARS:
+        return 0
+    position = first.find(probe, max(0, len(first) - max_overlap))
+    while position >= 0:
+        length = len(first) - position
+        if second.startswith(first[position:]):
+            return length
+        position = first.find(probe, position + 1)
+    return 0
+
+
+class ContextBlock:
+    """One or more merged chunks from the same source, with the best rank among them."""
+
+    def __init__(self, doc, rank: int):
+        self.doc = doc
+        self.text = doc.page_content
+        self.source = doc.metadata.get("source")
+        self.start = doc.metadata.get("start_index")
+        # Tracked separately from the text, which may not match the file byte for byte
+        self.end = None if self.start is None else self.start + len(self.text)
+        self.rank = rank
+        self.chunks = 1
+
+    def try_merge(self, other: "ContextBlock") -> bool:
+        """Absorb `other` if it comes from the same file and overlaps or abuts this block."""
+        if self.source is None or other.source != self.source:
+            return False
+        if self.start is not None and other.start is not None:
+            first, second = (self, other) if self.start <= other.start else (other, self)
+            if second.start > first.end + ADJACENT_GAP_CHARS:
+                return False
+            # Trust the offsets only where the text agrees: re-fenced Markdown
+            # code pieces are not exact slices of the file
+            cut = first.end - second.start
+            if second.text in first.text:
+                text = first.text
+            elif cut < 0:
+                text = first.text + "\n" + second.text  # Separated only by whitespace
+            elif first.text.endswith(second.text[:cut]):
+                text = first.text + second.text[cut:]
+            else:
+                overlap = overlap_length(first.text, second.text)
+                text = first.text + (second.text[overlap:] if overlap else "\n" + second.text)
+            self.start, self.end = first.start, max(first.end, second.end)
+        else:
+            # No offsets (older index): merge only on a real suffix/prefix overlap
+            overlap = overlap_length(self.text, other.text)
+            if overlap:
+                text = self.text + other.text[overlap:]
+            else:
+                overlap = overlap_length(other.text, self.text)
+                if not overlap:
+                    return False
+                text = other.text + self.text[overlap:]
+        self.text = text
+        self.rank = min(self.rank, other.rank)
+        self.chunks += other.chunks
+        return True
+
+
+class ContextPacker:
+    """Merge, deduplicate and pack retrieved documents into a token budget."""
+
+    def __init__(self, token_length: Callable[[str], int]):
+        self.token_length = token_length
+
+    def pack(self, documents: Sequence, budget_tokens: int, baseline_k: Optional[int] = None):
+        """Return (packed documents, stats) for documents in rank order.
+
+        Stats compare the packed context with stuffing the first baseline_k
+        documents verbatim (all of them by default).
+        """
+        baseline_k = len(documents) if baseline_k is None else baseline_k
+        baseline_tokens = sum(self.token_length(doc.page_content) for doc in documents[:baseline_k])
+
+        blocks: List[ContextBlock] = []
+        for rank, doc in enumerate(documents):
+            block = ContextBlock(doc, rank)
+            # Merging can make a block touch another one, so repeat until stable
+            merged = True
+            while merged:
+                merged = False
+                for existing in blocks:
+                    if existing.try_merge(block):
+                        blocks.remove(existing)
+                        block = existing
+                        merged = True
+                        break
+            blocks.append(block)
+
+        # Drop blocks whose text is already contained in a better-ranked block
+        blocks.sort(key=lambda b: b.rank)
+        normalized = [WHITESPACE_RE.sub(' ', b.text).strip() for b in blocks]
+        unique = []
+        for i, block in enumerate(blocks):
+            if not normalized[i] or any(normalized[i] in normalized[j] for j in unique):
+                continue
+            unique.append(i)
+
+        packed, used = [], 0
+        for i in unique:
+            block = blocks[i]
+            tokens = self.token_length(block.text)
+            remaining = budget_tokens - used
+            if tokens > remaining:
+                if packed or remaining < budget_tokens // 4:
+                    continue  # Try smaller blocks further down
+                block.text = self.truncate(block.text, remaining)
+                tokens = self.token_length(block.text)
+            metadata = dict(block.doc.metadata)
+            if block.chunks > 1:
+                metadata["merged_chunks"] = block.chunks
+            if block.start is not None:
+                metadata["start_index"] = block.start
+            packed.append(type(block.doc)(page_content=block.text, metadata=metadata))
+            used += tokens
+
+        stats = {
+            "retrieved_chunks": len(documents),
+            "packed_blocks": len(packed),
+            "context_tokens": used,
+            "baseline_tokens": baseline_tokens,
+            "tokens_saved": baseline_tokens - used,
+            "budget_tokens": budget_tokens,
+        }
+        return packed, stats
+
+    def truncate(self, text: str, budget_tokens: int) -> str:
+        """Cut text at a line boundary so it fits in budget_tokens."""
+        lines, kept, used = text.splitlines(keepends=True), [], 0
+        for line in lines:
+            tokens = self.token_length(line)
+            if used + tokens > budget_tokens:
+                break
+            kept.append(line)
+            used += tokens
+        return "".join(kept).rstrip()
+
+
+def summarize_packing(stats: Dict[str, Any]) -> str:
+    """One-line log message for a packing result."""
+    return (f"🧮 Context: {stats['context_tokens']}/{stats['budget_tokens']} tokens in "
+            f"{stats['packed_blocks']} blocks from {stats['retrieved_chunks']} chunks "
+            f"({stats['tokens_saved']} saved vs stuffing {stats['baseline_tokens']})")
@@ -18,6 +18,7 @@ class MockScryptoAutoTester:
         self.output_dir.mkdir(exist_ok=True)
         self.results_file = Path("results.json")
         self.results = self.load_results()
+        self.prefetched = {}  # prompt -> response generated ahead of time
     
     def load_results(self) -> Dict[str, Any]:
         if self.results_file.exists():
@@ -90,7 +91,7 @@ test result: ok. 1 passed; 0 failed; 0 ignored; 0 measured; 0 filtered out
         # Get AI response
         try:
             print("🤖 Generating code...")
-            response = self.rag_system.ask(prompt)
+            response = self.prefetched.pop(prompt, None) or self.rag_system.ask(prompt)
             answer = response['answer']
         except Exception as e:
             print(f"❌ AI generation failed: {e}")
@@ -157,15 +158,22 @@ test result: ok. 1 passed; 0 failed; 0 ignored; 0 measured; 0 filtered out
         print("=" * 80)
         
         # Required tests
-        self.test_blueprint_generation(
-            "Create a simple Scrypto blueprint that stores a greeting message and has a function to return it",
-            "simple_greeting_blueprint"
-        )
-        
-        self.test_blueprint_generation(
-            "Create a Scrypto blueprint for an admin-controlled NFT with mint and burn functions",
-            "admin_nft_blueprint"
-        )
+        demo_tests = [
+            ("Create a simple Scrypto blueprint that stores a greeting message and has a function to return it",
+             "simple_greeting_blueprint"),
+            ("Create a Scrypto blueprint for an admin-controlled NFT with mint and burn functions",
+             "admin_nft_blueprint"),
+        ]
+        
+        # Generate all answers concurrently, then validate them in order
+        if hasattr(self.rag_system, 'ask_many'):
+            prompts = [prompt for prompt, _ in demo_tests]
+            for prompt, response in zip(prompts, self.rag_system.ask_many(prompts)):
+                if not response.get("error"):
+                    self.prefetched[prompt] = response
+        
+        for prompt, test_name in demo_tests:
+            self.test_blueprint_generation(prompt, test_name)
         
         # Print summary
         print("\n" + "=" * 80)
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Persistent Embedding Cache
+On-disk cache of chunk embeddings keyed by (model name, normalize flag,
+SHA-256 of the chunk text). Vectors live in a memory-mapped float32
+matrix with a JSON index of row keys, so rebuilds and re-chunking
+experiments only embed text they have never seen.
+"""
+
+import hashlib
+import json
+import os
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+
+VECTORS_FILENAME = "vectors.f32"
+INDEX_FILENAME = "index.json"
+
+
+def text_key(text: str) -> str:
+    """Cache key for a chunk of text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+class EmbeddingCache:
+    """Append-only float32 matrix of embeddings plus a key -> row index.
+
+    Not safe for concurrent writers; the indexer owns the cache while it runs.
+    """
+
+    def __init__(self, cache_dir="./embedding_cache",
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 normalize: bool = True):
+        self.model_name = model_name
+        self.normalize = normalize
+        namespace = re.sub(r'[^A-Za-z0-9_.-]', '_', model_name) + ("-norm" if normalize else "-raw")
+        self.cache_dir = Path(cache_dir) / namespace
+        self.vectors_path = self.cache_dir / VECTORS_FILENAME
+        self.index_path = self.cache_dir / INDEX_FILENAME
+
+        self.dim: Optional[int] = None
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self._matrix = None  # memmap over the rows written so far
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self._load()
+
+    def _load(self):
+        """Load the row index and drop rows the vector file does not cover."""
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            print(f"⚠️  Ignoring unreadable embedding cache index: {self.index_path}")
+            return
+        if data.get("model") != self.model_name or data.get("normalize") != self.normalize:
+            return
+
+        self.dim = data.get("dim")
+        keys = data.get("keys", [])
+        if self.dim and self.vectors_path.exists():
+            row_bytes = 4 * self.dim
+            stored_rows = os.path.getsize(self.vectors_path) // row_bytes
+            keys = keys[:stored_rows]
+            if stored_rows > len(keys):
+                # Rows appended after the last flush have no keys; drop them
+                # so new appends line up with the index again.
+                with open(self.vectors_path, 'r+b') as f:
+                    f.truncate(len(keys) * row_bytes)
+        else:
+            keys = []
+        self.keys = keys
+        self.rows = {key: row for row, key in enumerate(keys)}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def _matrix_view(self):
+        """Memory-map the vector file, remapping after appends."""
+        if self._matrix is None or self._matrix.shape[0] < len(self.keys):
+            self._matrix = np.memmap(self.vectors_path, dtype=np.float32, mode='r',
+                                     shape=(len(self.keys), self.dim))
+        return self._matrix
+
+    def get(self, key: str):
+        """Return the cached vector for a key, or None."""
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        return np.array(self._matrix_view()[row])
+
+    def put_many(self, keys: List[str], vectors):
+        """Append vectors for keys not already cached."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or not len(keys):
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Embedding dimension {vectors.shape[1]} does not match cache ({self.dim})")
+
+        fresh, pending = [], set()
+        for i, key in enumerate(keys):
+            if key not in self.rows and key not in pending:
+                pending.add(key)
+                fresh.append(i)
+        if not fresh:
+            return
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Rows with no key in the loaded index (a run that died before its
+        # first flush, an unreadable index) must not shift the new rows
+        indexed_bytes = len(self.keys) * 4 * self.dim
+        if self.vectors_path.exists() and os.path.getsize(self.vectors_path) != indexed_bytes:
+            self._matrix = None
+            with open(self.vectors_path, 'r+b') as f:
+                f.truncate(indexed_bytes)
+        with open(self.vectors_path, 'ab') as f:
+            f.write(np.ascontiguousarray(vectors[fresh]).tobytes())
+        for i in fresh:
+            self.rows[keys[i]] = len(self.keys)
+            self.keys.append(keys[i])
+        self._dirty = True
+
+    def embed(self, texts: List[str], embed_fn: Callable[[List[str]], List[List[float]]]):
+        """Return embeddings for texts, calling embed_fn only for unseen unique texts."""
+        keys = [text_key(text) for text in texts]
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in self.rows and key not in missing:
+                missing[key] = text
+
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            self.put_many(list(missing), embed_fn(list(missing.values())))
+
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        matrix = self._matrix_view()
+        return np.array(matrix[[self.rows[key] for key in keys]])
+
+    def flush(self):
+        """Persist the row index (vectors are written on append)."""
+        if not self._dirty:
+            return
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.index_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "model": self.model_name,
+                "normalize": self.normalize,
+                "dim": self.dim,
+                "keys": self.keys,
+            }, f)
+        os.replace(tmp_path, self.index_path)
+        self._dirty = False
+
+    def stats(self) -> Dict[str, int]:
+        """Cache size and hit/miss counters for this process."""
+        return {"entries": len(self.keys), "hits": self.hits, "misses": self.misses}
+
+
+class CachedEmbeddings:
+    """LangChain-compatible embeddings wrapper that consults an EmbeddingCache first."""
+
+    def __init__(self, embeddings, cache: EmbeddingCache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, reusing cached vectors for previously seen text."""
+        return self.cache.embed(texts, self.embeddings.embed_documents).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query; queries are not cached here."""
+        return self.embeddings.embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """Embed several queries in one batch, bypassing the document cache."""
+        return self.embeddings.embed_documents(texts)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Parallel Embedding Pipeline
+Embeds knowledge-base chunks in batches across a process pool and hands
+them to a sink (e.g. a bulk Chroma insert) as they complete.
+"""
+
+import os
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from embedding_cache import text_key
+
+# Per-process model, loaded once by the pool initializer
+_worker_model = None
+_worker_normalize = True
+
+
+def _init_worker(model_name: str, normalize: bool):
+    """Load the sentence-transformer once per worker process."""
+    global _worker_model, _worker_normalize
+    try:
+        import torch
+        torch.set_num_threads(1)  # One core per worker; the pool provides the parallelism
+    except ImportError:
+        pass
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name, device='cpu')
+    _worker_normalize = normalize
+
+
+def _embed_batch(texts: List[str]):
+    """Embed a batch of texts in a worker process."""
+    # Match HuggingFaceEmbeddings.embed_documents, which flattens newlines
+    texts = [text.replace("\n", " ") for text in texts]
+    return _worker_model.encode(
+        texts,
+        batch_size=len(texts),
+        normalize_embeddings=_worker_normalize,
+        show_progress_bar=False,
+        convert_to_numpy=True,
+    ).astype('float32')
+
+
+def batched(items: Iterable[Any], batch_size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most batch_size items."""
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+class ParallelEmbeddingPipeline:
+    """Embed streamed chunk batches across a process pool with bounded memory."""
+
+    def __init__(self,
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2",
+                 normalize: bool = True,
+                 workers: Optional[int] = None,
+                 batch_size: int = 256,
+                 max_pending: Optional[int] = None):
+        self.model_name = model_name
+        self.normalize = normalize
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # Cap batches in flight so memory does not grow with the KB size
+        self.max_pending = max_pending or self.workers * 2
+
+    def run(self, chunks: Iterable[Dict[str, Any]],
+            sink: Callable[[List[str], List[str], List[Dict[str, Any]], Any], None],
+            cache=None) -> Dict[str, float]:
+        """Embed chunks ({"id", "text", "metadata"}) and pass each finished batch to sink.
+
+        sink(ids, texts, metadatas, embeddings) is called in the parent
+        process, so it can safely write to the vector store. With an
+        EmbeddingCache, only texts missing from the cache reach the workers.
+        """
+        print(f"⚙️  Embedding with {self.workers} workers, batch size {self.batch_size}")
+        start = time.perf_counter()
+        embedded = 0
+        cached = 0
+        batch_count = 0
+
+        def emit(batch, embeddings):
+            nonlocal batch_count
+            sink([c["id"] for c in batch],
+                 [c["text"] for c in batch],
+                 [c["metadata"] for c in batch],
+                 embeddings)
+            batch_count += 1
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=self.workers,
+                                 mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(self.model_name, self.normalize)) as pool:
+            pending = {}
+
+            def drain(return_when):
+                nonlocal embedded
+                done, _ = wait(pending, return_when=return_when)
+                for future in done:
+                    batch, keys, missing_keys = pending.pop(future)
+                    embeddings = future.result()
+                    embedded += len(embeddings)
+                    if cache is not None:
+                        cache.put_many(missing_keys, embeddings)
+                        embeddings = np.stack([cache.get(key) for key in keys])
+                    emit(batch, embeddings)
+
+            for batch in batched(chunks, self.batch_size):
+                texts = [c["text"] for c in batch]
+                keys, missing_keys = None, None
+                if cache is not None:
+                    keys = [text_key(text) for text in texts]
+                    missing = {}
+                    for key, text in zip(keys, texts):
+                        if cache.get(key) is None and key not in missing:
+                            missing[key] = text
+                    cached += len(batch) - len(missing)
+                    cache.hits += len(batch) - len(missing)
+                    cache.misses += len(missing)
+                    if not missing:
+                        emit(batch, np.stack([cache.get(key) for key in keys]))
+                        continue
+                    missing_keys, texts = list(missing), list(missing.values())
+
+                if len(pending) >= self.max_pending:
+                    drain(FIRST_COMPLETED)
+                pending[pool.submit(_embed_batch, texts)] = (batch, keys, missing_keys)
+
+            while pending:
+                drain(FIRST_COMPLETED)
+
+        if cache is not None:
+            cache.flush()
+        elapsed = time.perf_counter() - start
+        stats = {
+            "embedded": embedded,
+            "cached": cached,
+            "batches": batch_count,
+            "seconds": round(elapsed, 2),
+            "embeddings_per_second": round(embedded / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+        print(f"⚡ Embedded {embedded} chunks in {stats['seconds']}s "
+              f"({stats['embeddings_per_second']} embeddings/s, {cached} from cache)")
+        return stats
@@ -5,14 +5,29 @@ Loads suncrypt.json and downloads all specified documentation sources.
 """
 
 import json
+import hashlib
 import requests
 import os
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 import tempfile
 import shutil
 import zipfile
 
+from requests.adapters import HTTPAdapter
+
+from web_crawler import CRAWL_DIR, crawl_site
+
+HARVEST_MANIFEST = 'kb/raw/.harvest_manifest.json'
+CHUNK_SIZE = 1 << 16  # Bytes per streamed write
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
+
 def load_config(config_file):
     """Load configuration from JSON file."""
     with open(config_file, 'r', encoding='utf-8') as f:
@@ -22,23 +37,175 @@ def ensure_directory(file_path):
     """Ensure the directory for a file path exists."""
     Path(file_path).parent.mkdir(parents=True, exist_ok=True)
 
-def download_html(url, target_path):
-    """Download HTML content from URL and save to target path."""
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-    }
+def load_manifest(manifest_file=HARVEST_MANIFEST):
+    """Load cached validators (ETag / Last-Modified) per target path."""
+    try:
+        with open(manifest_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_manifest(manifest, manifest_file=HARVEST_MANIFEST):
+    """Atomically write the harvest manifest."""
+    ensure_directory(manifest_file)
+    tmp_file = manifest_file + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, manifest_file)
+
+def make_session(pool_size=8):
+    """Create a shared keep-alive session sized for the worker pool."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    return session
+
+def conditional_headers(cache_entry, target_path):
+    """If-None-Match / If-Modified-Since headers for a previously downloaded target."""
+    headers = {}
+    if not cache_entry or not os.path.exists(target_path):
+        return headers
+    if cache_entry.get('etag'):
+        headers['If-None-Match'] = cache_entry['etag']
+    if cache_entry.get('last_modified'):
+        headers['If-Modified-Since'] = cache_entry['last_modified']
+    return headers
+
+def record_validators(cache_entry, response, size_bytes, sha256=None):
+    """Remember a response's validators for the next conditional request."""
+    if cache_entry is None:
+        return
+    cache_entry['etag'] = response.headers.get('ETag')
+    cache_entry['last_modified'] = response.headers.get('Last-Modified')
+    cache_entry['size'] = size_bytes
+    cache_entry['sha256'] = sha256
+    cache_entry['downloaded_at'] = datetime.now().isoformat(timespec='seconds')
+
+def read_partial(part_path):
+    """Return (bytes on disk, validator) for an interrupted download, or (0, None)."""
+    meta_path = part_path + '.json'
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            validator = json.load(f).get('validator')
+    except (OSError, json.JSONDecodeError):
+        validator = None
+    if not validator or not os.path.exists(part_path):
+        return 0, None
+    return os.path.getsize(part_path), validator
+
+def expected_total_size(response, offset):
+    """Full file size from Content-Range / Content-Length, or None if not sent."""
+    content_range = response.headers.get('Content-Range', '')
+    if response.status_code == 206 and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    if length and length.isdigit() and 'Content-Encoding' not in response.headers:
+        return int(length) + (offset if response.status_code == 206 else 0)
+    return None
+
+def stream_download(session, url, target_path, headers=None, expected_sha256=None):
+    """Stream a URL to disk through a .part file, resuming an interrupted download.
+    
+    The body is written in CHUNK_SIZE pieces, so memory stays flat however
+    large the file is. An existing .part file is resumed with a Range
+    request guarded by If-Range; the finished file is checked against the
+    expected size and, if given, SHA-256 before being atomically renamed
+    into place.
+    
+    Returns (response, size_bytes, sha256), or (response, None, None) on 304.
+    """
+    part_path = target_path + '.part'
+    meta_path = part_path + '.json'
+    offset, validator = read_partial(part_path)
+    request_headers = dict(headers or {})
+    if offset:
+        request_headers['Range'] = f'bytes={offset}-'
+        request_headers['If-Range'] = validator
+    
+    with session.get(url, headers=request_headers, timeout=30, stream=True) as response:
+        if response.status_code == 304:
+            return response, None, None
+        if response.status_code == 416 and offset:
+            # Our partial no longer fits the remote file; drop it and fetch the whole file
+            for path in (part_path, meta_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            response.close()
+            return stream_download(session, url, target_path, headers, expected_sha256)
+        response.raise_for_status()
+        
+        resumed = offset and response.status_code == 206
+        if not resumed:
+            offset = 0
+        total = expected_total_size(response, offset)
+        
+        digest = hashlib.sha256()
+        ensure_directory(target_path)
+        if resumed:
+            print(f"  ↪️  Resuming {os.path.basename(target_path)} at {offset / 1024:.1f} KB")
+            with open(part_path, 'rb') as f:
+                for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+                    digest.update(block)
+        
+        # If-Range only accepts a strong ETag or a Last-Modified date
+        etag = response.headers.get('ETag')
+        validator = etag if etag and not etag.startswith('W/') else response.headers.get('Last-Modified')
+        if validator:
+            with open(meta_path, 'w', encoding='utf-8') as f:
+                json.dump({'url': url, 'validator': validator}, f)
+        elif os.path.exists(meta_path):
+            os.remove(meta_path)
+        
+        size_bytes = offset
+        with open(part_path, 'ab' if resumed else 'wb') as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                size_bytes += len(chunk)
+    
+    sha256 = digest.hexdigest()
+    try:
+        if total is not None and size_bytes != total:
+            raise IOError(f"Size mismatch for {url}: got {size_bytes} bytes, expected {total}")
+        if expected_sha256 and sha256 != expected_sha256.lower():
+            raise IOError(f"SHA-256 mismatch for {url}: got {sha256}, expected {expected_sha256}")
+    except IOError:
+        # A complete-but-wrong file can't be resumed; keep only short reads
+        if total is None or size_bytes >= total:
+            os.remove(part_path)
+            if os.path.exists(meta_path):
+                os.remove(meta_path)
+        raise
+    
+    os.replace(part_path, target_path)
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+    return response, size_bytes, sha256
+
+def download_html(url, target_path, session=None, cache_entry=None, expected_sha256=None):
+    """Download HTML content from URL and save to target path.
     
-    response = requests.get(url, headers=headers, timeout=30)
-    response.raise_for_status()
+    Returns the size in bytes, or None if the server reports the cached
+    copy is still current (304 Not Modified).
+    """
+    session = session or requests
+    headers = dict(DEFAULT_HEADERS, **conditional_headers(cache_entry, target_path))
     
-    ensure_directory(target_path)
-    with open(target_path, 'w', encoding='utf-8') as f:
-        f.write(response.text)
+    response, size_bytes, sha256 = stream_download(session, url, target_path, headers, expected_sha256)
+    if size_bytes is None:
+        return None
     
-    return len(response.text.encode('utf-8'))
+    record_validators(cache_entry, response, size_bytes, sha256)
+    return size_bytes
 
-def download_github_repo(url, target_path):
-    """Download GitHub repository as zip file."""
+def download_github_repo(url, target_path, session=None, cache_entry=None, expected_sha256=None):
+    """Download GitHub repository as zip file.
+    
+    Returns the size in bytes, or None if the archive is unchanged (304).
+    """
     # Convert GitHub repo URL to zip download URL
     if not url.startswith('https://github.com/'):
         raise ValueError(f"Not a GitHub URL: {url}")
@@ -46,23 +213,35 @@ def download_github_repo(url, target_path):
     # Remove trailing slash and convert to zip download URL
     repo_url = url.rstrip('/')
     
-    # Try main branch first, then master as fallback
-    for branch in ['main', 'master']:
+    session = session or requests
+    
+    # Try main branch first, then master as fallback (the branch that worked last time goes first)
+    branches = ['main', 'master']
+    if cache_entry and cache_entry.get('branch') in branches:
+        branches.remove(cache_entry['branch'])
+        branches.insert(0, cache_entry['branch'])
+    
+    for branch in branches:
         zip_url = f"{repo_url}/archive/{branch}.zip"
+        headers = {}
+        if cache_entry and cache_entry.get('branch') == branch:
+            headers = conditional_headers(cache_entry, target_path)
         try:
-            response = requests.get(zip_url, timeout=30)
-            response.raise_for_status()
+            response, size_bytes, sha256 = stream_download(
+                session, zip_url, target_path, headers, expected_sha256
+            )
+            if size_bytes is None:
+                return None
             break
         except requests.exceptions.HTTPError:
-            if branch == 'master':  # Last attempt failed
+            if branch == branches[-1]:  # Last attempt failed
                 raise
             continue
     
-    ensure_directory(target_path)
-    with open(target_path, 'wb') as f:
-        f.write(response.content)
-    
-    return len(response.content)
+    record_validators(cache_entry, response, size_bytes, sha256)
+    if cache_entry is not None:
+        cache_entry['branch'] = branch
+    return size_bytes
 
 def clone_repo_to_zip(url, target_path):
     """Alternative method using git clone (requires git installed)."""
@@ -85,57 +264,116 @@ def clone_repo_to_zip(url, target_path):
         # Get file size
         return os.path.getsize(target_path)
 
+def harvest_target(file_target, session, cache_entry):
+    """Download one file target; returns (size_bytes or None if not modified, elapsed)."""
+    url = file_target['url']
+    target_path = file_target['target_path']
+    expected_sha256 = file_target.get('sha256')  # Optional pinned checksum
+    start = time.perf_counter()
+    
+    if target_path.endswith('.html'):
+        size_bytes = download_html(url, target_path, session, cache_entry, expected_sha256)
+    elif target_path.endswith('.zip'):
+        size_bytes = download_github_repo(url, target_path, session, cache_entry, expected_sha256)
+    elif target_path.endswith('.md') or target_path.endswith('.rs'):
+        # Handle markdown/rust files if present
+        size_bytes = download_html(url, target_path, session, cache_entry, expected_sha256)
+    else:
+        raise ValueError(f"Unsupported file type: {target_path}")
+    
+    return size_bytes, time.perf_counter() - start
+
 def main():
     """Main harvesting function."""
+    parser = argparse.ArgumentParser(description="RadixDLT / Scrypto Documentation Harvester")
+    parser.add_argument('--config', default='suncrypt.json', help="Harvest configuration file")
+    parser.add_argument('--jobs', type=int, default=4, help="Concurrent downloads (default: 4)")
+    parser.add_argument('--force', action='store_true',
+                        help="Ignore cached ETag/Last-Modified and download everything")
+    parser.add_argument('--no-crawl', action='store_true',
+                        help="Skip crawling the \"web_crawl\" documentation sites")
+    parser.add_argument('--max-pages', type=int, default=500,
+                        help="Page budget per crawled site (default: 500)")
+    args = parser.parse_args()
+    
     print("RadixDLT / Scrypto Documentation Harvester")
     print("=" * 50)
     
     # Load configuration
     try:
-        config = load_config('suncrypt.json')
+        config = load_config(args.config)
     except FileNotFoundError:
-        print("Error: suncrypt.json not found!")
+        print(f"Error: {args.config} not found!")
         return 1
     except json.JSONDecodeError as e:
-        print(f"Error parsing suncrypt.json: {e}")
+        print(f"Error parsing {args.config}: {e}")
         return 1
     
     # Ensure directories exist
     Path('kb/raw').mkdir(parents=True, exist_ok=True)
     Path('kb/cleaned').mkdir(parents=True, exist_ok=True)
     
+    manifest = {} if args.force else load_manifest()
+    session = make_session(pool_size=args.jobs)
+    print_lock = threading.Lock()
+    
     files_downloaded = 0
+    files_not_modified = 0
     total_size_bytes = 0
+    bytes_saved = 0
     failed_downloads = []
+    file_targets = config.get('file_targets', [])
+    start = time.perf_counter()
     
-    # Process each file target
-    for i, file_target in enumerate(config.get('file_targets', []), 1):
-        url = file_target['url']
-        target_path = file_target['target_path']
+    # Download targets concurrently; each worker gets its own manifest entry
+    with ThreadPoolExecutor(max_workers=max(1, args.jobs)) as pool:
+        futures = {}
+        for i, file_target in enumerate(file_targets, 1):
+            cache_entry = dict(manifest.get(file_target['target_path'], {}))
+            cache_entry['url'] = file_target['url']
+            futures[pool.submit(harvest_target, file_target, session, cache_entry)] = (i, file_target, cache_entry)
         
-        print(f"\n[{i}/{len(config['file_targets'])}] {url}")
-        print(f"  -> {target_path}")
-        
-        try:
-            if target_path.endswith('.html'):
-                size_bytes = download_html(url, target_path)
-            elif target_path.endswith('.zip'):
-                size_bytes = download_github_repo(url, target_path)
-            elif target_path.endswith('.md') or target_path.endswith('.rs'):
-                # Handle markdown/rust files if present
-                size_bytes = download_html(url, target_path)
-            else:
-                print(f"  ⚠️  Unsupported file type: {target_path}")
-                continue
+        for future in as_completed(futures):
+            i, file_target, cache_entry = futures[future]
+            url = file_target['url']
+            target_path = file_target['target_path']
+            lines = [f"\n[{i}/{len(file_targets)}] {url}", f"  -> {target_path}"]
             
-            files_downloaded += 1
-            total_size_bytes += size_bytes
-            size_kb = size_bytes / 1024
-            print(f"  ✅ Success ({size_kb:.1f} KB)")
+            try:
+                size_bytes, elapsed = future.result()
+                manifest[target_path] = cache_entry
+                if size_bytes is None:
+                    files_not_modified += 1
+                    bytes_saved += cache_entry.get('size') or 0
+                    lines.append(f"  ⏭️  Not modified ({elapsed:.2f}s)")
+                else:
+                    files_downloaded += 1
+                    total_size_bytes += size_bytes
+                    size_kb = size_bytes / 1024
+                    lines.append(f"  ✅ Success ({size_kb:.1f} KB in {elapsed:.2f}s)")
+            except Exception as e:
+                lines.append(f"  ❌ Failed: {str(e)}")
+                failed_downloads.append((url, str(e)))
             
-        except Exception as e:
-            print(f"  ❌ Failed: {str(e)}")
-            failed_downloads.append((url, str(e)))
+            with print_lock:
+                print("\n".join(lines))
+    
+    save_manifest(manifest)
+    
+    # Crawl the documentation sites marked for it, beyond their landing pages
+    crawl_reports = []
+    if not args.no_crawl:
+        for source in config.get('urls', []):
+            if source.get('recommended_download_type') != 'web_crawl':
+                continue
+            try:
+                crawl_reports.append(crawl_site(source['url'], max_pages=args.max_pages,
+                                                workers=max(1, args.jobs * 2)))
+            except Exception as e:
+                print(f"  ❌ Crawl failed: {str(e)}")
+                failed_downloads.append((source['url'], str(e)))
+    
+    wall_time = time.perf_counter() - start
     
     # Create placeholder README in cleaned directory
     readme_content = """# RadixDLT / Scrypto Knowledge Base - Cleaned Data
@@ -184,7 +422,13 @@ Generated by harvest_kb.py
     print("🎯 HARVEST COMPLETE")
     print("=" * 50)
     print(f"📁 Files downloaded: {files_downloaded}")
+    print(f"⏭️  Not modified (skipped): {files_not_modified}")
     print(f"📊 Total size: {total_size_kb:.1f} KB")
+    print(f"💾 Bytes saved by conditional requests: {bytes_saved / 1024:.1f} KB")
+    if crawl_reports:
+        pages = sum(report['stored_pages'] for report in crawl_reports)
+        print(f"🕸️  Crawled pages: {pages} from {len(crawl_reports)} sites -> {CRAWL_DIR}")
+    print(f"⏱️  Wall time: {wall_time:.2f}s with {args.jobs} jobs")
     print(f"🕐 Timestamp: {timestamp}")
     print(f"📝 Created: kb/cleaned/README.md")
     
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+Vector Store Index Manifest
+Tracks content hashes per knowledge-base file and per chunk so the
+vector store can be refreshed incrementally instead of rebuilt.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+MANIFEST_FILENAME = "index_manifest.json"
+MANIFEST_VERSION = 1
+CHANGES_FILENAME = ".changes.json"  # Written by clean_kb.py into the knowledge base
+
+
+def file_sha256(path) -> str:
+    """Hash a file's bytes in blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 16), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cleaner_file_hashes(kb_path) -> Dict[str, str]:
+    """File hashes recorded by clean_kb's change list, for files untouched since.
+    
+    Entries whose size or mtime no longer match are left out, so the
+    caller falls back to hashing those files itself.
+    """
+    kb_path = Path(kb_path)
+    try:
+        with open(kb_path / CHANGES_FILENAME, 'r', encoding='utf-8') as f:
+            files = json.load(f).get("files", {})
+    except (OSError, json.JSONDecodeError):
+        return {}
+    
+    hashes = {}
+    for relative_path, entry in files.items():
+        path = kb_path / relative_path
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        if stat.st_size == entry.get("size") and stat.st_mtime_ns == entry.get("mtime_ns"):
+            hashes[str(path)] = entry["sha256"]
+    return hashes
+
+
+def chunk_sha256(text: str, metadata: Dict[str, Any]) -> str:
+    """Hash a chunk's text together with its metadata."""
+    digest = hashlib.sha256()
+    digest.update(text.encode('utf-8'))
+    digest.update(b'\0')
+    digest.update(json.dumps(metadata, sort_keys=True, default=str).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def make_chunk_id(source: str, chunk_hash: str, occurrence: int = 0) -> str:
+    """Build a stable vector store ID for a chunk of a source file."""
+    source_hash = hashlib.sha1(source.encode('utf-8')).hexdigest()[:12]
+    return f"{source_hash}-{chunk_hash[:20]}-{occurrence}"
+
+
+class IndexManifest:
+    """Per-file and per-chunk content hashes for a persisted vector store."""
+
+    def __init__(self, persist_dir, splitter_signature: str):
+        self.path = Path(persist_dir) / MANIFEST_FILENAME
+        self.splitter_signature = splitter_signature
+        # source -> {"file_hash": str, "chunks": [{"id": str, "hash": str}, ...]}
+        self.files: Dict[str, Dict[str, Any]] = {}
+
+    @classmethod
+    def load(cls, persist_dir, splitter_signature: str) -> Optional["IndexManifest"]:
+        """Load a manifest, or return None if missing or unreadable."""
+        manifest = cls(persist_dir, splitter_signature)
+        if not manifest.path.exists():
+            return None
+        try:
+            with open(manifest.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != MANIFEST_VERSION:
+            return None
+
+        manifest.files = data.get("files", {})
+        if data.get("splitter") != splitter_signature:
+            # Chunking changed: keep chunk hashes for matching, but force
+            # every file to be re-split.
+            for entry in manifest.files.values():
+                entry["file_hash"] = ""
+        return manifest
+
+    @classmethod
+    def from_collection(cls, collection, persist_dir, splitter_signature: str) -> "IndexManifest":
+        """Bootstrap a manifest from a vector store built without one."""
+        manifest = cls(persist_dir, splitter_signature)
+        data = collection.get(include=["documents", "metadatas"])
+        for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+            metadata = metadata or {}
+            source = metadata.get("source", "")
+            entry = manifest.files.setdefault(source, {"file_hash": "", "chunks": []})
+            entry["chunks"].append({"id": chunk_id, "hash": chunk_sha256(text or "", metadata)})
+        return manifest
+
+    def save(self):
+        """Atomically write the manifest next to the vector store."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "version": MANIFEST_VERSION,
+                "splitter": self.splitter_signature,
+                "files": self.files,
+            }, f)
+        os.replace(tmp_path, self.path)
+
+    def chunk_count(self) -> int:
+        """Total number of indexed chunks."""
+        return sum(len(entry["chunks"]) for entry in self.files.values())
+
+    def plan(self, current_hashes: Dict[str, str]) -> Tuple[List[str], List[str], List[str]]:
+        """Split sources into (unchanged, changed_or_new, removed)."""
+        unchanged, changed = [], []
+        for source, file_hash in current_hashes.items():
+            entry = self.files.get(source)
+            if entry is not None and entry["file_hash"] == file_hash:
+                unchanged.append(source)
+            else:
+                changed.append(source)
+        removed = [source for source in self.files if source not in current_hashes]
+        return unchanged, changed, removed
+
+
+def match_chunks(source: str, old_chunks: List[Dict[str, str]], new_hashes: List[str]):
+    """Match a file's new chunk hashes against its previously indexed chunks.
+
+    Returns (entries, new_positions, stale_ids): `entries` is the new chunk
+    list with reused IDs kept and fresh IDs allocated, `new_positions`
+    indexes the chunks that need embedding, and `stale_ids` are old chunks
+    that no longer exist.
+    """
+    available: Dict[str, List[str]] = {}
+    for chunk in old_chunks:
+        available.setdefault(chunk["hash"], []).append(chunk["id"])
+
+    taken = {chunk["id"] for chunk in old_chunks}
+    entries = []
+    new_positions = []
+    for position, chunk_hash in enumerate(new_hashes):
+        ids = available.get(chunk_hash)
+        if ids:
+            entries.append({"id": ids.pop(0), "hash": chunk_hash})
+            continue
+
+        occurrence = 0
+        chunk_id = make_chunk_id(source, chunk_hash, occurrence)
+        while chunk_id in taken:
+            occurrence += 1
+            chunk_id = make_chunk_id(source, chunk_hash, occurrence)
+        taken.add(chunk_id)
+        entries.append({"id": chunk_id, "hash": chunk_hash})
+        new_positions.append(position)
+
+    stale_ids = [chunk_id for ids in available.values() for chunk_id in ids]
+    return entries, new_positions, stale_ids
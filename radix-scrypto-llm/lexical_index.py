@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+BM25 Lexical Index
+In-process inverted index over the vector store's chunks, so questions
+that quote exact Scrypto identifiers (`ResourceBuilder::new_integer_non_fungible`,
+`mint_roles!`) find the chunks that contain them. Postings are flat numpy
+arrays with each posting's BM25 weight precomputed, saved as one .npz next
+to the vector store; a lookup is a few array slices and one bincount.
+"""
+
+import hashlib
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+LEXICAL_INDEX_FILENAME = "bm25_index.npz"
+LEXICAL_INDEX_VERSION = 1
+RRF_K = 60  # Reciprocal rank fusion damping; 60 is the value from the original paper
+
+# Paths (`Runtime::global_address`) and macros (`blueprint!`) are kept whole
+IDENTIFIER_RE = re.compile(r'[^\W\d]\w*(?:::[^\W\d]\w*)*!?')
+WORD_PART_RE = re.compile(r'[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|\d+')
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from has have how i if in into is it its me
+my of on or show should so that the their then there these this to use using was what
+when where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms for BM25, identifier-aware.
+
+    A compound identifier yields itself, each `::` segment and each
+    snake_case/CamelCase word, so `ResourceBuilder::new_fungible` matches
+    queries for the full path, `new_fungible` or just "fungible".
+    """
+    terms = []
+    for match in IDENTIFIER_RE.finditer(text):
+        identifier = match.group()
+        segments = identifier.rstrip('!').split('::')
+        words = [word.lower() for segment in segments for word in WORD_PART_RE.findall(segment)]
+        if not words:
+            continue
+        if len(words) == 1 and not identifier.endswith('!'):
+            if words[0] not in STOPWORDS:
+                terms.append(words[0])
+            continue
+        terms.append(identifier.lower())
+        if len(segments) > 1:
+            terms.extend(segment.lower() for segment in segments)
+        elif len(words) > 1 and identifier.endswith('!'):
+            terms.append(segments[0].lower())
+        # Parts of a compound: skip stray digits and letters (`u64` -> u, 64)
+        terms.extend(word for word in words if len(word) > 1 and not word.isdigit() and word not in STOPWORDS)
+    return terms
+
+
+def chunk_fingerprint(chunk_ids: Iterable[str]) -> str:
+    """Identify a set of chunks; chunk IDs embed their content hash."""
+    return hashlib.sha256('\n'.join(sorted(chunk_ids)).encode('utf-8')).hexdigest()
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Fuse ranked ID lists by summing 1 / (k + rank) across lists."""
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            scores[item] = scores.get(item, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+def _pack_strings(strings: Sequence[str]) -> np.ndarray:
+    return np.frombuffer('\n'.join(strings).encode('utf-8'), dtype=np.uint8)
+
+
+def _unpack_strings(array: np.ndarray) -> List[str]:
+    return array.tobytes().decode('utf-8').split('\n') if array.size else []
+
+
+class BM25Index:
+    """Okapi BM25 over chunk texts with array-backed postings.
+
+    Term t's postings are docs[offsets[t]:offsets[t + 1]] with matching
+    weights, so scoring a query touches only its terms' postings.
+    """
+
+    def __init__(self, chunk_ids: List[str], terms: List[str], offsets: np.ndarray,
+                 docs: np.ndarray, weights: np.ndarray, fingerprint: str):
+        self.chunk_ids = chunk_ids
+        self.term_ids = {term: i for i, term in enumerate(terms)}
+        self.offsets = offsets
+        self.docs = docs
+        self.weights = weights
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, chunk_ids: Sequence[str], texts: Sequence[str],
+              k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """Tokenize the chunks and precompute every posting's BM25 weight."""
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        lengths = np.zeros(len(texts), dtype=np.float32)
+        for doc, text in enumerate(texts):
+            counts: Dict[str, int] = {}
+            for term in tokenize(text or ""):
+                counts[term] = counts.get(term, 0) + 1
+            lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        docs = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.float32)
+        idf = np.empty(offsets[-1], dtype=np.float32)
+        n = len(texts)
+        for i, term in enumerate(terms):
+            span = slice(offsets[i], offsets[i + 1])
+            entries = postings[term]
+            docs[span] = [doc for doc, _ in entries]
+            tfs[span] = [tf for _, tf in entries]
+            idf[span] = np.log(1 + (n - len(entries) + 0.5) / (len(entries) + 0.5))
+        norms = k1 * (1 - b + b * lengths[docs] / max(float(lengths.mean()) if n else 0.0, 1.0))
+        weights = (idf * tfs * (k1 + 1) / (tfs + norms)).astype(np.float32)
+        return cls(list(chunk_ids), terms, offsets, docs, weights, chunk_fingerprint(chunk_ids))
+
+    @classmethod
+    def load(cls, path) -> "BM25Index":
+        """Load a saved index; raises OSError or ValueError if unusable."""
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != LEXICAL_INDEX_VERSION:
+                raise ValueError("lexical index version mismatch")
+            return cls(_unpack_strings(data["chunk_ids"]), _unpack_strings(data["terms"]),
+                       data["offsets"], data["docs"], data["weights"], str(data["fingerprint"]))
+
+    def save(self, path):
+        """Write the index as an uncompressed .npz (atomically)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + '.tmp.npz')
+        np.savez(tmp_path,
+                 version=np.array(LEXICAL_INDEX_VERSION),
+                 fingerprint=np.array(self.fingerprint),
+                 chunk_ids=_pack_strings(self.chunk_ids),
+                 terms=_pack_strings(sorted(self.term_ids, key=self.term_ids.get)),
+                 offsets=self.offsets, docs=self.docs, weights=self.weights)
+        tmp_path.replace(path)
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (chunk ID, BM25 score) pairs for a query, best first."""
+        term_ids = [self.term_ids[term] for term in set(tokenize(query)) if term in self.term_ids]
+        if not term_ids or k <= 0:
+            return []
+        spans = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        docs = np.concatenate([self.docs[span] for span in spans])
+        weights = np.concatenate([self.weights[span] for span in spans])
+        scores = np.bincount(docs, weights=weights, minlength=len(self.chunk_ids))
+        matched = np.count_nonzero(scores)
+        k = min(k, matched)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self.chunk_ids[doc], float(scores[doc])) for doc in top]
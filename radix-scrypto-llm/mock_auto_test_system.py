@@ -22,6 +22,7 @@ class ScryptoAutoTester:
         self.output_dir = Path("output")
         self.output_dir.mkdir(exist_ok=True)
         self.results_file = Path("results.json")
+        self.prefetched: Dict[str, Dict[str, Any]] = {}  # prompt -> first-attempt response
         
         # Load existing results or create new
         self.results = self.load_results()
@@ -130,7 +131,7 @@ class ScryptoAutoTester:
             
             # Get AI response
             try:
-                response = self.rag_system.ask(prompt)
+                response = self.prefetched.pop(prompt, None) or self.rag_system.ask(prompt)
                 answer = response['answer']
                 sources = response['sources']
             except Exception as e:
@@ -257,28 +258,36 @@ class ScryptoAutoTester:
         print("-" * 80)
         return test_record
     
+    def prefetch_answers(self, prompts: List[str]):
+        """Generate first-attempt answers for all prompts concurrently."""
+        if not hasattr(self.rag_system, 'ask_many'):
+            return
+        print(f"⚡ Prefetching {len(prompts)} AI responses concurrently...")
+        for prompt, response in zip(prompts, self.rag_system.ask_many(prompts)):
+            if not response.get("error"):
+                self.prefetched[prompt] = response
+    
     def run_demo_tests(self) -> Dict[str, Any]:
         """Run the demo tests required by the assignment."""
         print("🎯 Running Demo Tests for Assignment Completion")
         print("=" * 80)
         
-        # Test 1: Simple Blueprint (Assignment requirement)
-        self.test_blueprint_generation(
-            "Create a simple Scrypto blueprint that stores a greeting message and has a function to return it",
-            "simple_greeting_blueprint"
-        )
-        
-        # Test 2: Admin-controlled NFT (Assignment requirement)  
-        self.test_blueprint_generation(
-            "Create a Scrypto blueprint for an admin-controlled NFT with mint and burn functions",
-            "admin_nft_blueprint"
-        )
+        demo_tests = [
+            # Test 1: Simple Blueprint (Assignment requirement)
+            ("Create a simple Scrypto blueprint that stores a greeting message and has a function to return it",
+             "simple_greeting_blueprint"),
+            # Test 2: Admin-controlled NFT (Assignment requirement)
+            ("Create a Scrypto blueprint for an admin-controlled NFT with mint and burn functions",
+             "admin_nft_blueprint"),
+            # Test 3: Token Blueprint
+            ("Create a Scrypto blueprint that creates a simple token with fixed supply",
+             "simple_token_blueprint"),
+        ]
         
-        # Test 3: Token Blueprint
-        self.test_blueprint_generation(
-            "Create a Scrypto blueprint that creates a simple token with fixed supply",
-            "simple_token_blueprint"
-        )
+        # Ask every prompt up front; compiling and testing still runs one project at a time
+        self.prefetch_answers([prompt for prompt, _ in demo_tests])
+        for prompt, test_name in demo_tests:
+            self.test_blueprint_generation(prompt, test_name)
         
         # Print final summary
         self.print_final_summary()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""
+OpenRouter HTTP Client
+Shared keep-alive connection pool for OpenRouter calls with exponential
+backoff and jitter on 429/5xx (honoring Retry-After), a circuit breaker
+that fails fast while OpenRouter is degraded, and per-attempt latency
+metrics.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, Optional
+
+import httpx
+
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling OpenRouter while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Open after consecutive failed calls, then allow a single trial call after a cooldown.
+
+    Outcomes are recorded once per logical call, after retries: a call
+    that succeeds on its third attempt is a success. Rate limiting (429)
+    means OpenRouter is up, so it counts as neither success nor failure.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def before_request(self):
+        """Raise CircuitOpenError if calls should currently fail fast."""
+        with self._lock:
+            if self.state == "open":
+                remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+                if remaining > 0:
+                    raise CircuitOpenError(
+                        f"OpenRouter circuit breaker open after {self.consecutive_failures} "
+                        f"consecutive failures; retry in {remaining:.0f}s"
+                    )
+                self.state = "half_open"
+            if self.state == "half_open":
+                if self.probe_in_flight:
+                    raise CircuitOpenError("OpenRouter circuit breaker half-open; trial call in progress")
+                self.probe_in_flight = True
+
+    def record(self, outcome: str):
+        """Record a finished call: "success", "failure" or "ignored" (e.g. rate limited)."""
+        with self._lock:
+            self.probe_in_flight = False
+            if outcome == "success":
+                self.state = "closed"
+                self.consecutive_failures = 0
+            elif outcome == "failure":
+                self.consecutive_failures += 1
+                if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+                    if self.state != "open":
+                        print(f"🔌 OpenRouter circuit breaker opened for {self.reset_timeout:.0f}s")
+                    self.state = "open"
+                    self.opened_at = time.monotonic()
+
+
+def call_outcome(status: Optional[int]) -> str:
+    """Breaker outcome for a call that ended with this status (None: transport error)."""
+    if status == 429:
+        return "ignored"
+    if status is None or status in RETRY_STATUSES:
+        return "failure"
+    return "success"
+
+
+class RetryPolicy:
+    """Exponential backoff with full jitter, honoring Retry-After headers."""
+
+    def __init__(self, max_retries: int = 4, backoff_base: float = 0.5,
+                 backoff_max: float = 20.0, retry_after_max: float = 60.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_after_max = retry_after_max
+
+    def delay(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """Seconds to wait before retry number `attempt` (0-based)."""
+        retry_after = self.parse_retry_after(response) if response is not None else None
+        if retry_after is not None:
+            return min(retry_after, self.retry_after_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    @staticmethod
+    def parse_retry_after(response: httpx.Response) -> Optional[float]:
+        """Parse Retry-After as seconds or an HTTP date."""
+        value = response.headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            pass
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class AttemptMetrics:
+    """Rolling window of per-attempt latencies and outcomes."""
+
+    def __init__(self, window: int = 1000):
+        self.attempts = deque(maxlen=window)
+        self.total_attempts = 0
+        self.total_retries = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, status: Optional[int], attempt: int, error: Optional[str] = None):
+        """Record one HTTP attempt."""
+        with self._lock:
+            self.attempts.append({"seconds": seconds, "status": status, "attempt": attempt, "error": error})
+            self.total_attempts += 1
+            if attempt > 0:
+                self.total_retries += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Latency percentiles and error counts over the window."""
+        with self._lock:
+            attempts = list(self.attempts)
+            total_attempts, total_retries = self.total_attempts, self.total_retries
+        latencies = sorted(a["seconds"] for a in attempts)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3)
+
+        return {
+            "attempts": total_attempts,
+            "retries": total_retries,
+            "failures": sum(1 for a in attempts if a["error"] or (a["status"] or 0) in RETRY_STATUSES),
+            "p50_seconds": percentile(0.50),
+            "p95_seconds": percentile(0.95),
+            "mean_seconds": round(sum(latencies) / len(latencies), 3) if latencies else 0.0,
+        }
+
+
+class RetryTransport(httpx.BaseTransport):
+    """Sync transport that retries retryable failures on top of a pooled transport."""
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy,
+                 breaker: CircuitBreaker, metrics: AttemptMetrics):
+        self.transport = transport
+        self.policy = policy
+        self.breaker = breaker
+        self.metrics = metrics
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before_request()
+        outcome = "ignored"  # Interrupted calls only release the trial slot
+        try:
+            attempt = 0
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = self.transport.handle_request(request)
+                except httpx.TransportError as e:
+                    self.metrics.record(time.perf_counter() - start, None, attempt, type(e).__name__)
+                    if attempt >= self.policy.max_retries:
+                        outcome = call_outcome(None)
+                        raise
+                    time.sleep(self.policy.delay(attempt))
+                    attempt += 1
+                    continue
+
+                self.metrics.record(time.perf_counter() - start, response.status_code, attempt)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.policy.max_retries:
+                    outcome = call_outcome(response.status_code)
+                    return response
+                delay = self.policy.delay(attempt, response)
+                response.close()
+                time.sleep(delay)
+                attempt += 1
+        finally:
+            self.breaker.record(outcome)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    """Async counterpart of RetryTransport."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy,
+                 breaker: CircuitBreaker, metrics: AttemptMetrics):
+        self.transport = transport
+        self.policy = policy
+        self.breaker = breaker
+        self.metrics = metrics
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.breaker.before_request()
+        outcome = "ignored"  # Interrupted calls only release the trial slot
+        try:
+            attempt = 0
+            while True:
+                start = time.perf_counter()
+                try:
+                    response = await self.transport.handle_async_request(request)
+                except httpx.TransportError as e:
+                    self.metrics.record(time.perf_counter() - start, None, attempt, type(e).__name__)
+                    if attempt >= self.policy.max_retries:
+                        outcome = call_outcome(None)
+                        raise
+                    await asyncio.sleep(self.policy.delay(attempt))
+                    attempt += 1
+                    continue
+
+                self.metrics.record(time.perf_counter() - start, response.status_code, attempt)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.policy.max_retries:
+                    outcome = call_outcome(response.status_code)
+                    return response
+                delay = self.policy.delay(attempt, response)
+                await response.aclose()
+                await asyncio.sleep(delay)
+                attempt += 1
+        finally:
+            self.breaker.record(outcome)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class OpenRouterHTTP:
+    """Process-wide pooled sync/async HTTP clients sharing one retry policy and breaker."""
+
+    _shared: Dict[tuple, "OpenRouterHTTP"] = {}  # config -> instance
+    _shared_lock = threading.Lock()
+
+    def __init__(self, pool_size: int = 20, keepalive_expiry: float = 60.0,
+                 timeout: float = 120.0, max_retries: int = 4,
+                 failure_threshold: int = 5, reset_timeout: float = 30.0):
+        limits = httpx.Limits(
+            max_connections=pool_size,
+            max_keepalive_connections=pool_size,
+            keepalive_expiry=keepalive_expiry
+        )
+        self.policy = RetryPolicy(max_retries=max_retries)
+        self.breaker = CircuitBreaker(failure_threshold=failure_threshold, reset_timeout=reset_timeout)
+        self.metrics = AttemptMetrics()
+        self.client = httpx.Client(
+            transport=RetryTransport(httpx.HTTPTransport(limits=limits), self.policy, self.breaker, self.metrics),
+            timeout=timeout
+        )
+        self.async_client = httpx.AsyncClient(
+            transport=AsyncRetryTransport(httpx.AsyncHTTPTransport(limits=limits), self.policy, self.breaker, self.metrics),
+            timeout=timeout
+        )
+        self._loop = None
+        self._loop_lock = threading.Lock()
+
+    def run(self, coroutine):
+        """Run a coroutine on this client's long-lived event loop and wait for the result.
+
+        Pooled async connections are bound to the loop that opened them, so
+        every async OpenRouter call must go through the same loop rather
+        than a fresh asyncio.run() loop.
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="openrouter-http", daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    @classmethod
+    def shared(cls, **kwargs) -> "OpenRouterHTTP":
+        """Return the process-wide instance for this configuration, creating it on first use."""
+        key = tuple(sorted(kwargs.items()))
+        with cls._shared_lock:
+            if key not in cls._shared:
+                cls._shared[key] = cls(**kwargs)
+            return cls._shared[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Per-attempt latency summary plus circuit breaker state."""
+        summary = self.metrics.summary()
+        summary["circuit_state"] = self.breaker.state
+        return summary
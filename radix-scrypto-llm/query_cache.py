@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Query Caches
+Two-tier caching for RadixRAGSystemOpenRouter.ask: an LRU of query
+embeddings and retrieval results, and an answer cache keyed on
+(model, normalized question, retrieved chunk IDs) with TTL, size-based
+eviction and optional near-duplicate matching by cosine similarity.
+"""
+
+import copy
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence
+
+
+def normalize_question(question: str) -> str:
+    """Normalize a question for cache lookups (case, whitespace, trailing punctuation)."""
+    question = re.sub(r'\s+', ' ', question.strip().lower())
+    return question.rstrip(' ?!.')
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two vectors."""
+    dot = sum(x * y for x, y in zip(a, b))
+    norm_a = sum(x * x for x in a) ** 0.5
+    norm_b = sum(y * y for y in b) ** 0.5
+    if not norm_a or not norm_b:
+        return 0.0
+    return dot / (norm_a * norm_b)
+
+
+class LRUCache:
+    """Thread-safe least-recently-used cache with hit/miss counters."""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """Return the cached value, or None on a miss."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Insert a value, evicting the least recently used entry if full."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and hit/miss counters."""
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class AnswerCache:
+    """Cache of generated answers with TTL, LRU size eviction and semantic matching."""
+
+    def __init__(self, max_entries: int = 256, ttl_seconds: float = 3600,
+                 similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        # e.g. 0.95 to also reuse answers for near-duplicate questions
+        self.similarity_threshold = similarity_threshold
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model_name: str, question: str, chunk_ids: List[str]):
+        """Cache key for an answer."""
+        return (model_name, normalize_question(question), tuple(chunk_ids))
+
+    def _expire(self, now: float):
+        """Drop entries older than the TTL (caller holds the lock)."""
+        expired = [key for key, entry in self._entries.items()
+                   if now - entry["created"] > self.ttl_seconds]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, model_name: str, question: str, chunk_ids: List[str],
+            embedding: Optional[Sequence[float]] = None) -> Optional[Dict[str, Any]]:
+        """Return a cached response, or None on a miss."""
+        key = self.make_key(model_name, question, chunk_ids)
+        with self._lock:
+            self._expire(time.time())
+
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(entry["response"])
+
+            if self.similarity_threshold is not None and embedding is not None:
+                # Near-duplicate question answered by the same model from the same context
+                for other_key, other in reversed(self._entries.items()):
+                    if other_key[0] != model_name or other_key[2] != key[2] or other["embedding"] is None:
+                        continue
+                    if cosine_similarity(embedding, other["embedding"]) >= self.similarity_threshold:
+                        self._entries.move_to_end(other_key)
+                        self.semantic_hits += 1
+                        return copy.deepcopy(other["response"])
+
+            self.misses += 1
+            return None
+
+    def put(self, model_name: str, question: str, chunk_ids: List[str],
+            response: Dict[str, Any], embedding: Optional[Sequence[float]] = None):
+        """Store a response, evicting the least recently used entry if full."""
+        key = self.make_key(model_name, question, chunk_ids)
+        with self._lock:
+            self._entries[key] = {
+                "response": copy.deepcopy(response),
+                "embedding": list(embedding) if embedding is not None else None,
+                "created": time.time(),
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Entry count and hit/miss counters."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+        }
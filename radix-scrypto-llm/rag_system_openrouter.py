@@ -8,53 +8,324 @@ from dotenv import load_dotenv
 load_dotenv()  # Load environment variables from .env file
 import os
 import sys
+import time
+import argparse
+import queue
+import asyncio
+import threading
 from pathlib import Path
 from typing import List, Dict, Any
 import json
 
-try:
-    from langchain.document_loaders import DirectoryLoader, TextLoader
-    from langchain.text_splitter import RecursiveCharacterTextSplitter
-    from langchain.embeddings import HuggingFaceEmbeddings  # Free local embeddings
-    from langchain.vectorstores import Chroma
-    from langchain.chains import RetrievalQA
-    from langchain.llms import OpenAI  # We'll use this with OpenRouter endpoint
-    from langchain.schema import Document
-    from langchain.prompts import PromptTemplate
-    from langchain.chat_models import ChatOpenAI
-except ImportError:
-    print("❌ Required packages not found. Please install:")
-    print("pip install langchain openai chromadb sentence-transformers")
-    sys.exit(1)
+import numpy as np
+
+_module_start = time.perf_counter()
+
+from index_manifest import IndexManifest, file_sha256, chunk_sha256, match_chunks, cleaner_file_hashes
+from embedding_pipeline import ParallelEmbeddingPipeline, batched
+from embedding_cache import EmbeddingCache, CachedEmbeddings
+from content_index import ContentIndex
+from chunkers import RustItemChunker, MarkdownSectionChunker, CodeAwareSplitter, TokenCounter
+from context_packer import ContextPacker, summarize_packing
+from lexical_index import BM25Index, LEXICAL_INDEX_FILENAME, chunk_fingerprint, reciprocal_rank_fusion
+from vector_index import VectorIndex, VECTORS_FILENAME, TABLE_FILENAME
+from query_cache import LRUCache, AnswerCache, normalize_question
+from openrouter_client import OpenRouterHTTP
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Seconds from process start to a ready RAG system that we aim to stay under
+COLD_START_TARGET_S = float(os.getenv("RAG_COLD_START_TARGET_S", "10"))
+
+# Model recommendations with costs (approximate per 1M tokens) and the number of
+# retrieved-context tokens packed into each prompt for that model
+AVAILABLE_MODELS = {
+    # Premium models (best quality)
+    "anthropic/claude-3.5-sonnet": {"cost": "$3", "quality": "Excellent", "best_for": "Technical docs, coding", "context_tokens": 1200},
+    "openai/gpt-4o": {"cost": "$5", "quality": "Excellent", "best_for": "General purpose", "context_tokens": 1000},
+
+    # Good balance models
+    "anthropic/claude-3-haiku": {"cost": "$0.25", "quality": "Good", "best_for": "Fast responses", "context_tokens": 1500},
+    "meta-llama/llama-3.1-70b-instruct": {"cost": "$0.52", "quality": "Very Good", "best_for": "Technical content", "context_tokens": 1500},
+    "mistralai/mistral-large": {"cost": "$3", "quality": "Very Good", "best_for": "Reasoning", "context_tokens": 1200},
+
+    # Budget models
+    "meta-llama/llama-3.1-8b-instruct": {"cost": "$0.055", "quality": "Good", "best_for": "Budget option", "context_tokens": 1000},
+    "mistralai/mistral-7b-instruct": {"cost": "$0.06", "quality": "Good", "best_for": "Fast & cheap", "context_tokens": 1000},
+    "qwen/qwen-2.5-72b-instruct": {"cost": "$0.56", "quality": "Good", "best_for": "Technical docs", "context_tokens": 1500},
+}
+
+# Context token budget for models without a "context_tokens" entry
+DEFAULT_CONTEXT_TOKENS = 1200
+
+# dense: MiniLM similarity; sparse: BM25 over the same chunks; hybrid: both, fused by rank
+RETRIEVAL_MODES = ("dense", "sparse", "hybrid")
+FUSION_DEPTH = 20  # Results taken from each ranking before reciprocal rank fusion
+
+# Dense search backend: "numpy" is exact search over an in-memory copy of the
+# collection's vectors; "chroma" queries the collection itself
+VECTOR_BACKENDS = ("numpy", "chroma")
+
+# Tokens per Markdown chunk; all-MiniLM-L6-v2 truncates its input at 256 word pieces
+MARKDOWN_CHUNK_TOKENS = 256
+
+EXAMPLE_QUESTIONS = [
+    "How do I create a blueprint in Scrypto?",
+    "What is a component in RadixDLT?",
+    "Show me how to create a token in Scrypto",
+    "How does the Radix Engine work?",
+    "What are badges in RadixDLT?",
+    "How do I implement access control in Scrypto?",
+    "Show me examples of Rust code for RadixDLT",
+    "What is a resource in RadixDLT?",
+    "How do I deploy a blueprint to RadixDLT?",
+    "What are the main Scrypto data types?",
+]
+
+# Import timings (seconds) for this module and the deferred langchain stack
+IMPORT_PROFILE: Dict[str, float] = {}
+_langchain_lock = threading.Lock()
+_langchain_loaded = False
+IMPORT_PROFILE["local modules (numpy, httpx)"] = time.perf_counter() - _module_start
+_cold_start_pending = True  # Only the first instance in a process is a cold start
+
+
+def load_langchain():
+    """Import langchain, Chroma and the embedding/chat model classes on first use.
+    
+    These imports take seconds, so they are deferred until something
+    actually needs them rather than paid by every importer of this module.
+    """
+    global _langchain_loaded
+    if _langchain_loaded:
+        return
+    with _langchain_lock:
+        if _langchain_loaded:
+            return
+        start = time.perf_counter()
+        try:
+            from langchain.document_loaders import TextLoader
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            IMPORT_PROFILE["langchain (loaders, splitters)"] = time.perf_counter() - start
+            
+            step = time.perf_counter()
+            from langchain.embeddings import HuggingFaceEmbeddings  # Free local embeddings
+            IMPORT_PROFILE["langchain.embeddings"] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            from langchain.vectorstores import Chroma
+            IMPORT_PROFILE["langchain.vectorstores (Chroma)"] = time.perf_counter() - step
+            
+            step = time.perf_counter()
+            from langchain.chains import RetrievalQA
+            from langchain.llms import OpenAI  # We'll use this with OpenRouter endpoint
+            from langchain.schema import Document
+            from langchain.prompts import PromptTemplate
+            try:
+                from langchain_openai import ChatOpenAI  # Takes separate sync/async httpx clients
+            except ImportError:
+                from langchain.chat_models import ChatOpenAI
+            from langchain.chains.question_answering import load_qa_chain
+            from langchain.callbacks.base import BaseCallbackHandler
+            IMPORT_PROFILE["langchain (chains, chat models)"] = time.perf_counter() - step
+        except ImportError:
+            print("❌ Required packages not found. Please install:")
+            print("pip install langchain langchain-openai openai chromadb sentence-transformers")
+            sys.exit(1)
+        
+        class TokenQueueHandler(BaseCallbackHandler):
+            """Forward streamed LLM tokens into a queue read by ask_stream()."""
+            
+            def __init__(self, token_queue: queue.Queue):
+                self.token_queue = token_queue
+            
+            def on_llm_new_token(self, token: str, **kwargs):
+                self.token_queue.put(("token", token))
+        
+        globals().update(
+            TextLoader=TextLoader,
+            RecursiveCharacterTextSplitter=RecursiveCharacterTextSplitter,
+            HuggingFaceEmbeddings=HuggingFaceEmbeddings,
+            Chroma=Chroma,
+            RetrievalQA=RetrievalQA,
+            OpenAI=OpenAI,
+            Document=Document,
+            PromptTemplate=PromptTemplate,
+            ChatOpenAI=ChatOpenAI,
+            load_qa_chain=load_qa_chain,
+            BaseCallbackHandler=BaseCallbackHandler,
+            TokenQueueHandler=TokenQueueHandler,
+        )
+        IMPORT_PROFILE["langchain total"] = time.perf_counter() - start
+        _langchain_loaded = True
+
+# Chroma rejects very large add() calls; keep inserts well under its limit
+VECTORSTORE_BATCH_SIZE = 1000
+
+# Process-wide singletons: the embedding model and vector store are loaded
+# once and shared by every RadixRAGSystemOpenRouter, whatever its LLM.
+_shared_lock = threading.RLock()
+_shared_embeddings: Dict[Any, Any] = {}  # (model, cache dir) -> (CachedEmbeddings, EmbeddingCache)
+_shared_retrieval: Dict[Any, Dict[str, Any]] = {}  # (persist dir, kb path) -> vector store and caches
+_shared_vectorstores: Dict[str, Any] = {}  # persist dir -> Chroma opened by warm_start()
+_shared_token_counters: Dict[str, TokenCounter] = {}  # embedding model -> tokenizer-backed counter
+_warm_thread = None
+
+
+def get_shared_embeddings(model_name: str, cache_dir: str):
+    """Load the local embedding model once per process, wrapped with the on-disk cache."""
+    load_langchain()
+    key = (model_name, os.path.abspath(cache_dir))
+    with _shared_lock:
+        if key not in _shared_embeddings:
+            base_embeddings = HuggingFaceEmbeddings(
+                model_name=model_name,  # Small but good
+                model_kwargs={'device': 'cpu'},  # Use CPU
+                encode_kwargs={'normalize_embeddings': True}
+            )
+            # Chunks already embedded by a previous build come from the on-disk cache
+            cache = EmbeddingCache(cache_dir, model_name=model_name, normalize=True)
+            _shared_embeddings[key] = (CachedEmbeddings(base_embeddings, cache), cache)
+        return _shared_embeddings[key]
+
+
+def get_token_counter(model_name: str) -> TokenCounter:
+    """Return the process-wide token counter for an embedding model's tokenizer."""
+    with _shared_lock:
+        if model_name not in _shared_token_counters:
+            _shared_token_counters[model_name] = TokenCounter(model_name)
+        return _shared_token_counters[model_name]
+
+
+def open_vectorstore(persist_dir: str, embeddings):
+    """Open the Chroma store, reusing one already opened by warm_start()."""
+    with _shared_lock:
+        vectorstore = _shared_vectorstores.pop(os.path.abspath(persist_dir), None)
+    if vectorstore is not None and vectorstore._embedding_function is embeddings:
+        return vectorstore
+    return Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+
+
+def _warm(persist_dir: str, cache_dir: str, model_name: str):
+    """Background body of warm_start()."""
+    start = time.perf_counter()
+    try:
+        embeddings, _ = get_shared_embeddings(model_name, cache_dir)
+        # One tiny encode pages the model weights in before the first question
+        embeddings.embed_query("warm up")
+        if os.path.exists(persist_dir):
+            with _shared_lock:
+                key = os.path.abspath(persist_dir)
+                if key not in _shared_vectorstores and not _shared_retrieval:
+                    vectorstore = Chroma(persist_directory=persist_dir, embedding_function=embeddings)
+                    vectorstore._collection.count()  # Loads the collection from disk
+                    _shared_vectorstores[key] = vectorstore
+        IMPORT_PROFILE["warm start"] = time.perf_counter() - start
+    except Exception as e:
+        print(f"⚠️  Warm start failed: {e}")
+
+
+def warm_start(persist_directory="./vectorstore_openrouter",
+               embedding_cache_dir="./embedding_cache",
+               embedding_model_name="sentence-transformers/all-MiniLM-L6-v2"):
+    """Preload langchain, the embedding model and the Chroma store in a background thread.
+    
+    Call this before rendering a UI; a RadixRAGSystemOpenRouter created
+    afterwards picks up whatever has finished loading (and waits for the
+    rest) instead of loading it again.
+    """
+    global _warm_thread
+    with _shared_lock:
+        if _warm_thread is None:
+            _warm_thread = threading.Thread(
+                target=_warm,
+                args=(persist_directory, embedding_cache_dir, embedding_model_name),
+                name="rag-warm-start",
+                daemon=True
+            )
+            _warm_thread.start()
+        return _warm_thread
 
 class RadixRAGSystemOpenRouter:
     def __init__(self, 
                  knowledge_base_path="kb/cleaned", 
                  persist_directory="./vectorstore_openrouter",
-                 model_name="anthropic/claude-3.5-sonnet"):  # Default to Claude 3.5 Sonnet
+                 model_name="anthropic/claude-3.5-sonnet",  # Default to Claude 3.5 Sonnet
+                 refresh_index=True,
+                 parallel_indexing=None,
+                 index_workers=None,
+                 index_batch_size=256,
+                 embedding_cache_dir="./embedding_cache",
+                 retrieval_cache_size=512,
+                 answer_cache_size=256,
+                 answer_cache_ttl=3600,
+                 semantic_cache_threshold=None,
+                 latency_budget_s=None,
+                 retrieval_mode=None,
+                 vector_backend=None,
+                 http_pool_size=20,
+                 http_max_retries=4):
         
+        init_start = time.perf_counter()
         self.kb_path = Path(knowledge_base_path)
         self.persist_dir = persist_directory
         self.model_name = model_name
+        self.refresh_index = refresh_index  # Sync the vector store with kb/cleaned on startup
+        # Embed across a process pool on indexing boxes; workers default to the number of cores
+        if parallel_indexing is None:
+            parallel_indexing = os.getenv("RAG_PARALLEL_INDEX", "").lower() in ("1", "true", "yes")
+        if index_workers is None and os.getenv("RAG_INDEX_WORKERS"):
+            index_workers = int(os.getenv("RAG_INDEX_WORKERS"))
+        self.parallel_indexing = parallel_indexing
+        self.index_workers = index_workers
+        self.index_batch_size = index_batch_size
+        self.embedding_model_name = "sentence-transformers/all-MiniLM-L6-v2"
+        self.embedding_cache_dir = embedding_cache_dir
+        self.embedding_cache = None
+        self.embeddings = None
+        self.content_index = None  # Provenance of files clean_kb stored once for several copies
+        self.retrieval_k = 6  # Chunks the old fixed "stuff" prompt sent; baseline for token savings
+        self.retrieval_candidates = 8  # Chunks fetched per question; the packer keeps what fits the budget
+        self.context_packer = None
+        self.context_totals = {"queries": 0, "context_tokens": 0, "tokens_saved": 0}
+        
+        # Exact Scrypto identifiers are matched lexically; see RETRIEVAL_MODES
+        if retrieval_mode is None:
+            retrieval_mode = os.getenv("RAG_RETRIEVAL_MODE", "hybrid")
+        if retrieval_mode not in RETRIEVAL_MODES:
+            raise ValueError(f"retrieval_mode must be one of {', '.join(RETRIEVAL_MODES)}, got {retrieval_mode!r}")
+        self.retrieval_mode = retrieval_mode
+        self.lexical_index = None
+        
+        # Chroma stays the store of record; the numpy backend is a search copy of it
+        if vector_backend is None:
+            vector_backend = os.getenv("RAG_VECTOR_BACKEND", "numpy")
+        if vector_backend not in VECTOR_BACKENDS:
+            raise ValueError(f"vector_backend must be one of {', '.join(VECTOR_BACKENDS)}, got {vector_backend!r}")
+        self.vector_backend = vector_backend
+        self.vector_index = None
+        
+        # End-to-end latency budget per question; overruns are logged with a stage breakdown
+        if latency_budget_s is None:
+            latency_budget_s = float(os.getenv("RAG_LATENCY_BUDGET_S", "15"))
+        self.latency_budget_s = latency_budget_s
+        
+        # Keep-alive connection pool with retry/backoff and a circuit breaker, shared process-wide
+        self.http = OpenRouterHTTP.shared(pool_size=http_pool_size, max_retries=http_max_retries)
+        
+        # Tier 1: query embeddings + retrieval results; tier 2: generated answers
+        self.retrieval_cache = LRUCache(max_entries=retrieval_cache_size)
+        self.answer_cache = AnswerCache(
+            max_entries=answer_cache_size,
+            ttl_seconds=answer_cache_ttl,
+            similarity_threshold=semantic_cache_threshold
+        )
         self.vectorstore = None
         self.qa_chain = None
+        self.stream_chain = None
+        self.index_stats = None
         
-        # Model recommendations with costs (approximate per 1M tokens)
-        self.available_models = {
-            # Premium models (best quality)
-            "anthropic/claude-3.5-sonnet": {"cost": "$3", "quality": "Excellent", "best_for": "Technical docs, coding"},
-            "openai/gpt-4o": {"cost": "$5", "quality": "Excellent", "best_for": "General purpose"},
-            
-            # Good balance models
-            "anthropic/claude-3-haiku": {"cost": "$0.25", "quality": "Good", "best_for": "Fast responses"},
-            "meta-llama/llama-3.1-70b-instruct": {"cost": "$0.52", "quality": "Very Good", "best_for": "Technical content"},
-            "mistralai/mistral-large": {"cost": "$3", "quality": "Very Good", "best_for": "Reasoning"},
-            
-            # Budget models
-            "meta-llama/llama-3.1-8b-instruct": {"cost": "$0.055", "quality": "Good", "best_for": "Budget option"},
-            "mistralai/mistral-7b-instruct": {"cost": "$0.06", "quality": "Good", "best_for": "Fast & cheap"},
-            "qwen/qwen-2.5-72b-instruct": {"cost": "$0.56", "quality": "Good", "best_for": "Technical docs"},
-        }
+        self.available_models = AVAILABLE_MODELS
         
         # Check if knowledge base exists
         if not self.kb_path.exists():
@@ -69,15 +340,43 @@ class RadixRAGSystemOpenRouter:
         
         # Initialize system
         print("🚀 Initializing RadixDLT RAG System (OpenRouter)...")
+        load_langchain()
         print(f"🤖 Using model: {model_name}")
         if model_name in self.available_models:
             info = self.available_models[model_name]
             print(f"💰 Cost: ~{info['cost']}/1M tokens | Quality: {info['quality']}")
         self.setup_vectorstore()
         self.setup_qa_chain()
-        print("✅ RAG System ready!")
+        self.report_startup(time.perf_counter() - init_start)
+    
+    @staticmethod
+    def report_startup(init_seconds: float):
+        """Print setup time; the first instance also checks the cold-start target.
+        
+        A cold start is this module's own imports plus the first __init__,
+        so time spent between import and construction is not counted.
+        """
+        global _cold_start_pending
+        cold, _cold_start_pending = _cold_start_pending, False
+        if not cold:
+            print(f"✅ RAG System ready! ({init_seconds:.1f}s)")
+            return
+        startup = IMPORT_PROFILE["local modules (numpy, httpx)"] + init_seconds
+        print(f"✅ RAG System ready! ({startup:.1f}s cold start)")
+        if startup > COLD_START_TARGET_S:
+            print(f"⏱️  Startup exceeded the {COLD_START_TARGET_S:.0f}s cold-start target; "
+                  f"run with --profile-imports for a breakdown")
+    
+    def set_model(self, model_name: str):
+        """Switch the LLM; the embeddings, vector store and caches are kept."""
+        if model_name == self.model_name and self.qa_chain is not None:
+            return
+        self.model_name = model_name
+        print(f"🤖 Switching model to: {model_name}")
+        self.setup_qa_chain()
     
-    def show_available_models(self):
+    @staticmethod
+    def show_available_models():
         """Show available models with pricing and recommendations."""
         print("\n🎯 Available OpenRouter Models:")
         print("=" * 80)
@@ -99,121 +398,424 @@ class RadixRAGSystemOpenRouter:
         for category, models in categories.items():
             print(f"\n📊 {category}:")
             for model in models:
-                if model in self.available_models:
-                    info = self.available_models[model]
+                if model in AVAILABLE_MODELS:
+                    info = AVAILABLE_MODELS[model]
                     print(f"  • {model}")
                     print(f"    Cost: {info['cost']}/1M tokens | Best for: {info['best_for']}")
         
         print(f"\n🔥 RECOMMENDED: anthropic/claude-3.5-sonnet (Best for technical docs)")
         print(f"💰 BUDGET: meta-llama/llama-3.1-8b-instruct (20x cheaper)")
     
-    def load_documents(self) -> List[Document]:
-        """Load all markdown and rust files from knowledge base."""
-        print("📚 Loading documents from knowledge base...")
+    def list_kb_files(self) -> List[Path]:
+        """List all markdown and rust files in the knowledge base."""
+        self.content_index = ContentIndex.load(self.kb_path)
+        files = []
+        for pattern in ("**/*.md", "**/*.rs"):
+            for path in self.kb_path.glob(pattern):
+                relative_parts = path.relative_to(self.kb_path).parts
+                if path.is_file() and not any(part.startswith('.') for part in relative_parts):
+                    files.append(path)
+        return sorted(files)
+    
+    def add_document_metadata(self, doc: "Document"):
+        """Add file and content type metadata to a loaded document."""
+        file_path = Path(doc.metadata['source'])
+        doc.metadata['file_type'] = file_path.suffix
+        doc.metadata['filename'] = file_path.name
+        doc.metadata['directory'] = file_path.parent.name
         
-        documents = []
+        # Add content type metadata
+        if 'example' in str(file_path).lower():
+            doc.metadata['content_type'] = 'example'
+        elif 'src' in str(file_path).lower():
+            doc.metadata['content_type'] = 'source'
+        elif file_path.suffix == '.md':
+            doc.metadata['content_type'] = 'documentation'
+        else:
+            doc.metadata['content_type'] = 'code'
         
-        # Load markdown files
+        # Files stored once for several identical copies list every original path
+        if self.content_index is None:
+            self.content_index = ContentIndex.load(self.kb_path)
         try:
-            md_loader = DirectoryLoader(
-                str(self.kb_path), 
-                glob="**/*.md",
-                loader_cls=TextLoader,
-                loader_kwargs={'encoding': 'utf-8'}
-            )
-            md_docs = md_loader.load()
-        except Exception as e:
-            print(f"⚠️  Error loading markdown files: {e}")
-            md_docs = []
+            relative_path = file_path.relative_to(self.kb_path).as_posix()
+        except ValueError:
+            return
+        provenance = self.content_index.provenance(relative_path)
+        if len(provenance) > 1:
+            doc.metadata['provenance'] = '; '.join(provenance)
+            doc.metadata['duplicate_count'] = len(provenance) - 1
+        # Near-identical files are all indexed; note the others in the group
+        near_duplicates = self.content_index.near_duplicates(relative_path)
+        if near_duplicates:
+            doc.metadata['near_duplicates'] = '; '.join(near_duplicates)
+    
+    def load_file(self, file_path) -> List["Document"]:
+        """Load a single knowledge base file with metadata."""
+        docs = TextLoader(str(file_path), encoding='utf-8').load()
+        for doc in docs:
+            self.add_document_metadata(doc)
+        return docs
+    
+    def iter_documents(self, paths=None):
+        """Yield documents one file at a time (all files, or the given paths)."""
+        for file_path in (paths if paths is not None else self.list_kb_files()):
+            try:
+                yield from self.load_file(file_path)
+            except Exception as e:
+                print(f"⚠️  Error loading {file_path}: {e}")
+    
+    def load_documents(self, paths=None) -> List["Document"]:
+        """Load markdown and rust files from knowledge base (all, or the given paths)."""
+        print("📚 Loading documents from knowledge base...")
+        documents = list(self.iter_documents(paths))
+        print(f"📄 Loaded {len(documents)} documents")
+        return documents
+    
+    def get_text_splitter(self):
+        """Return the splitter used to chunk documents.
         
-        # Load rust files
-        try:
-            rs_loader = DirectoryLoader(
-                str(self.kb_path), 
-                glob="**/*.rs",
-                loader_cls=TextLoader,
-                loader_kwargs={'encoding': 'utf-8'}
+        Rust files are split at item boundaries (mod/struct/impl/fn) and only
+        windowed, with a smaller overlap, when a single item is too large.
+        Markdown is split along its headings into chunks of at most
+        MARKDOWN_CHUNK_TOKENS embedding-model tokens.
+        """
+        rust_chunker = RustItemChunker(
+            chunk_size=1000,
+            fallback=RecursiveCharacterTextSplitter(
+                chunk_size=1000,
+                chunk_overlap=100,
+                separators=["\n\n", "\n", " ", ""]
             )
-            rs_docs = rs_loader.load()
-        except Exception as e:
-            print(f"⚠️  Error loading rust files: {e}")
-            rs_docs = []
-        
-        # Combine and add metadata
-        all_docs = md_docs + rs_docs
-        
-        for doc in all_docs:
-            # Add file type metadata
-            file_path = Path(doc.metadata['source'])
-            doc.metadata['file_type'] = file_path.suffix
-            doc.metadata['filename'] = file_path.name
-            doc.metadata['directory'] = file_path.parent.name
-            
-            # Add content type metadata
-            if 'example' in str(file_path).lower():
-                doc.metadata['content_type'] = 'example'
-            elif 'src' in str(file_path).lower():
-                doc.metadata['content_type'] = 'source'
-            elif file_path.suffix == '.md':
-                doc.metadata['content_type'] = 'documentation'
+        )
+        return CodeAwareSplitter(
+            default=RecursiveCharacterTextSplitter(
+                chunk_size=1000,  # Good size for most models
+                chunk_overlap=200,
+                separators=["\n\n", "\n", " ", ""]
+            ),
+            by_suffix={
+                ".rs": rust_chunker,
+                ".md": MarkdownSectionChunker(
+                    max_tokens=MARKDOWN_CHUNK_TOKENS,
+                    token_length=get_token_counter(self.embedding_model_name)
+                ),
+            }
+        )
+    
+    def splitter_signature(self) -> str:
+        """Identify the chunking configuration; changing it invalidates the manifest."""
+        counter = get_token_counter(self.embedding_model_name)
+        return f"rust-items:1000:100:v1+md-sections:{MARKDOWN_CHUNK_TOKENS}:{counter.name}:v1"
+    
+    def shared_key(self):
+        """Key of this knowledge base's entry in the process-wide retrieval state."""
+        return (os.path.abspath(self.persist_dir), str(self.kb_path.resolve()))
+    
+    def setup_vectorstore(self):
+        """Attach the process-wide vector store, loading it on first use."""
+        key = self.shared_key()
+        with _shared_lock:
+            shared = _shared_retrieval.get(key)
+            if shared is None:
+                self.load_vectorstore()
+                shared = {
+                    "vectorstore": self.vectorstore,
+                    "embeddings": self.embeddings,
+                    "embedding_cache": self.embedding_cache,
+                    "index_stats": self.index_stats,
+                    # Retrieval results don't depend on the LLM; answers are keyed by model
+                    "retrieval_cache": self.retrieval_cache,
+                    "answer_cache": self.answer_cache,
+                    # Search indexes derived from the collection, loaded by the first instance that needs them
+                    "lexical_index": None,
+                    "vector_index": None,
+                }
+                _shared_retrieval[key] = shared
             else:
-                doc.metadata['content_type'] = 'code'
+                print("♻️  Reusing loaded embeddings and vector store")
         
-        documents.extend(all_docs)
-        print(f"📄 Loaded {len(documents)} documents")
-        return documents
+        self.vectorstore = shared["vectorstore"]
+        self.embeddings = shared["embeddings"]
+        self.embedding_cache = shared["embedding_cache"]
+        self.index_stats = shared["index_stats"]
+        self.retrieval_cache = shared["retrieval_cache"]
+        self.answer_cache = shared["answer_cache"]
+        if self.retrieval_mode != "dense":
+            self.ensure_lexical_index()
+        if self.retrieval_mode != "sparse" and self.vector_backend == "numpy":
+            self.ensure_vector_index()
     
-    def setup_vectorstore(self):
+    def shared_index(self, name: str, load):
+        """Attach a process-wide search index (an attribute named `name`), loading it on first use."""
+        if getattr(self, name) is None:
+            with _shared_lock:
+                shared = _shared_retrieval.get(self.shared_key(), {})
+                if shared.get(name) is None:
+                    shared[name] = load()
+                setattr(self, name, shared[name])
+        return getattr(self, name)
+    
+    def drop_search_indexes(self):
+        """Forget the derived search indexes after the collection changed; they reload on next use."""
+        self.lexical_index = None
+        self.vector_index = None
+        with _shared_lock:
+            shared = _shared_retrieval.get(self.shared_key())
+            if shared is not None:
+                shared["lexical_index"] = shared["vector_index"] = None
+    
+    def collection_fingerprint(self) -> str:
+        """Fingerprint of the chunks currently in the collection."""
+        return chunk_fingerprint(self.vectorstore._collection.get(include=[])["ids"])
+    
+    def ensure_lexical_index(self) -> BM25Index:
+        """Attach the process-wide BM25 index, loading it on first use."""
+        return self.shared_index("lexical_index", self.load_lexical_index)
+    
+    def load_lexical_index(self) -> BM25Index:
+        """Load the persisted BM25 index, rebuilding it if the collection's chunks changed."""
+        path = Path(self.persist_dir) / LEXICAL_INDEX_FILENAME
+        collection = self.vectorstore._collection
+        fingerprint = self.collection_fingerprint()
+        try:
+            index = BM25Index.load(path)
+            if index.fingerprint == fingerprint:
+                print(f"🔤 Loaded BM25 index over {len(index)} chunks")
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        print("🔤 Building BM25 index...")
+        start = time.perf_counter()
+        data = collection.get(include=["documents"])
+        index = BM25Index.build(data["ids"], data["documents"])
+        index.save(path)
+        print(f"🔤 BM25 index over {len(index)} chunks built in {time.perf_counter() - start:.1f}s")
+        return index
+    
+    def ensure_vector_index(self) -> VectorIndex:
+        """Attach the process-wide in-memory vector index, loading it on first use."""
+        return self.shared_index("vector_index", self.load_vector_index)
+    
+    def load_vector_index(self) -> VectorIndex:
+        """Load the memory-mapped vector index, re-exporting it if the collection's chunks changed."""
+        collection = self.vectorstore._collection
+        fingerprint = self.collection_fingerprint()
+        try:
+            index = VectorIndex.load(self.persist_dir)
+            if index.fingerprint == fingerprint:
+                print(f"🧮 Loaded in-memory vector index ({len(index)} vectors)")
+                return index
+        except (OSError, ValueError, KeyError):
+            pass
+        
+        print("🧮 Exporting vectors from the vector store...")
+        start = time.perf_counter()
+        data = collection.get(include=["embeddings", "documents", "metadatas"])
+        index = VectorIndex.build(data["ids"], data["embeddings"], data["documents"], data["metadatas"])
+        index.save(self.persist_dir)
+        print(f"🧮 Vector index of {len(index)} vectors exported in {time.perf_counter() - start:.1f}s")
+        return index
+    
+    def set_retrieval_mode(self, mode: str):
+        """Switch between dense, sparse and hybrid retrieval."""
+        if mode not in RETRIEVAL_MODES:
+            raise ValueError(f"retrieval_mode must be one of {', '.join(RETRIEVAL_MODES)}, got {mode!r}")
+        self.retrieval_mode = mode
+        if mode != "dense":
+            self.ensure_lexical_index()
+        if mode != "sparse" and self.vector_backend == "numpy":
+            self.ensure_vector_index()
+    
+    def set_vector_backend(self, backend: str):
+        """Switch dense search between the in-memory numpy index and Chroma."""
+        if backend not in VECTOR_BACKENDS:
+            raise ValueError(f"vector_backend must be one of {', '.join(VECTOR_BACKENDS)}, got {backend!r}")
+        self.vector_backend = backend
+        if backend == "numpy" and self.retrieval_mode != "sparse":
+            self.ensure_vector_index()
+    
+    def load_vectorstore(self):
         """Set up or load the vector store with local embeddings."""
         print("🔍 Setting up vector store with local embeddings...")
         
         # Use free local embeddings (no API key needed)
-        embeddings = HuggingFaceEmbeddings(
-            model_name="sentence-transformers/all-MiniLM-L6-v2",  # Small but good
-            model_kwargs={'device': 'cpu'},  # Use CPU
-            encode_kwargs={'normalize_embeddings': True}
+        embeddings, self.embedding_cache = get_shared_embeddings(
+            self.embedding_model_name, self.embedding_cache_dir
         )
+        self.embeddings = embeddings
         
         # Check if vector store already exists
         if os.path.exists(self.persist_dir):
             print("📁 Loading existing vector store...")
-            self.vectorstore = Chroma(
-                persist_directory=self.persist_dir,
-                embedding_function=embeddings
-            )
+            self.vectorstore = open_vectorstore(self.persist_dir, embeddings)
             try:
                 count = self.vectorstore._collection.count()
                 print(f"✅ Loaded vector store with {count} documents")
             except:
                 print("✅ Loaded existing vector store")
+            
+            if self.refresh_index:
+                self.refresh_vectorstore()
         else:
             print("🔄 Creating new vector store...")
-            
-            # Load documents
-            documents = self.load_documents()
-            
-            if not documents:
-                raise RuntimeError("No documents found to process!")
-            
-            # Split documents into chunks
-            text_splitter = RecursiveCharacterTextSplitter(
-                chunk_size=1000,  # Good size for most models
-                chunk_overlap=200,
-                separators=["\n\n", "\n", " ", ""]
+            self.vectorstore = open_vectorstore(self.persist_dir, embeddings)
+            stats = self.refresh_vectorstore()
+            print(f"💾 Created and saved vector store with {stats['added']} chunks")
+    
+    def refresh_vectorstore(self) -> Dict[str, int]:
+        """Re-embed only added or changed chunks and drop chunks of removed files."""
+        print("🔄 Checking knowledge base for changes...")
+        
+        signature = self.splitter_signature()
+        manifest = IndexManifest.load(self.persist_dir, signature)
+        if manifest is None:
+            if self.vectorstore._collection.count() > 0:
+                print("🧭 No index manifest found, bootstrapping from existing vector store...")
+                manifest = IndexManifest.from_collection(self.vectorstore._collection, self.persist_dir, signature)
+            else:
+                manifest = IndexManifest(self.persist_dir, signature)
+        
+        kb_files = self.list_kb_files()
+        if not kb_files and not manifest.files:
+            raise RuntimeError("No documents found to process!")
+        
+        # clean_kb's change list already hashed the files it wrote
+        known_hashes = cleaner_file_hashes(self.kb_path)
+        current_hashes = {
+            str(path): self.content_index.file_signature(path.relative_to(self.kb_path).as_posix(),
+                                                         known_hashes.get(str(path)) or file_sha256(path))
+            for path in kb_files
+        }
+        unchanged, changed, removed = manifest.plan(current_hashes)
+        stats = {"added": 0, "updated": 0, "deleted": 0, "reused": 0}
+        
+        for source in unchanged:
+            stats["reused"] += len(manifest.files[source]["chunks"])
+        
+        # Drop every chunk of files that no longer exist
+        stale_ids = []
+        for source in removed:
+            stale_ids.extend(chunk["id"] for chunk in manifest.files.pop(source)["chunks"])
+        
+        # Re-split changed and new files, keeping chunks whose content is unchanged
+        def new_chunks():
+            text_splitter = self.get_text_splitter()
+            for source in changed:
+                try:
+                    splits = text_splitter.split_documents(self.load_file(source))
+                except Exception as e:
+                    print(f"⚠️  Error loading {source}: {e}")
+                    splits = []
+                
+                is_new_file = source not in manifest.files
+                old_chunks = [] if is_new_file else manifest.files[source]["chunks"]
+                hashes = [chunk_sha256(split.page_content, split.metadata) for split in splits]
+                entries, new_positions, stale = match_chunks(source, old_chunks, hashes)
+                
+                stale_ids.extend(stale)
+                stats["reused"] += len(entries) - len(new_positions)
+                stats["added" if is_new_file else "updated"] += len(new_positions)
+                manifest.files[source] = {"file_hash": current_hashes[source], "chunks": entries}
+                for position in new_positions:
+                    yield {
+                        "id": entries[position]["id"],
+                        "text": splits[position].page_content,
+                        "metadata": splits[position].metadata,
+                    }
+        
+        embedded = 0
+        if changed and self.parallel_indexing:
+            pipeline = ParallelEmbeddingPipeline(
+                model_name=self.embedding_model_name,
+                normalize=True,
+                workers=self.index_workers,
+                batch_size=self.index_batch_size
             )
-            splits = text_splitter.split_documents(documents)
-            print(f"✂️  Split into {len(splits)} chunks")
             
-            # Create vector store
-            self.vectorstore = Chroma.from_documents(
-                documents=splits,
-                embedding=embeddings,
-                persist_directory=self.persist_dir
-            )
+            # Upsert: a run that failed before saving the manifest already wrote some of these IDs
+            def write_batch(ids, texts, metadatas, embeddings):
+                self.vectorstore._collection.upsert(
+                    ids=ids,
+                    documents=texts,
+                    metadatas=metadatas,
+                    embeddings=embeddings.tolist()
+                )
             
-            # Persist the vector store
+            pipeline_stats = pipeline.run(new_chunks(), write_batch, cache=self.embedding_cache)
+            embedded = pipeline_stats["embedded"]
+            stats["embeddings_per_second"] = pipeline_stats["embeddings_per_second"]
+        elif changed:
+            start_time = time.perf_counter()
+            for batch in batched(new_chunks(), self.index_batch_size):
+                texts = [chunk["text"] for chunk in batch]
+                # Upsert (not add_texts, which adds on older langchain): IDs are deterministic,
+                # so a run that failed before saving the manifest already wrote some of them
+                self.vectorstore._collection.upsert(
+                    ids=[chunk["id"] for chunk in batch],
+                    documents=texts,
+                    metadatas=[chunk["metadata"] for chunk in batch],
+                    embeddings=self.embeddings.embed_documents(texts)
+                )
+                embedded += len(batch)
+            elapsed = time.perf_counter() - start_time
+            if embedded and elapsed > 0:
+                stats["embeddings_per_second"] = round(embedded / elapsed, 1)
+        
+        if stale_ids:
+            for start in range(0, len(stale_ids), VECTORSTORE_BATCH_SIZE):
+                self.vectorstore._collection.delete(ids=stale_ids[start:start + VECTORSTORE_BATCH_SIZE])
+            stats["deleted"] = len(stale_ids)
+        
+        if embedded or stale_ids:
             self.vectorstore.persist()
-            print(f"💾 Created and saved vector store with {len(splits)} chunks")
+        manifest.save()
+        self.embedding_cache.flush()
+        if embedded or stale_ids:
+            self.clear_caches()
+            self.drop_search_indexes()
+        
+        self.index_stats = stats
+        print(f"📊 Index refresh: {stats['added']} added, {stats['updated']} updated, "
+              f"{stats['deleted']} deleted, {stats['reused']} reused")
+        if "embeddings_per_second" in stats:
+            print(f"⚡ Embedding throughput: {stats['embeddings_per_second']} embeddings/s")
+        cache_stats = self.embedding_cache.stats()
+        if cache_stats["hits"] or cache_stats["misses"]:
+            print(f"🗃️  Embedding cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses "
+                  f"({cache_stats['entries']} cached)")
+        return stats
+    
+    def http_client_kwargs(self) -> Dict[str, Any]:
+        """ChatOpenAI arguments that route calls through the shared pooled HTTP clients."""
+        fields = getattr(ChatOpenAI, "model_fields", None) or getattr(ChatOpenAI, "__fields__", {})
+        # Retries happen in our transport, so the SDK must not retry on top of it
+        if "http_client" in fields and "http_async_client" in fields:
+            return {
+                "http_client": self.http.client,
+                "http_async_client": self.http.async_client,
+                "max_retries": 0,
+            }
+        
+        # langchain.chat_models' class hands http_client to AsyncOpenAI too,
+        # which rejects a sync httpx.Client; build both SDK clients ourselves
+        if "client" in fields and "async_client" in fields:
+            try:
+                import openai
+                options = {"api_key": os.getenv("OPENROUTER_API_KEY"), "base_url": OPENROUTER_BASE_URL,
+                           "max_retries": 0}
+                return {
+                    "client": openai.OpenAI(http_client=self.http.client, **options).chat.completions,
+                    "async_client": openai.AsyncOpenAI(http_client=self.http.async_client,
+                                                       **options).chat.completions,
+                    "max_retries": 0,
+                }
+            except (ImportError, AttributeError):
+                pass  # openai<1 has no client classes
+        print("⚠️  Installed ChatOpenAI cannot use the pooled OpenRouter clients; "
+              "pip install langchain-openai for retries and the circuit breaker")
+        return {}
     
     def setup_qa_chain(self):
         """Set up the question-answering chain with OpenRouter."""
@@ -245,54 +847,407 @@ Answer: """
         llm = ChatOpenAI(
     model=self.model_name,
     openai_api_key=os.getenv("OPENROUTER_API_KEY"),
-    openai_api_base="https://openrouter.ai/api/v1",
+    openai_api_base=OPENROUTER_BASE_URL,
     temperature=0.1,
     max_tokens=1024,
+    **self.http_client_kwargs(),
 )
         
+        # Same model with token streaming enabled, for ask_stream()
+        streaming_llm = ChatOpenAI(
+            model=self.model_name,
+            openai_api_key=os.getenv("OPENROUTER_API_KEY"),
+            openai_api_base=OPENROUTER_BASE_URL,
+            temperature=0.1,
+            max_tokens=1024,
+            streaming=True,
+            **self.http_client_kwargs(),
+        )
+        self.stream_chain = load_qa_chain(streaming_llm, chain_type="stuff", prompt=PROMPT)
+        
         # Set up retrieval QA chain
         self.qa_chain = RetrievalQA.from_chain_type(
             llm=llm,
             chain_type="stuff",
             retriever=self.vectorstore.as_retriever(
                 search_type="similarity",
-                search_kwargs={"k": 6}  # Retrieve top 6 most relevant chunks
+                search_kwargs={"k": self.retrieval_k}
             ),
             chain_type_kwargs={"prompt": PROMPT},
             return_source_documents=True
         )
         print("✅ QA chain ready")
     
-    def ask(self, question: str) -> Dict[str, Any]:
-        """Ask a question and get an answer with sources."""
-        if not self.qa_chain:
-            raise RuntimeError("QA chain not initialized")
+    def retrieval_cache_key(self, question: str):
+        """Key retrievals by everything that changes their results; the LRU is shared across instances."""
+        backend = self.vector_backend if self.retrieval_mode != "sparse" else None
+        return (self.retrieval_mode, backend, normalize_question(question))
+    
+    def retrieve(self, question: str):
+        """Embed the question and fetch the top chunks, using the retrieval LRU."""
+        cache_key = self.retrieval_cache_key(question)
+        cached = self.retrieval_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
-        print(f"\n❓ Question: {question}")
-        print("🔍 Searching knowledge base...")
+        embedding = self.embeddings.embed_query(question) if self.retrieval_mode != "sparse" else None
+        retrieval = self.search([question], [embedding])[0]
+        self.retrieval_cache.put(cache_key, retrieval)
+        return retrieval
+    
+    def retrieve_many(self, questions: List[str]) -> List[Dict[str, Any]]:
+        """Retrieve for many questions with one batched embedding and one similarity query."""
+        retrievals: List[Any] = [None] * len(questions)
+        pending: Dict[Any, List[int]] = {}
+        for position, question in enumerate(questions):
+            cache_key = self.retrieval_cache_key(question)
+            cached = self.retrieval_cache.get(cache_key)
+            if cached is not None:
+                retrievals[position] = cached
+            else:
+                pending.setdefault(cache_key, []).append(position)
+        
+        if pending:
+            texts = [questions[positions[0]] for positions in pending.values()]
+            if self.retrieval_mode != "sparse":
+                embeddings = self.embeddings.embed_queries(texts)
+            else:
+                embeddings = [None] * len(texts)
+            for retrieval, (cache_key, positions) in zip(self.search(texts, embeddings), pending.items()):
+                self.retrieval_cache.put(cache_key, retrieval)
+                for position in positions:
+                    retrievals[position] = retrieval
         
-        # Get answer
-        result = self.qa_chain({"query": question})
+        return retrievals
+    
+    def search(self, questions: List[str], embeddings: List[Any]) -> List[Dict[str, Any]]:
+        """Rank chunks for each question with the current retrieval mode.
         
-        # Format response
+        dense ranks by vector similarity, sparse by BM25, and hybrid fuses
+        the top FUSION_DEPTH of both with reciprocal rank fusion. Returns
+        {"embedding", "documents", "ids"} per question, best first.
+        """
+        k = self.retrieval_candidates
+        depth = k if self.retrieval_mode == "dense" else max(k, FUSION_DEPTH)
+        found: Dict[str, "Document"] = {}
+        dense_rankings = [[] for _ in questions]
+        if self.retrieval_mode != "sparse" and self.vector_backend == "numpy":
+            index = self.ensure_vector_index()
+            rows, _ = index.search(embeddings, depth)
+            dense_rankings = [[index.chunk_ids[row] for row in query_rows] for query_rows in rows]
+        elif self.retrieval_mode != "sparse":
+            result = self.vectorstore._collection.query(
+                query_embeddings=embeddings,
+                n_results=depth,
+                include=["documents", "metadatas", "distances"]
+            )
+            for row in range(len(questions)):
+                for chunk_id, text, metadata in zip(result["ids"][row], result["documents"][row],
+                                                    result["metadatas"][row]):
+                    found[chunk_id] = Document(page_content=text or "", metadata=metadata or {})
+                dense_rankings[row] = result["ids"][row]
+        
+        rankings = []
+        for question, dense in zip(questions, dense_rankings):
+            if self.retrieval_mode == "dense":
+                ranking = dense
+            else:
+                sparse = [chunk_id for chunk_id, _ in self.ensure_lexical_index().search(question, depth)]
+                if self.retrieval_mode == "sparse":
+                    ranking = sparse
+                else:
+                    ranking = [chunk_id for chunk_id, _ in reciprocal_rank_fusion([dense, sparse])]
+            rankings.append(ranking[:k])
+        
+        # Chunks not returned with their text by a Chroma query
+        missing = list(dict.fromkeys(chunk_id for ranking in rankings for chunk_id in ranking
+                                     if chunk_id not in found))
+        if missing:
+            found.update(self.fetch_documents(missing))
+        
+        retrievals = []
+        for ranking, embedding in zip(rankings, embeddings):
+            ids = [chunk_id for chunk_id in ranking if chunk_id in found]  # Skips chunks deleted since indexing
+            retrievals.append({"embedding": embedding, "documents": [found[chunk_id] for chunk_id in ids], "ids": ids})
+        return retrievals
+    
+    def fetch_documents(self, chunk_ids: List[str]) -> Dict[str, "Document"]:
+        """Documents for chunk IDs, from the in-memory vector index when loaded, else Chroma."""
+        documents = {}
+        if self.vector_index is not None:
+            for chunk_id in chunk_ids:
+                row = self.vector_index.rows.get(chunk_id)
+                if row is not None:
+                    text, metadata = self.vector_index.document(row)
+                    documents[chunk_id] = Document(page_content=text, metadata=metadata)
+        rest = [chunk_id for chunk_id in chunk_ids if chunk_id not in documents]
+        if rest:
+            data = self.vectorstore._collection.get(ids=rest, include=["documents", "metadatas"])
+            for chunk_id, text, metadata in zip(data["ids"], data["documents"], data["metadatas"]):
+                documents[chunk_id] = Document(page_content=text or "", metadata=metadata or {})
+        return documents
+    
+    def context_budget(self) -> int:
+        """Context tokens to pack into the prompt for the current model."""
+        return self.available_models.get(self.model_name, {}).get("context_tokens", DEFAULT_CONTEXT_TOKENS)
+    
+    def pack_context(self, retrieval: Dict[str, Any]):
+        """Merge, deduplicate and pack retrieved chunks into the model's context budget.
+        
+        Chunks arrive best first; returns the documents to stuff into the
+        prompt and the packing stats, which are logged per question.
+        """
+        if self.context_packer is None:
+            self.context_packer = ContextPacker(get_token_counter(self.embedding_model_name))
+        documents, stats = self.context_packer.pack(
+            retrieval["documents"], self.context_budget(), baseline_k=self.retrieval_k
+        )
+        print(summarize_packing(stats))
+        self.context_totals["queries"] += 1
+        self.context_totals["context_tokens"] += stats["context_tokens"]
+        self.context_totals["tokens_saved"] += stats["tokens_saved"]
+        return documents, stats
+    
+    def format_response(self, question: str, answer: str, source_documents: List["Document"]) -> Dict[str, Any]:
+        """Build the response dict returned by ask()."""
         response = {
             "question": question,
-            "answer": result["result"],
+            "answer": answer,
             "sources": []
         }
         
         # Add source information
-        for doc in result["source_documents"]:
+        for doc in source_documents:
             source_info = {
                 "filename": doc.metadata.get("filename", "Unknown"),
                 "file_type": doc.metadata.get("file_type", "Unknown"),
                 "content_type": doc.metadata.get("content_type", "Unknown"),
                 "snippet": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content
             }
+            for key in ("blueprint", "impl"):
+                if doc.metadata.get(key):
+                    source_info[key] = doc.metadata[key]
+            if doc.metadata.get("provenance"):
+                source_info["provenance"] = doc.metadata["provenance"].split('; ')
             response["sources"].append(source_info)
         
         return response
     
+    def emit_stage(self, on_stage, stage: str, start: float, timings: Dict[str, float]):
+        """Record a pipeline stage's elapsed time and notify the caller's listener."""
+        timings[stage] = round(time.perf_counter() - start, 3)
+        if on_stage is not None:
+            on_stage(stage, timings[stage])
+    
+    def check_latency_budget(self, question: str, timings: Dict[str, float]):
+        """Log questions whose end-to-end latency exceeded the budget."""
+        total = timings.get("llm_done", 0.0)
+        if self.latency_budget_s and total > self.latency_budget_s:
+            breakdown = ", ".join(f"{stage}={seconds:.2f}s" for stage, seconds in timings.items())
+            print(f"⚠️  Latency budget exceeded: {total:.2f}s > {self.latency_budget_s:.2f}s "
+                  f"({breakdown}) for question: {question[:80]}")
+    
+    def ask(self, question: str, on_stage=None) -> Dict[str, Any]:
+        """Ask a question and get an answer with sources.
+        
+        on_stage(stage, elapsed_seconds) is called at "retrieval_done" and "llm_done".
+        """
+        if not self.qa_chain:
+            raise RuntimeError("QA chain not initialized")
+        
+        print(f"\n❓ Question: {question}")
+        print("🔍 Searching knowledge base...")
+        
+        start = time.perf_counter()
+        timings = {}
+        retrieval = self.retrieve(question)
+        self.emit_stage(on_stage, "retrieval_done", start, timings)
+        
+        cached = self.answer_cache.get(self.model_name, question, retrieval["ids"], retrieval["embedding"])
+        if cached is not None:
+            print("⚡ Answer served from cache")
+            self.emit_stage(on_stage, "llm_done", start, timings)
+            cached["question"] = question
+            cached["cached"] = True
+            cached["timings"] = timings
+            return cached
+        
+        # Get answer from the stuff chain over the packed context
+        documents, context = self.pack_context(retrieval)
+        answer = self.qa_chain.combine_documents_chain.run(
+            input_documents=documents,
+            question=question
+        )
+        self.emit_stage(on_stage, "llm_done", start, timings)
+        
+        response = self.format_response(question, answer, documents)
+        response["context"] = context
+        self.answer_cache.put(self.model_name, question, retrieval["ids"], response, retrieval["embedding"])
+        response["timings"] = timings
+        self.check_latency_budget(question, timings)
+        return response
+    
+    def ask_stream(self, question: str, on_stage=None):
+        """Ask a question and yield events as the answer is generated.
+        
+        Yields {"type": "sources", "sources": [...]} once retrieval is done,
+        then {"type": "token", "text": ...} per streamed token, and finally
+        {"type": "done", "response": {...}} with the same dict ask() returns.
+        on_stage(stage, elapsed_seconds) is called at "retrieval_done",
+        "llm_first_token" and "llm_done".
+        """
+        if not self.stream_chain:
+            raise RuntimeError("QA chain not initialized")
+        
+        print(f"\n❓ Question: {question}")
+        print("🔍 Searching knowledge base...")
+        
+        start = time.perf_counter()
+        timings = {}
+        retrieval = self.retrieve(question)
+        self.emit_stage(on_stage, "retrieval_done", start, timings)
+        
+        # Check the cache before packing, so cached answers don't count as sent context
+        cached = self.answer_cache.get(self.model_name, question, retrieval["ids"], retrieval["embedding"])
+        if cached is not None:
+            print("⚡ Answer served from cache")
+            yield {"type": "sources", "sources": cached["sources"]}
+            self.emit_stage(on_stage, "llm_first_token", start, timings)
+            yield {"type": "token", "text": cached["answer"]}
+            self.emit_stage(on_stage, "llm_done", start, timings)
+            cached["question"] = question
+            cached["cached"] = True
+            cached["timings"] = timings
+            yield {"type": "done", "response": cached}
+            return
+        
+        documents, context = self.pack_context(retrieval)
+        yield {"type": "sources", "sources": self.format_response(question, "", documents)["sources"]}
+        
+        # Run the chain in a worker thread; tokens arrive through the callback queue
+        token_queue = queue.Queue()
+        
+        def generate():
+            try:
+                answer = self.stream_chain.run(
+                    input_documents=documents,
+                    question=question,
+                    callbacks=[TokenQueueHandler(token_queue)]
+                )
+                token_queue.put(("done", answer))
+            except Exception as e:
+                token_queue.put(("error", e))
+        
+        threading.Thread(target=generate, daemon=True).start()
+        
+        while True:
+            kind, value = token_queue.get()
+            if kind == "token":
+                if "llm_first_token" not in timings:
+                    self.emit_stage(on_stage, "llm_first_token", start, timings)
+                yield {"type": "token", "text": value}
+            elif kind == "error":
+                raise value
+            else:
+                answer = value
+                break
+        self.emit_stage(on_stage, "llm_done", start, timings)
+        
+        response = self.format_response(question, answer, documents)
+        response["context"] = context
+        self.answer_cache.put(self.model_name, question, retrieval["ids"], response, retrieval["embedding"])
+        response["timings"] = timings
+        self.check_latency_budget(question, timings)
+        yield {"type": "done", "response": response}
+    
+    async def aask(self, question: str, timeout: float = None, retrieval: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Async version of ask(); retrieval can be supplied by a batched caller."""
+        if not self.qa_chain:
+            raise RuntimeError("QA chain not initialized")
+        
+        start = time.perf_counter()
+        timings = {}
+        if retrieval is None:
+            retrieval = await asyncio.to_thread(self.retrieve, question)
+            self.emit_stage(None, "retrieval_done", start, timings)
+        
+        cached = self.answer_cache.get(self.model_name, question, retrieval["ids"], retrieval["embedding"])
+        if cached is not None:
+            cached["question"] = question
+            cached["cached"] = True
+            return cached
+        
+        documents, context = self.pack_context(retrieval)
+        answer = await asyncio.wait_for(
+            self.qa_chain.combine_documents_chain.arun(
+                input_documents=documents,
+                question=question
+            ),
+            timeout=timeout
+        )
+        self.emit_stage(None, "llm_done", start, timings)
+        
+        response = self.format_response(question, answer, documents)
+        response["context"] = context
+        self.answer_cache.put(self.model_name, question, retrieval["ids"], response, retrieval["embedding"])
+        response["timings"] = timings
+        self.check_latency_budget(question, timings)
+        return response
+    
+    async def aask_many(self, questions: List[str], max_concurrency: int = 8,
+                        timeout: float = 120) -> List[Dict[str, Any]]:
+        """Answer many questions concurrently; results are in input order.
+        
+        Retrieval for all questions runs as one batched similarity query.
+        At most max_concurrency OpenRouter requests are in flight, each
+        bounded by timeout seconds. A failing question yields a response
+        with an "error" key instead of raising.
+        """
+        print(f"\n📦 Answering {len(questions)} questions (concurrency {max_concurrency})...")
+        retrievals = await asyncio.to_thread(self.retrieve_many, questions)
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def answer(question, retrieval):
+            async with semaphore:
+                try:
+                    return await self.aask(question, timeout=timeout, retrieval=retrieval)
+                except asyncio.TimeoutError:
+                    error = f"Timed out after {timeout}s"
+                except Exception as e:
+                    error = str(e) or type(e).__name__
+                print(f"❌ Failed: {question[:60]}: {error}")
+                response = self.format_response(question, "", retrieval["documents"])
+                response["error"] = error
+                return response
+        
+        return await asyncio.gather(*(answer(q, r) for q, r in zip(questions, retrievals)))
+    
+    def ask_many(self, questions: List[str], max_concurrency: int = 8,
+                 timeout: float = 120) -> List[Dict[str, Any]]:
+        """Synchronous wrapper around aask_many()."""
+        # Run on the HTTP client's own loop so pooled async connections are reused
+        return self.http.run(self.aask_many(questions, max_concurrency=max_concurrency, timeout=timeout))
+    
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Hit/miss counters for the retrieval and answer caches."""
+        return {
+            "retrieval": self.retrieval_cache.stats(),
+            "answers": self.answer_cache.stats(),
+        }
+    
+    def context_stats(self) -> Dict[str, int]:
+        """Context tokens sent and saved by packing, summed over answered questions."""
+        return dict(self.context_totals)
+    
+    def http_stats(self) -> Dict[str, Any]:
+        """Per-attempt OpenRouter latency metrics and circuit breaker state."""
+        return self.http.stats()
+    
+    def clear_caches(self):
+        """Drop cached retrievals and answers (e.g. after the index changes)."""
+        self.retrieval_cache.clear()
+        self.answer_cache.clear()
+    
     def print_answer(self, response: Dict[str, Any]):
         """Pretty print the answer with sources."""
         print("\n" + "="*80)
@@ -346,26 +1301,191 @@ Answer: """
     
     def show_help(self):
         """Show example questions."""
-        examples = [
-            "How do I create a blueprint in Scrypto?",
-            "What is a component in RadixDLT?",
-            "Show me how to create a token in Scrypto",
-            "How does the Radix Engine work?",
-            "What are badges in RadixDLT?",
-            "How do I implement access control in Scrypto?",
-            "Show me examples of Rust code for RadixDLT",
-            "What is a resource in RadixDLT?",
-            "How do I deploy a blueprint to RadixDLT?",
-            "What are the main Scrypto data types?",
-        ]
-        
         print("\n💡 Example questions you can ask:")
         print("-" * 40)
-        for example in examples:
+        for example in EXAMPLE_QUESTIONS:
             print(f"• {example}")
 
+def compare_chunking(knowledge_base_path="kb/cleaned", embedding_cache_dir="./embedding_cache",
+                     embedding_model_name="sentence-transformers/all-MiniLM-L6-v2", k=6):
+    """Compare the character splitter with the heading-aware chunker on the Markdown docs.
+    
+    Builds a throwaway in-memory Chroma collection per splitter and reports
+    chunk count, tokens, index size (vectors plus text) and similarity
+    search latency for EXAMPLE_QUESTIONS.
+    """
+    load_langchain()
+    embeddings, embedding_cache = get_shared_embeddings(embedding_model_name, embedding_cache_dir)
+    counter = get_token_counter(embedding_model_name)
+    kb_path = Path(knowledge_base_path)
+    documents = [
+        Document(page_content=path.read_text(encoding='utf-8'), metadata={"source": str(path)})
+        for path in sorted(kb_path.rglob("*.md"))
+        if not any(part.startswith('.') for part in path.relative_to(kb_path).parts)
+    ]
+    splitters = {
+        "recursive 1000/200 chars": RecursiveCharacterTextSplitter(
+            chunk_size=1000, chunk_overlap=200, separators=["\n\n", "\n", " ", ""]
+        ),
+        f"headings {MARKDOWN_CHUNK_TOKENS} tokens": MarkdownSectionChunker(
+            max_tokens=MARKDOWN_CHUNK_TOKENS, token_length=counter
+        ),
+    }
+    print(f"📐 Comparing chunkers on {len(documents)} Markdown files (tokens: {counter.name})\n")
+    
+    rows = []
+    for i, (label, splitter) in enumerate(splitters.items()):
+        chunks = splitter.split_documents(documents)
+        texts = [chunk.page_content for chunk in chunks]
+        start = time.perf_counter()
+        vectors = embeddings.embed_documents(texts)
+        embed_seconds = time.perf_counter() - start
+        
+        store = Chroma(collection_name=f"chunking-compare-{i}", embedding_function=embeddings)
+        for batch_start in range(0, len(texts), VECTORSTORE_BATCH_SIZE):
+            batch = slice(batch_start, batch_start + VECTORSTORE_BATCH_SIZE)
+            store._collection.add(
+                ids=[str(n) for n in range(len(texts))][batch],
+                documents=texts[batch],
+                embeddings=vectors[batch]
+            )
+        latencies, context_tokens = [], []
+        for question in EXAMPLE_QUESTIONS:
+            start = time.perf_counter()
+            results = store.similarity_search(question, k=k)
+            latencies.append(time.perf_counter() - start)
+            context_tokens.append(sum(counter(doc.page_content) for doc in results))
+        store.delete_collection()
+        
+        dim = len(vectors[0]) if vectors else 0
+        index_bytes = 4 * dim * len(texts) + sum(len(text.encode('utf-8')) for text in texts)
+        latencies.sort()
+        rows.append((label, len(texts), sum(counter(text) for text in texts), index_bytes / 1e6,
+                     embed_seconds, 1000 * latencies[len(latencies) // 2],
+                     sum(context_tokens) / len(context_tokens)))
+    embedding_cache.flush()
+    
+    print(f"  {'splitter':26} {'chunks':>7} {'tokens':>9} {'index MB':>9} {'embed s':>8} "
+          f"{'p50 ms':>7} {'ctx tokens':>10}")
+    for label, count, tokens, megabytes, embed_seconds, p50, context in rows:
+        print(f"  {label:26} {count:7} {tokens:9} {megabytes:9.2f} {embed_seconds:8.1f} "
+              f"{p50:7.1f} {context:10.0f}")
+    print(f"\n  ctx tokens: mean tokens in the top {k} chunks sent to the LLM per question")
+
+def benchmark_vector_backends(persist_directory="./vectorstore_openrouter", embedding_cache_dir="./embedding_cache",
+                              embedding_model_name="sentence-transformers/all-MiniLM-L6-v2",
+                              k=FUSION_DEPTH, rounds=20, batch_size=256):
+    """Benchmark exact numpy search against Chroma on the persisted vector store.
+    
+    Single queries are the embedded EXAMPLE_QUESTIONS; the batch uses
+    stored chunk vectors as queries. Both sides return text and metadata
+    for the top k. Reports on-disk size, load time, p50/p95 latency,
+    batch time and the overlap between the two top-k lists (Chroma's
+    HNSW search is approximate).
+    """
+    load_langchain()
+    if not os.path.exists(persist_directory):
+        print(f"❌ No vector store at {persist_directory}; start the RAG system once to build it")
+        return
+    embeddings, embedding_cache = get_shared_embeddings(embedding_model_name, embedding_cache_dir)
+    collection = open_vectorstore(persist_directory, embeddings)._collection
+    
+    start = time.perf_counter()
+    data = collection.get(include=["embeddings", "documents", "metadatas"])
+    VectorIndex.build(data["ids"], data["embeddings"], data["documents"], data["metadatas"]).save(persist_directory)
+    export_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    index = VectorIndex.load(persist_directory)
+    load_ms = 1000 * (time.perf_counter() - start)
+    print(f"📐 Benchmarking dense search over {len(index)} vectors (k={k}); "
+          f"numpy index exported in {export_seconds:.1f}s, loaded in {load_ms:.1f}ms\n")
+    
+    def chroma_search(queries):
+        result = collection.query(query_embeddings=[list(map(float, q)) for q in queries],
+                                  n_results=k, include=["documents", "metadatas"])
+        return result["ids"]
+    
+    def numpy_search(queries):
+        rows, _ = index.search(queries, k)
+        for row in rows.ravel():
+            index.document(row)
+        return [[index.chunk_ids[row] for row in query_rows] for query_rows in rows]
+    
+    questions = np.asarray(embeddings.embed_queries(EXAMPLE_QUESTIONS), dtype=np.float32)
+    sample = np.random.default_rng(0).choice(len(index), size=min(batch_size, len(index)), replace=False)
+    batch = np.asarray(index.vectors[np.sort(sample)])
+    
+    ignored = {VECTORS_FILENAME, TABLE_FILENAME, LEXICAL_INDEX_FILENAME}
+    chroma_bytes = sum(path.stat().st_size for path in Path(persist_directory).rglob("*")
+                       if path.is_file() and path.name not in ignored)
+    numpy_bytes = sum((Path(persist_directory) / name).stat().st_size for name in (VECTORS_FILENAME, TABLE_FILENAME))
+    
+    rows, results = [], {}
+    for label, search, size in (("chroma", chroma_search, chroma_bytes), ("numpy", numpy_search, numpy_bytes)):
+        latencies = []
+        for _ in range(rounds):
+            for query in questions:
+                start = time.perf_counter()
+                search(query[None, :])
+                latencies.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        search(batch)
+        batch_seconds = time.perf_counter() - start
+        results[label] = search(questions)
+        latencies.sort()
+        rows.append((label, size / 1e6, 1000 * latencies[len(latencies) // 2],
+                     1000 * latencies[int(len(latencies) * 0.95)], 1000 * batch_seconds))
+    embedding_cache.flush()
+    
+    overlap = np.mean([len(set(a) & set(b)) / max(len(a), 1) for a, b in zip(results["chroma"], results["numpy"])])
+    print(f"  {'backend':8} {'disk MB':>8} {'p50 ms':>7} {'p95 ms':>7} {f'batch {len(batch)} ms':>13}")
+    for label, megabytes, p50, p95, batch_ms in rows:
+        print(f"  {label:8} {megabytes:8.1f} {p50:7.2f} {p95:7.2f} {batch_ms:13.1f}")
+    print(f"\n  top-{k} overlap between backends: {100 * overlap:.1f}%")
+
+def print_import_profile():
+    """Import the deferred dependencies and print where startup time goes."""
+    load_langchain()
+    print("\n⏱️  Import profile:")
+    for name, seconds in sorted(IMPORT_PROFILE.items(), key=lambda item: -item[1]):
+        print(f"  {seconds:7.3f}s  {name}")
+    print(f"🎯 Cold-start target: {COLD_START_TARGET_S:.0f}s")
+
+
 def main():
     """Main function to run the RAG system."""
+    parser = argparse.ArgumentParser(description="RadixDLT RAG System (OpenRouter)")
+    parser.add_argument("--models", action="store_true",
+                        help="List available models and exit (no model loading)")
+    parser.add_argument("--profile-imports", action="store_true",
+                        help="Print an import-time breakdown and exit")
+    parser.add_argument("--compare-chunking", action="store_true",
+                        help="Compare the character splitter and heading-aware chunker on kb/cleaned Markdown and exit")
+    parser.add_argument("--retrieval-mode", choices=RETRIEVAL_MODES, default=None,
+                        help="dense (vectors), sparse (BM25) or hybrid (both, fused); default $RAG_RETRIEVAL_MODE or hybrid")
+    parser.add_argument("--vector-backend", choices=VECTOR_BACKENDS, default=None,
+                        help="Dense search backend; default $RAG_VECTOR_BACKEND or numpy")
+    parser.add_argument("--benchmark-retrieval", action="store_true",
+                        help="Benchmark dense search with the numpy index against Chroma and exit")
+    parser.add_argument("--parallel-index", action="store_true", default=None,
+                        help="Embed changed chunks across a process pool; default $RAG_PARALLEL_INDEX")
+    parser.add_argument("--index-workers", type=int, default=None, metavar="N",
+                        help="Worker processes for --parallel-index; default $RAG_INDEX_WORKERS or the number of cores")
+    args = parser.parse_args()
+    
+    if args.models:
+        RadixRAGSystemOpenRouter.show_available_models()
+        return 0
+    if args.profile_imports:
+        print_import_profile()
+        return 0
+    if args.compare_chunking:
+        compare_chunking()
+        return 0
+    if args.benchmark_retrieval:
+        benchmark_vector_backends()
+        return 0
+    
     print("RadixDLT RAG System (OpenRouter)")
     print("=" * 50)
     
@@ -376,7 +1496,16 @@ def main():
         # - Budget option: "meta-llama/llama-3.1-8b-instruct" 
         # - Balanced: "anthropic/claude-3-haiku"
         
-        rag = RadixRAGSystemOpenRouter(model_name="anthropic/claude-3.5-sonnet")
+        rag = RadixRAGSystemOpenRouter(model_name="anthropic/claude-3.5-sonnet",
+                                       retrieval_mode=args.retrieval_mode,
+                                       vector_backend=args.vector_backend,
+                                       parallel_indexing=args.parallel_index,
+                                       index_workers=args.index_workers)
+        
+        if rag.parallel_indexing:
+            throughput = (rag.index_stats or {}).get("embeddings_per_second")
+            print(f"⚡ Parallel indexing ({rag.index_workers or os.cpu_count()} workers): "
+                  + (f"{throughput} embeddings/s" if throughput else "index already up to date"))
         
         # Show model info
         print(f"\n💡 You can change the model by editing the model_name parameter")
@@ -0,0 +1,57 @@
+"""Chunk offsets must point at the chunk's own text in the source file."""
+
+import pytest
+
+from chunkers import RustItemChunker
+
+# A large impl of near-identical methods: windows of it repeat each other, so
+# a piece can be found earlier in the file than where it really comes from
+REPETITIVE_SOURCE = "use scrypto::prelude::*;\n\n#[blueprint]\nmod vault_reader {\n" + "".join(
+    f"""
+    impl VaultReader{i} {{
+        pub fn read_all(&self) -> Vec<Decimal> {{
+            let mut amounts = Vec::new();
+{"".join(f"            amounts.push(self.vaults.get(&{j % 4}).unwrap().amount());{chr(10)}" for j in range(60))}            amounts
+        }}
+    }}
+""" for i in range(3)) + "}\n"
+
+
+def fallback_splitter():
+    text_splitter = pytest.importorskip("langchain.text_splitter")
+    return text_splitter.RecursiveCharacterTextSplitter(
+        chunk_size=1000, chunk_overlap=100, separators=["\n\n", "\n", " ", ""])
+
+
+def assert_offsets_match(chunker, text):
+    chunks = chunker.split_text_with_metadata(text)
+    assert chunks
+    for chunk, metadata in chunks:
+        start = metadata["start_index"]
+        assert text[start:start + len(chunk)] == chunk
+    return chunks
+
+
+def test_rust_offsets_without_fallback():
+    chunks = assert_offsets_match(RustItemChunker(chunk_size=1000), REPETITIVE_SOURCE)
+    assert chunks[-1][1]["start_index"] + len(chunks[-1][0]) == len(REPETITIVE_SOURCE.rstrip())
+
+
+def test_rust_offsets_with_overlapping_fallback():
+    chunker = RustItemChunker(chunk_size=1000, fallback=fallback_splitter())
+    chunks = assert_offsets_match(chunker, REPETITIVE_SOURCE)
+    starts = [metadata["start_index"] for _, metadata in chunks]
+    assert starts == sorted(starts)
+    assert chunks[-1][1]["start_index"] + len(chunks[-1][0]) == len(REPETITIVE_SOURCE.rstrip())
+
+
+def test_window_spans_place_repeated_pieces_in_order():
+    chunker = RustItemChunker(chunk_size=1000, fallback=fallback_splitter())
+    segment = REPETITIVE_SOURCE
+    windows = chunker.window_spans(segment, 0, len(segment))
+    pieces = chunker.fallback.split_text(segment)
+    assert [segment[start:end] for start, end in windows] == pieces
+    for (previous_start, previous_end), (start, _) in zip(windows, windows[1:]):
+        # Overlap at most chunk_overlap characters; anything skipped is stripped whitespace
+        assert previous_start < start and previous_end - start <= 100
+        assert not segment[previous_end:start].strip()
@@ -0,0 +1,50 @@
+"""The single-pass normalizer and extractor must match the per-rule legacy versions byte for byte."""
+
+import pytest
+
+from clean_kb import (extract_rust_code_blocks, extract_rust_code_blocks_legacy, normalize_and_extract,
+                      normalize_and_extract_legacy, normalize_markdown, normalize_markdown_legacy)
+
+RUST_BODY = 'pub fn withdraw(&mut self, amount: Decimal) -> Bucket {\nself.vault.take(amount)\n}'
+
+CASES = {
+    "seven hashes": "####### Not a header\n######Six\n#Title\n##\n",
+    "header on last line": "Intro\n\n##Last",
+    "bare hashes on last line": "Intro\n###",
+    "whitespace-only lines": "a\n \n\t\n   \t \nb\n\n\n\nc  \n\t d",
+    "empty link": "See [](https://example.com) and [docs]() here",
+    "link markers inside code": f"```rust\nlet v = f[](0);\n{RUST_BODY}\n```",
+    "empty fences": "```\n```\ntext\n```  \n```\n",
+    "fence closing before an opening": f"```\n```rust\n{RUST_BODY}\n```",
+    "comments": f"<!-- hidden\n```rust\n{RUST_BODY}\n```\n-->\nafter <!-- inline --> text",
+    "rust and rs fences": f"```rust\n{RUST_BODY}\n```\nThen\n```RS\n{RUST_BODY}\n```\nand\n```Rust\n{RUST_BODY}\n```",
+    "adjacent fences": f"```rust\n{RUST_BODY}\n```\n\n```rs\n{RUST_BODY}\n```",
+    "opening on closing line": f"```rust\n{RUST_BODY}\n``````rust\n{RUST_BODY}\n```",
+    "unclosed fence": f"```rust\n{RUST_BODY}",
+    "fence right after opening": f"```rust\n```\n{RUST_BODY}\n```",
+    "html blocks": f'<pre lang="rust"><code class="language-rust">{RUST_BODY}</code></pre>',
+    "indented and trailing spaces": f"  ```rust  \n  {RUST_BODY}  \n```   ",
+    "crlf": f"```rust\r\n{RUST_BODY}\r\n```\r\n",
+    "empty": "",
+}
+
+
+@pytest.mark.parametrize("text", CASES.values(), ids=CASES.keys())
+def test_normalize_matches_legacy(text):
+    assert normalize_markdown(text) == normalize_markdown_legacy(text)
+
+
+@pytest.mark.parametrize("text", CASES.values(), ids=CASES.keys())
+def test_extract_matches_legacy(text):
+    assert extract_rust_code_blocks(text, "page") == extract_rust_code_blocks_legacy(text, "page")
+
+
+@pytest.mark.parametrize("text", CASES.values(), ids=CASES.keys())
+def test_normalize_and_extract_matches_legacy(text):
+    assert normalize_and_extract(text, "page") == normalize_and_extract_legacy(text, "page")
+
+
+def test_blocks_are_extracted():
+    _, blocks = normalize_and_extract(CASES["rust and rs fences"], "page")
+    assert [name for name, _ in blocks] == ["page_code_0_0.rs", "page_code_0_1.rs", "page_code_1_0.rs"]
+    assert all(code == RUST_BODY for _, code in blocks)
@@ -0,0 +1,56 @@
+"""The embedding cache must never hand out another text's vector."""
+
+import json
+
+import numpy as np
+
+from embedding_cache import EmbeddingCache, INDEX_FILENAME
+
+
+def vectors(*values):
+    return np.array([[value, value + 0.5] for value in values], dtype=np.float32)
+
+
+def test_reopen_after_flush(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["a", "b"], vectors(1, 2))
+    cache.flush()
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["c"], vectors(3))
+    assert np.array_equal(cache.get("a"), vectors(1)[0])
+    assert np.array_equal(cache.get("c"), vectors(3)[0])
+
+
+def test_crash_before_first_flush(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["a", "b"], vectors(1, 2))  # No flush: vectors on disk, no index
+    cache = EmbeddingCache(tmp_path)
+    assert len(cache) == 0
+    cache.put_many(["c"], vectors(3))
+    assert np.array_equal(cache.get("c"), vectors(3)[0])
+    cache.flush()
+    assert np.array_equal(EmbeddingCache(tmp_path).get("c"), vectors(3)[0])
+
+
+def test_rows_appended_after_last_flush(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["a"], vectors(1))
+    cache.flush()
+    cache.put_many(["b"], vectors(2))  # Dies before flushing b
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["c"], vectors(3))
+    assert cache.get("b") is None
+    assert np.array_equal(cache.get("c"), vectors(3)[0])
+
+
+def test_unreadable_index(tmp_path):
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["a", "b"], vectors(1, 2))
+    cache.flush()
+    (cache.cache_dir / INDEX_FILENAME).write_text("{not json", encoding="utf-8")
+    cache = EmbeddingCache(tmp_path)
+    cache.put_many(["c"], vectors(3))
+    assert np.array_equal(cache.get("c"), vectors(3)[0])
+    cache.flush()
+    with open(cache.cache_dir / INDEX_FILENAME, encoding="utf-8") as f:
+        assert json.load(f)["keys"] == ["c"]
@@ -0,0 +1,175 @@
+"""Conditional and resumable downloads against a local http.server."""
+
+import hashlib
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+import harvest_kb
+from harvest_kb import stream_download
+
+BODY = bytes(range(256)) * 16  # 4 KB
+ETAG = '"v1"'
+
+
+class Server:
+    """Serves BODY at /file.html through a per-test route; records request headers."""
+
+    def __init__(self, route):
+        self.route = route
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                status, headers, body = server.route(self.headers)
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/file.html"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def full(headers):
+    return 200, {"ETag": ETAG}, BODY
+
+
+def ranged(headers):
+    """Honours Range when If-Range still matches, like a static file server."""
+    if headers.get("Range") and headers.get("If-Range") == ETAG:
+        start = int(headers["Range"][len("bytes="):-1])
+        content_range = f"bytes {start}-{len(BODY) - 1}/{len(BODY)}"
+        return 206, {"ETag": ETAG, "Content-Range": content_range}, BODY[start:]
+    return full(headers)
+
+
+def write_partial(target, data, validator=ETAG):
+    part = target.parent / (target.name + ".part")
+    part.write_bytes(data)
+    (target.parent / (target.name + ".part.json")).write_text(json.dumps({"validator": validator}))
+    return part
+
+
+def leftovers(target):
+    return sorted(path.name for path in target.parent.iterdir() if path.name.startswith(target.name + "."))
+
+
+def test_not_modified_is_skipped_and_reported_as_bytes_saved(tmp_path, monkeypatch, capsys):
+    def route(headers):
+        if headers.get("If-None-Match") == ETAG:
+            return 304, {"ETag": ETAG}, b""
+        return full(headers)
+
+    with Server(route) as server:
+        config = tmp_path / "config.json"
+        target = "kb/raw/file.html"
+        config.write_text(json.dumps({"file_targets": [{"url": server.url, "target_path": target}]}))
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr("sys.argv", ["harvest_kb.py", "--config", str(config), "--no-crawl"])
+
+        assert harvest_kb.main() == 0
+        capsys.readouterr()
+        assert harvest_kb.main() == 0
+        output = capsys.readouterr().out
+
+    assert server.requests[1]["If-None-Match"] == ETAG
+    assert "Files downloaded: 0" in output
+    assert "Not modified (skipped): 1" in output
+    assert "Bytes saved by conditional requests: 4.0 KB" in output
+    assert (tmp_path / target).read_bytes() == BODY
+    manifest = json.loads((tmp_path / harvest_kb.HARVEST_MANIFEST).read_text())
+    assert manifest[target]["size"] == len(BODY)
+
+
+def test_resumes_part_file_with_range_and_if_range(tmp_path):
+    target = tmp_path / "file.html"
+    write_partial(target, BODY[:1000])
+
+    with Server(ranged) as server:
+        _, size, sha256 = stream_download(requests.Session(), server.url, str(target))
+
+    assert server.requests[0]["Range"] == "bytes=1000-"
+    assert server.requests[0]["If-Range"] == ETAG
+    assert size == len(BODY)
+    assert sha256 == hashlib.sha256(BODY).hexdigest()
+    assert target.read_bytes() == BODY
+    assert leftovers(target) == []
+
+
+def test_changed_validator_restarts_from_scratch(tmp_path):
+    target = tmp_path / "file.html"
+    write_partial(target, b"stale" * 200, validator='"v0"')
+
+    with Server(ranged) as server:
+        _, size, _ = stream_download(requests.Session(), server.url, str(target))
+
+    assert server.requests[0]["If-Range"] == '"v0"'
+    assert size == len(BODY)
+    assert target.read_bytes() == BODY
+
+
+def test_416_drops_partial_and_restarts(tmp_path):
+    target = tmp_path / "file.html"
+    write_partial(target, b"x" * (len(BODY) + 10))
+
+    def route(headers):
+        if headers.get("Range"):
+            return 416, {"Content-Range": f"bytes */{len(BODY)}"}, b""
+        return full(headers)
+
+    with Server(route) as server:
+        _, size, _ = stream_download(requests.Session(), server.url, str(target))
+
+    assert [request.get("Range") for request in server.requests] == [f"bytes={len(BODY) + 10}-", None]
+    assert size == len(BODY)
+    assert target.read_bytes() == BODY
+    assert leftovers(target) == []
+
+
+def test_size_mismatch_discards_the_download(tmp_path):
+    target = tmp_path / "file.html"
+    write_partial(target, BODY[:1000])
+
+    def route(headers):
+        # Content-Range promises fewer bytes than the partial plus the body add up to
+        return 206, {"ETag": ETAG, "Content-Range": f"bytes 1000-{len(BODY) - 1}/2000"}, BODY[1000:]
+
+    with Server(route) as server:
+        with pytest.raises(IOError, match="Size mismatch"):
+            stream_download(requests.Session(), server.url, str(target))
+
+    assert not target.exists()
+    assert leftovers(target) == []
+
+
+def test_sha256_mismatch_discards_the_download(tmp_path):
+    target = tmp_path / "file.html"
+
+    with Server(full) as server:
+        with pytest.raises(IOError, match="SHA-256 mismatch"):
+            stream_download(requests.Session(), server.url, str(target), expected_sha256="0" * 64)
+
+    assert not target.exists()
+    assert leftovers(target) == []
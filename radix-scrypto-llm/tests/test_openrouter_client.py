@@ -0,0 +1,108 @@
+"""Retry, backoff and circuit breaker behaviour of the OpenRouter transports."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from openrouter_client import (AsyncRetryTransport, AttemptMetrics, CircuitBreaker, CircuitOpenError,
+                               RetryPolicy, RetryTransport)
+
+
+class NoWaitPolicy(RetryPolicy):
+    def __init__(self, max_retries=2):
+        super().__init__(max_retries=max_retries)
+        self.delays = []
+
+    def delay(self, attempt, response=None):
+        self.delays.append(super().delay(attempt, response))
+        return 0.0
+
+
+def stub(statuses, seen):
+    statuses = list(statuses)
+
+    def handler(request):
+        seen.append(request)
+        return httpx.Response(statuses.pop(0), headers={"Retry-After": "3"})
+    return handler
+
+
+def make_client(statuses, breaker=None, max_retries=2):
+    seen, policy, metrics = [], NoWaitPolicy(max_retries), AttemptMetrics()
+    breaker = breaker or CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    transport = RetryTransport(httpx.MockTransport(stub(statuses, seen)), policy, breaker, metrics)
+    return httpx.Client(transport=transport), seen, policy, breaker, metrics
+
+
+def test_429_then_200_retries_once():
+    client, seen, policy, breaker, metrics = make_client([429, 200])
+    transitions = []
+    record = breaker.record
+    breaker.record = lambda outcome: (transitions.append(outcome), record(outcome))
+
+    assert client.get("https://openrouter.test/api").status_code == 200
+    assert len(seen) == 2
+    assert policy.delays == [3.0]  # Retry-After honored
+    assert metrics.summary()["retries"] == 1
+    assert transitions == ["success"]  # One outcome per call; the 429 is not a failure
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+
+
+def test_exhausted_429_leaves_breaker_closed():
+    client, seen, _, breaker, _ = make_client([429, 429, 429])
+    assert client.get("https://openrouter.test/api").status_code == 429
+    assert len(seen) == 3
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+
+
+def test_breaker_opens_half_opens_and_closes():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+    client, seen, _, _, _ = make_client([503] * 6 + [200], breaker=breaker)
+    client.get("https://openrouter.test/api")
+    assert breaker.state == "closed" and breaker.consecutive_failures == 1  # Three attempts, one failure
+    client.get("https://openrouter.test/api")
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        client.get("https://openrouter.test/api")
+    assert len(seen) == 6
+
+    breaker.opened_at -= 60.0  # Cooldown over: one trial call is let through
+    breaker.before_request()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_request()
+    breaker.record("ignored")
+    assert client.get("https://openrouter.test/api").status_code == 200
+    assert breaker.state == "closed"
+
+
+def test_async_transport_retries():
+    seen, policy, metrics = [], NoWaitPolicy(), AttemptMetrics()
+    breaker = CircuitBreaker()
+    transport = AsyncRetryTransport(httpx.MockTransport(stub([429, 200], seen)), policy, breaker, metrics)
+
+    async def call():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://openrouter.test/api")
+
+    assert asyncio.run(call()).status_code == 200
+    assert len(seen) == 2 and metrics.summary()["retries"] == 1
+    assert breaker.state == "closed"
+
+
+def test_chat_model_gets_both_pooled_clients(monkeypatch):
+    pytest.importorskip("dotenv")
+    import rag_system_openrouter
+    from openrouter_client import OpenRouterHTTP
+
+    class ChatOpenAI:  # langchain_openai: separate sync and async httpx clients
+        model_fields = {"http_client": None, "http_async_client": None, "max_retries": None}
+
+    monkeypatch.setattr(rag_system_openrouter, "ChatOpenAI", ChatOpenAI, raising=False)
+    system = rag_system_openrouter.RadixRAGSystemOpenRouter.__new__(rag_system_openrouter.RadixRAGSystemOpenRouter)
+    system.http = OpenRouterHTTP(max_retries=1)
+    kwargs = system.http_client_kwargs()
+    assert kwargs["http_client"] is system.http.client
+    assert kwargs["http_async_client"] is system.http.async_client
+    assert kwargs["max_retries"] == 0
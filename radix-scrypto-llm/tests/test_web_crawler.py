@@ -0,0 +1,133 @@
+"""Crawler behaviour against an in-memory site served by httpx.MockTransport."""
+
+import asyncio
+import time
+
+import httpx
+
+from web_crawler import WebCrawler, normalize_url, url_to_path
+
+SEED = "https://docs.test/docs/"
+
+
+def page(*links, body=""):
+    anchors = "".join(f'<a href="{link}">link</a>' for link in links)
+    return f"<html><body><p>{body}</p>{anchors}</body></html>"
+
+
+class Site:
+    """path -> HTML (or an int status); records every request."""
+
+    def __init__(self, pages, robots=""):
+        self.pages = pages
+        self.robots = robots
+        self.requests = []
+
+    def handler(self, request):
+        self.requests.append((request.url.path, time.monotonic()))
+        if request.url.path == "/robots.txt":
+            return httpx.Response(200, text=self.robots) if self.robots else httpx.Response(404)
+        content = self.pages.get(request.url.path, 404)
+        if isinstance(content, int):
+            return httpx.Response(content)
+        return httpx.Response(200, text=content, headers={"content-type": "text/html"})
+
+    def fetched(self, path):
+        return sum(1 for requested, _ in self.requests if requested == path)
+
+
+def crawl(site, output_dir, **kwargs):
+    kwargs.setdefault("per_host_delay", 0.0)
+    crawler = WebCrawler(SEED, output_dir=str(output_dir), transport=httpx.MockTransport(site.handler), **kwargs)
+    report = asyncio.run(crawler.crawl())
+    return crawler, report
+
+
+def stored_files(crawler):
+    return sorted(path.name for path in crawler.output_dir.glob("*.html"))
+
+
+def test_robots_disallow_and_crawl_delay(tmp_path):
+    site = Site({
+        "/docs/": page("/docs/a.html", "/docs/private/secret.html", body="home"),
+        "/docs/a.html": page(body="a"),
+        "/docs/private/secret.html": page(body="secret"),
+    }, robots="User-agent: *\nDisallow: /docs/private/\nCrawl-delay: 1\n")
+    crawler, report = crawl(site, tmp_path)
+
+    assert site.fetched("/docs/private/secret.html") == 0
+    assert crawler.manifest[SEED + "private/secret.html"]["skipped"] == "robots.txt"
+    assert report["robots_blocked"] == 1
+    assert crawler.per_host_delay == 1.0
+    starts = [moment for path, moment in site.requests if path != "/robots.txt"]
+    assert len(starts) == 2 and starts[1] - starts[0] >= 0.95
+
+
+def test_aliased_urls_are_fetched_once(tmp_path):
+    site = Site({
+        "/docs/": page("/docs/index.html", "/docs/a.html?utm_source=nav", "/docs//a.html#intro",
+                       "https://DOCS.TEST:443/docs/a.html", "a.html", body="home"),
+        "/docs/a.html": page(body="a"),
+    })
+    crawler, report = crawl(site, tmp_path)
+
+    assert normalize_url("https://DOCS.TEST:443/docs//a.html?utm_source=x#top") == SEED + "a.html"
+    assert site.fetched("/docs/") == 1 and site.fetched("/docs/a.html") == 1
+    assert site.fetched("/docs/index.html") == 0
+    assert report["stored_pages"] == 2
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    site = Site({
+        "/docs/": page("/docs/a.html", "/docs/b.html", body="home"),
+        "/docs/a.html": page(body="same"),
+        "/docs/b.html": page(body="same"),
+    })
+    crawler, report = crawl(site, tmp_path)
+
+    duplicates = [url for url, entry in crawler.manifest.items() if entry.get("duplicate_of")]
+    assert len(duplicates) == 1 and report["duplicates"] == 1
+    assert len(stored_files(crawler)) == 2  # Home page plus one copy
+
+
+def test_only_404_and_410_delete_stored_pages(tmp_path):
+    pages = {
+        "/docs/": page("/docs/gone.html", "/docs/removed.html", "/docs/flaky.html", "/docs/dropped.html",
+                       body="home"),
+        "/docs/gone.html": page(body="gone"),
+        "/docs/removed.html": page(body="removed"),
+        "/docs/flaky.html": page(body="flaky"),
+        "/docs/dropped.html": page(body="dropped"),
+    }
+    crawler, _ = crawl(Site(pages), tmp_path)
+    assert len(stored_files(crawler)) == 5
+
+    pages.update({"/docs/": page("/docs/gone.html", "/docs/removed.html", "/docs/flaky.html", body="home"),
+                  "/docs/gone.html": 404, "/docs/removed.html": 410, "/docs/flaky.html": 503})
+    crawler, report = crawl(Site(pages), tmp_path)
+
+    files = stored_files(crawler)
+    assert url_to_path(SEED + "gone.html") not in files
+    assert url_to_path(SEED + "removed.html") not in files
+    assert url_to_path(SEED + "flaky.html") in files
+    assert url_to_path(SEED + "dropped.html") in files  # Not linked any more, so not reached
+    flaky, dropped = crawler.manifest[SEED + "flaky.html"], crawler.manifest[SEED + "dropped.html"]
+    assert flaky["carried_forward"] and flaky["last_attempt"]["status"] == 503
+    assert dropped["carried_forward"] and "last_attempt" not in dropped
+    assert report["removed"] == 2 and report["carried_forward"] == 2
+
+
+def test_page_that_became_a_duplicate_is_removed(tmp_path):
+    pages = {
+        "/docs/": page("/docs/a.html", "/docs/b.html", body="home"),
+        "/docs/a.html": page(body="first version"),
+        "/docs/b.html": page(body="second version"),
+    }
+    crawl(Site(pages), tmp_path)
+    pages["/docs/a.html"] = pages["/docs/b.html"]
+    crawler, _ = crawl(Site(pages), tmp_path)
+
+    copies = [name for name in stored_files(crawler)
+              if name in (url_to_path(SEED + "a.html"), url_to_path(SEED + "b.html"))]
+    assert len(copies) == 1
+    assert not any(entry.get("carried_forward") for entry in crawler.manifest.values())
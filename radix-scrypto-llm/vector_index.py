@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+In-Memory Exact Vector Index
+The knowledge base is small enough (~13k chunks x 384 dims, ~20 MB of
+float32) that exact search over one contiguous matrix beats a round trip
+through Chroma's SQLite-backed store. Vectors are saved as a raw float32
+file that can be memory-mapped; chunk IDs, texts and metadata live in an
+array-backed table (byte blobs plus offsets) decoded only for the rows a
+query returns.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from lexical_index import chunk_fingerprint
+
+VECTORS_FILENAME = "vector_index.f32"
+TABLE_FILENAME = "vector_index.npz"
+VECTOR_INDEX_VERSION = 1
+
+
+def _pack(strings: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Concatenate UTF-8 strings into one byte blob plus offsets."""
+    encoded = [s.encode('utf-8') for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(b) for b in encoded])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+class VectorIndex:
+    """Normalized float32 embedding matrix with exact top-k cosine search."""
+
+    def __init__(self, chunk_ids: List[str], vectors: np.ndarray,
+                 texts: np.ndarray, text_offsets: np.ndarray,
+                 metadatas: np.ndarray, metadata_offsets: np.ndarray, fingerprint: str):
+        self.chunk_ids = chunk_ids
+        self.rows = {chunk_id: row for row, chunk_id in enumerate(chunk_ids)}
+        self.vectors = vectors
+        self.texts = texts
+        self.text_offsets = text_offsets
+        self.metadatas = metadatas
+        self.metadata_offsets = metadata_offsets
+        self.fingerprint = fingerprint
+
+    @classmethod
+    def build(cls, chunk_ids: Sequence[str], embeddings, documents: Sequence[Optional[str]],
+              metadatas: Sequence[Optional[Dict[str, Any]]]) -> "VectorIndex":
+        """Build from a collection's IDs, embeddings, texts and metadata."""
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32).reshape(len(chunk_ids), -1)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.where(norms > 0, norms, 1)
+        texts, text_offsets = _pack([text or "" for text in documents])
+        metadata_blob, metadata_offsets = _pack([json.dumps(metadata or {}) for metadata in metadatas])
+        return cls(list(chunk_ids), vectors, texts, text_offsets, metadata_blob, metadata_offsets,
+                   chunk_fingerprint(chunk_ids))
+
+    @classmethod
+    def load(cls, directory, mmap: bool = True) -> "VectorIndex":
+        """Load a saved index, memory-mapping the vectors unless mmap=False.
+
+        Raises OSError or ValueError if the files are missing or inconsistent.
+        """
+        directory = Path(directory)
+        with np.load(directory / TABLE_FILENAME, allow_pickle=False) as data:
+            if int(data["version"]) != VECTOR_INDEX_VERSION:
+                raise ValueError("vector index version mismatch")
+            ids_blob = data["chunk_ids"].tobytes().decode('utf-8')
+            chunk_ids = ids_blob.split('\n') if ids_blob else []
+            dim = int(data["dim"])
+            table = (data["texts"], data["text_offsets"], data["metadatas"], data["metadata_offsets"])
+            fingerprint = str(data["fingerprint"])
+        vectors_path = directory / VECTORS_FILENAME
+        if os.path.getsize(vectors_path) != 4 * dim * len(chunk_ids):
+            raise ValueError("vector file does not match the index table")
+        if not chunk_ids:
+            vectors = np.zeros((0, dim), dtype=np.float32)
+        elif mmap:
+            vectors = np.memmap(vectors_path, dtype=np.float32, mode='r', shape=(len(chunk_ids), dim))
+        else:
+            vectors = np.fromfile(vectors_path, dtype=np.float32).reshape(len(chunk_ids), dim)
+        return cls(chunk_ids, vectors, *table, fingerprint)
+
+    def save(self, directory):
+        """Write the vector file and the table, each replaced atomically."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        vectors_path = directory / VECTORS_FILENAME
+        tmp_vectors = vectors_path.with_name(vectors_path.name + '.tmp')
+        with open(tmp_vectors, 'wb') as f:
+            f.write(np.ascontiguousarray(self.vectors, dtype=np.float32).tobytes())
+        tmp_table = directory / (TABLE_FILENAME + '.tmp.npz')
+        np.savez(tmp_table,
+                 version=np.array(VECTOR_INDEX_VERSION),
+                 fingerprint=np.array(self.fingerprint),
+                 dim=np.array(self.vectors.shape[1] if self.vectors.ndim == 2 else 0),
+                 chunk_ids=np.frombuffer('\n'.join(self.chunk_ids).encode('utf-8'), dtype=np.uint8),
+                 texts=self.texts, text_offsets=self.text_offsets,
+                 metadatas=self.metadatas, metadata_offsets=self.metadata_offsets)
+        os.replace(tmp_vectors, vectors_path)
+        os.replace(tmp_table, directory / TABLE_FILENAME)
+
+    def __len__(self):
+        return len(self.chunk_ids)
+
+    def document(self, row: int) -> Tuple[str, Dict[str, Any]]:
+        """Text and metadata of one row."""
+        text = self.texts[self.text_offsets[row]:self.text_offsets[row + 1]].tobytes().decode('utf-8')
+        metadata = self.metadatas[self.metadata_offsets[row]:self.metadata_offsets[row + 1]].tobytes()
+        return text, json.loads(metadata)
+
+    def search(self, queries, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Exact top-k rows by cosine similarity, best first.
+
+        queries is one vector or an (n, dim) batch; a batch is scored with
+        a single matrix-matrix product. Returns (rows, scores), both (n, k).
+        """
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries[None, :]
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        queries = queries / np.where(norms > 0, norms, 1)
+        k = min(k, len(self.chunk_ids))
+        if k <= 0:
+            empty = np.zeros((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        if len(queries) == 1:
+            scores = (self.vectors @ queries[0])[None, :]  # Matrix-vector: faster than a 1-row matmul
+        else:
+            scores = queries @ self.vectors.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind='stable')
+        return np.take_along_axis(top, order, axis=1), np.take_along_axis(top_scores, order, axis=1)
@@ -0,0 +1,387 @@
+#!/usr/bin/env python3
+"""
+RadixDLT Documentation Crawler
+Crawls the suncrypt.json "web_crawl" sources: a same-site link frontier,
+robots.txt aware, fetched by an async worker pool with per-host
+politeness limits. URLs are deduplicated by normalized form and pages by
+content hash, and every crawl writes a page manifest under kb/raw/crawl.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+from datetime import datetime
+from html.parser import HTMLParser
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urljoin, urlsplit, urlunsplit, parse_qsl, urlencode
+from urllib.robotparser import RobotFileParser
+
+import httpx
+
+CRAWL_DIR = 'kb/raw/crawl'
+MANIFEST_FILENAME = 'manifest.json'
+USER_AGENT = 'RadixKBHarvester/1.0 (+https://github.com/0xsherlocks/radix-scrypto-llm)'
+
+# Links to these never lead to documentation pages
+SKIP_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico', '.pdf', '.zip',
+    '.gz', '.tar', '.mp4', '.webm', '.mp3', '.woff', '.woff2', '.ttf', '.css', '.js', '.json', '.xml',
+}
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|ref|fbclid|gclid)$')
+GONE_STATUSES = {404, 410}  # Only these remove a previously stored page
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for deduplication."""
+    parts = urlsplit(url)
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r'/{2,}', '/', parts.path or '/')
+    if path.endswith('/index.html'):
+        path = path[:-len('index.html')]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+                             if not TRACKING_PARAMS.match(k)))
+    return urlunsplit((scheme, host, path, query, ''))
+
+
+def url_to_path(url: str) -> str:
+    """Relative file path (under the host directory) for a normalized page URL.
+
+    The readable slug is lossy (`a/b` and `a__b`, `x.html` and `x/`,
+    truncation), so a short hash of the full URL keeps names unique.
+    """
+    parts = urlsplit(url)
+    path = parts.path.strip('/') or 'index'
+    if path.endswith('.html') or path.endswith('.htm'):
+        path = path.rsplit('.', 1)[0]
+    slug = re.sub(r'[^A-Za-z0-9._-]+', '_', path.replace('/', '__'))[:150]
+    return f"{slug}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:10]}.html"
+
+
+class LinkExtractor(HTMLParser):
+    """Collect href targets of <a> tags (and the <base> href, if any)."""
+
+    def __init__(self):
+        super().__init__()
+        self.links: List[str] = []
+        self.base: Optional[str] = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'a':
+            href = dict(attrs).get('href')
+            if href:
+                self.links.append(href)
+        elif tag == 'base' and self.base is None:
+            self.base = dict(attrs).get('href')
+
+
+def extract_links(html: str, page_url: str) -> List[str]:
+    """Absolute, normalized http(s) links found in a page."""
+    parser = LinkExtractor()
+    try:
+        parser.feed(html)
+    except Exception:
+        pass
+    base = urljoin(page_url, parser.base) if parser.base else page_url
+    links = []
+    for href in parser.links:
+        if href.startswith(('mailto:', 'javascript:', 'tel:', '#')):
+            continue
+        absolute = urljoin(base, href)
+        if urlsplit(absolute).scheme in ('http', 'https'):
+            links.append(normalize_url(absolute))
+    return links
+
+
+class HostPoliteness:
+    """Per-host concurrency cap and minimum delay between request starts."""
+
+    def __init__(self, max_concurrency: int, delay: float):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.delay = delay
+        self.next_start = 0.0
+        self.lock = asyncio.Lock()
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        async with self.lock:
+            wait = self.next_start - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            self.next_start = time.monotonic() + self.delay
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class WebCrawler:
+    """Crawl one documentation site from a seed URL."""
+
+    def __init__(self, seed_url: str, output_dir: str = CRAWL_DIR,
+                 max_pages: int = 500, max_depth: int = 6, workers: int = 8,
+                 per_host_concurrency: int = 2, per_host_delay: float = 0.5,
+                 timeout: float = 30.0, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.seed_url = normalize_url(seed_url)
+        seed = urlsplit(self.seed_url)
+        self.host = seed.netloc
+        # Deep seeds (e.g. /main/scrypto/introduction.html) stay within their section
+        self.scope = seed.path if seed.path.endswith('/') else seed.path.rsplit('/', 1)[0] + '/'
+        self.output_dir = Path(output_dir) / re.sub(r'[^A-Za-z0-9.-]', '_', self.host)
+        self.manifest_path = self.output_dir / MANIFEST_FILENAME
+        self.max_pages = max_pages
+        self.max_depth = max_depth
+        self.workers = workers
+        self.per_host_concurrency = per_host_concurrency
+        self.per_host_delay = per_host_delay
+        self.timeout = timeout
+        self.transport = transport  # Custom httpx transport (e.g. a MockTransport in tests)
+
+        self.robots: Optional[RobotFileParser] = None
+        self.seen: Set[str] = set()
+        self.content_hashes: Dict[str, str] = {}  # sha256 -> first URL with that content
+        self.manifest: Dict[str, Dict[str, Any]] = {}
+        self.previous: Dict[str, Dict[str, Any]] = self.load_manifest()
+        self.stats = {
+            "discovered": 0, "fetched": 0, "not_modified": 0, "duplicates": 0,
+            "robots_blocked": 0, "errors": 0, "bytes": 0, "out_of_budget": 0,
+            "carried_forward": 0, "removed": 0,
+        }
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Pages recorded by the previous crawl of this site."""
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get("pages", {})
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def save_manifest(self):
+        """Atomically write the page manifest, then delete pages gone from the site.
+
+        A page is deleted only if this run fetched its URL and got 404 or
+        410, or found it duplicates another stored page. Pages the crawl
+        did not reach (budget, robots.txt) or failed to fetch keep their
+        file and previous entry, so a partial or flaky crawl never shrinks
+        the knowledge base.
+        """
+        removed = []
+        for url, previous in self.previous.items():
+            path = previous.get("path")
+            if not path:
+                continue
+            entry = self.manifest.get(url)
+            if entry is not None and entry.get("path"):
+                if entry["path"] != path:
+                    removed.append(path)  # Re-fetched and stored under a new name
+                continue
+            if entry is not None and (entry.get("status") in GONE_STATUSES or entry.get("duplicate_of")):
+                removed.append(path)  # Gone, or now stored under the URL it duplicates
+                continue
+            carried = {key: value for key, value in previous.items() if key != "last_attempt"}
+            carried["carried_forward"] = True
+            if entry is not None:
+                carried["last_attempt"] = entry
+            self.manifest[url] = carried
+            self.stats["carried_forward"] += 1
+
+        kept = {entry["path"] for entry in self.manifest.values() if entry.get("path")}
+        removed = [path for path in removed if path not in kept]
+        self.stats["removed"] = len(removed)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.manifest_path.with_suffix('.json.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "seed": self.seed_url,
+                "crawled_at": datetime.now().isoformat(timespec='seconds'),
+                "stats": self.stats,
+                "pages": self.manifest,
+            }, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
+
+        for path in removed:
+            if (self.output_dir / path).exists():
+                (self.output_dir / path).unlink()
+
+    def in_scope(self, url: str) -> bool:
+        """Same host, under the seed's section, and plausibly an HTML page."""
+        parts = urlsplit(url)
+        if parts.netloc != self.host or not parts.path.startswith(self.scope):
+            return False
+        return os.path.splitext(parts.path)[1].lower() not in SKIP_EXTENSIONS
+
+    async def load_robots(self, client: httpx.AsyncClient):
+        """Fetch and parse robots.txt; an unreachable robots.txt allows everything."""
+        self.robots = RobotFileParser()
+        robots_url = f"{urlsplit(self.seed_url).scheme}://{self.host}/robots.txt"
+        try:
+            response = await client.get(robots_url)
+            if response.status_code >= 400:
+                self.robots.allow_all = True
+            else:
+                self.robots.parse(response.text.splitlines())
+        except httpx.HTTPError:
+            self.robots.allow_all = True
+        crawl_delay = self.robots.crawl_delay(USER_AGENT)
+        if crawl_delay:
+            self.per_host_delay = max(self.per_host_delay, float(crawl_delay))
+
+    async def fetch(self, client: httpx.AsyncClient, politeness: HostPoliteness,
+                    url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Fetch a page (conditionally, if crawled before); returns (html, manifest entry)."""
+        previous = self.previous.get(url, {})
+        headers = {}
+        previous_path = self.output_dir / previous["path"] if previous.get("path") else None
+        if previous_path is not None and previous_path.exists():
+            if previous.get("etag"):
+                headers['If-None-Match'] = previous["etag"]
+            if previous.get("last_modified"):
+                headers['If-Modified-Since'] = previous["last_modified"]
+
+        async with politeness:
+            try:
+                response = await client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                self.stats["errors"] += 1
+                return None, {"status": None, "error": type(e).__name__}
+
+        final_url = normalize_url(str(response.url))
+        if final_url != url and not self.in_scope(final_url):
+            return None, {"status": response.status_code, "skipped": "redirected off-site",
+                          "final_url": final_url}
+        if response.status_code == 304:
+            self.stats["not_modified"] += 1
+            html = await asyncio.to_thread(previous_path.read_text, encoding='utf-8', errors='replace')
+            entry = {key: value for key, value in previous.items()
+                     if key not in ("carried_forward", "last_attempt")}
+            return html, dict(entry, status=304)
+        if response.status_code >= 400:
+            self.stats["errors"] += 1
+            return None, {"status": response.status_code}
+        if 'html' not in response.headers.get('content-type', 'text/html'):
+            return None, {"status": response.status_code, "skipped": "not html"}
+
+        self.stats["fetched"] += 1
+        self.stats["bytes"] += len(response.content)
+        return response.text, {
+            "status": response.status_code,
+            "etag": response.headers.get('ETag'),
+            "last_modified": response.headers.get('Last-Modified'),
+            "bytes": len(response.content),
+            "final_url": final_url,
+            "fetched_at": datetime.now().isoformat(timespec='seconds'),
+        }
+
+    async def crawl(self) -> Dict[str, Any]:
+        """Crawl the site and return the run report."""
+        start = time.perf_counter()
+        frontier: asyncio.Queue = asyncio.Queue()
+        self.seen.add(self.seed_url)
+        self.stats["discovered"] = 1
+        await frontier.put((self.seed_url, 0))
+
+        limits = httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers)
+        async with httpx.AsyncClient(headers={'User-Agent': USER_AGENT}, limits=limits,
+                                     timeout=self.timeout, follow_redirects=True,
+                                     transport=self.transport) as client:
+            await self.load_robots(client)
+            politeness = HostPoliteness(self.per_host_concurrency, self.per_host_delay)
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+
+            async def worker():
+                while True:
+                    url, depth = await frontier.get()
+                    try:
+                        await self.visit(client, politeness, frontier, url, depth)
+                    except Exception as e:
+                        self.stats["errors"] += 1
+                        print(f"  ❌ {url}: {e}")
+                    finally:
+                        frontier.task_done()
+
+            workers = [asyncio.create_task(worker()) for _ in range(self.workers)]
+            await frontier.join()
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+        self.save_manifest()
+        return self.report(time.perf_counter() - start)
+
+    async def visit(self, client, politeness, frontier, url: str, depth: int):
+        """Fetch one page, store it unless it duplicates another, and queue its links."""
+        if not self.robots.can_fetch(USER_AGENT, url):
+            self.stats["robots_blocked"] += 1
+            self.manifest[url] = {"status": None, "skipped": "robots.txt"}
+            return
+
+        html, entry = await self.fetch(client, politeness, url)
+        if html is None:
+            self.manifest[url] = entry
+            return
+
+        content_hash = hashlib.sha256(html.encode('utf-8')).hexdigest()
+        entry["sha256"] = content_hash
+        entry["depth"] = depth
+        original = self.content_hashes.setdefault(content_hash, url)
+        if original != url:
+            # Same content reachable under another URL (aliases, trailing slashes, ...)
+            self.stats["duplicates"] += 1
+            entry.pop("path", None)
+            entry["duplicate_of"] = original
+            self.manifest[url] = entry
+            return
+
+        if entry["status"] != 304:
+            entry["path"] = url_to_path(url)
+            target = self.output_dir / entry["path"]
+            await asyncio.to_thread(target.write_text, html, encoding='utf-8')
+        self.manifest[url] = entry
+
+        if depth >= self.max_depth:
+            return
+        links = await asyncio.to_thread(extract_links, html, entry.get("final_url", url))
+        for link in links:
+            if link in self.seen or not self.in_scope(link):
+                continue
+            if len(self.seen) >= self.max_pages:
+                self.stats["out_of_budget"] += 1
+                continue
+            self.seen.add(link)
+            self.stats["discovered"] += 1
+            await frontier.put((link, depth + 1))
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        """Coverage and fetch-rate summary for the run."""
+        stored = sum(1 for entry in self.manifest.values() if entry.get("path"))
+        visited = sum(1 for entry in self.manifest.values() if not entry.get("carried_forward"))
+        report = dict(self.stats)
+        report.update({
+            "seed": self.seed_url,
+            "stored_pages": stored,
+            "coverage": round(visited / report["discovered"], 3) if report["discovered"] else 0.0,
+            "seconds": round(elapsed, 2),
+            "pages_per_second": round(visited / elapsed, 2) if elapsed > 0 else 0.0,
+            "kb_per_second": round(report["bytes"] / 1024 / elapsed, 1) if elapsed > 0 else 0.0,
+        })
+        return report
+
+
+def crawl_site(seed_url: str, **kwargs) -> Dict[str, Any]:
+    """Crawl one site synchronously and print its report."""
+    print(f"\n🕸️  Crawling {seed_url}")
+    report = asyncio.run(WebCrawler(seed_url, **kwargs).crawl())
+    print(f"  ✅ {report['stored_pages']} pages stored ({report['fetched']} fetched, "
+          f"{report['not_modified']} not modified, {report['duplicates']} duplicates, {report['carried_forward']} kept from the last crawl, "
+          f"{report['removed']} removed)")
+    print(f"  🧭 Coverage: {report['coverage']:.0%} of {report['discovered']} discovered URLs"
+          f" ({report['out_of_budget']} links over the page budget, "
+          f"{report['robots_blocked']} blocked by robots.txt, {report['errors']} errors)")
+    print(f"  ⏱️  {report['seconds']}s, {report['pages_per_second']} pages/s, {report['kb_per_second']} KB/s")
+    return report